@@ -0,0 +1,133 @@
+"""
+Amadeus OAuth Token Broker
+One process-wide access token per set of Amadeus credentials, shared by the flight and hotel clients
+
+Kept identical in agents/flight_agent and agents/hotel_agent, because each
+runtime is deployed from its own directory.
+"""
+
+import os
+import asyncio
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from http_transport import get_http_transport
+from token_cache import TokenCache
+
+
+# AMADEUS_BASE_URL points the clients at another environment (e.g. the local mock in mock_services.py)
+AMADEUS_BASE_URL = os.getenv("AMADEUS_BASE_URL", "https://test.api.amadeus.com").rstrip("/")
+AMADEUS_TOKEN_URL = f"{AMADEUS_BASE_URL}/v1/security/oauth2/token"
+
+
+class AmadeusTokenBroker:
+    """Single-flight Amadeus client-credentials token with background renewal"""
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        api_secret: Optional[str],
+        token_url: str = AMADEUS_TOKEN_URL,
+        token_cache: Optional[TokenCache] = None
+    ):
+        """
+        Initialize the broker
+
+        Args:
+            api_key: Amadeus API key (client_id)
+            api_secret: Amadeus API secret (client_secret)
+            token_url: OAuth token endpoint
+            token_cache: Cache holding the token (defaults to a new TokenCache)
+        """
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.token_url = token_url
+        self.token_cache = token_cache or TokenCache()
+        self.key = ("amadeus", api_key)
+
+    def _fetch_token(self) -> Tuple[str, int]:
+        """Request a new access token from Amadeus"""
+        response = get_http_transport().post(
+            self.token_url,
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            data={
+                "grant_type": "client_credentials",
+                "client_id": self.api_key,
+                "client_secret": self.api_secret
+            },
+            timeout=10
+        )
+        response.raise_for_status()
+        result = response.json()
+        return result["access_token"], int(result.get("expires_in", 1799))
+
+    def get_token(self) -> Optional[str]:
+        """Get OAuth access token (None if authentication failed)"""
+        try:
+            return self.token_cache.get_token(self.key, self._fetch_token)
+        except Exception as e:
+            print(f"Error getting Amadeus token: {e}")
+            return None
+
+    async def get_token_async(self) -> Optional[str]:
+        """Get OAuth access token from async code"""
+        token = self.token_cache.get_cached_token(self.key)
+        if token is not None:
+            return token
+        # Fetching blocks (network call, single-flight lock); keep it off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_token)
+
+    def invalidate(self, token: Optional[str] = None):
+        """
+        Drop the cached token, e.g. after Amadeus rejected it with 401
+
+        Args:
+            token: The rejected token; if another request already replaced it, the new one is kept
+        """
+        self.token_cache.invalidate(self.key, token)
+
+    async def get_async(self, http, url: str, token: Optional[str] = None, **kwargs):
+        """
+        Send an authorized GET; on 401, drop the cached token and retry once with a fresh one
+
+        Args:
+            http: Async HTTP transport (see get_async_http_transport)
+            url: Request URL
+            token: Token already fetched for this request (fetched here when omitted)
+            **kwargs: Passed on to http.get (params, timeout, extra headers)
+
+        Returns:
+            The response (the retry's response after a 401)
+        """
+        headers = kwargs.pop("headers", {})
+        token = token or await self.get_token_async()
+        response = await http.get(url, headers={**headers, "Authorization": f"Bearer {token}"}, **kwargs)
+        if response.status_code != 401:
+            return response
+
+        # Revoked, or expired early against expires_in (e.g. clock skew)
+        self.invalidate(token)
+        fresh_token = await self.get_token_async()
+        if not fresh_token:
+            return response
+        return await http.get(url, headers={**headers, "Authorization": f"Bearer {fresh_token}"}, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get token lifetime and fetch/hit counts"""
+        return self.token_cache.get_stats().get(self.key, {})
+
+
+# Process-wide brokers, one per set of credentials
+_token_brokers: Dict[Tuple[Optional[str], Optional[str]], AmadeusTokenBroker] = {}
+_token_brokers_lock = threading.Lock()
+
+
+def get_amadeus_token_broker(api_key: Optional[str] = None, api_secret: Optional[str] = None) -> AmadeusTokenBroker:
+    """Get or create the token broker for the given (or AMADEUS_API_KEY/AMADEUS_API_SECRET) credentials"""
+    api_key = api_key or os.getenv("AMADEUS_API_KEY")
+    api_secret = api_secret or os.getenv("AMADEUS_API_SECRET")
+    with _token_brokers_lock:
+        broker = _token_brokers.get((api_key, api_secret))
+        if broker is None:
+            broker = _token_brokers[(api_key, api_secret)] = AmadeusTokenBroker(api_key, api_secret)
+        return broker
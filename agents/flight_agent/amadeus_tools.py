@@ -4,50 +4,35 @@ Real-time flight data integration
 """
 
 import os
-import requests
-from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+import httpx
+import asyncio
+from typing import Dict, List, Any, Optional, Union
 
+from amadeus_auth import AMADEUS_BASE_URL, get_amadeus_token_broker
+from http_transport import get_async_http_transport
+from offer_cache import get_offer_cache
+from price_calendar import build_date_grid, build_price_calendar
 
-class AmadeusAPI:
-    """Amadeus API client for flight searches"""
+
+class AsyncAmadeusAPI:
+    """Async Amadeus API client for flight searches on the shared async HTTP client"""
     
     def __init__(self):
         self.api_key = os.getenv("AMADEUS_API_KEY")
         self.api_secret = os.getenv("AMADEUS_API_SECRET")
-        self.base_url = "https://test.api.amadeus.com/v2"
-        self.token = None
-        self.token_expires = None
+        self.base_url = f"{AMADEUS_BASE_URL}/v2"
+        # Shared with the other Amadeus clients in this process: at most one token fetch per expiry window
+        self.auth = get_amadeus_token_broker(self.api_key, self.api_secret)
+        self.http = get_async_http_transport()
+        self.cache = get_offer_cache("FLIGHT_CACHE", default_ttl=300)
+        # Concurrent searches per price calendar (stays within the API rate limit)
+        self.max_parallel_calendar_searches = int(os.getenv("FLIGHT_CALENDAR_MAX_PARALLEL", "5"))
     
-    def _get_access_token(self) -> str:
+    async def _get_access_token(self) -> str:
         """Get OAuth access token"""
-        if self.token and self.token_expires and datetime.now() < self.token_expires:
-            return self.token
-        
-        url = "https://test.api.amadeus.com/v1/security/oauth2/token"
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        data = {
-            "grant_type": "client_credentials",
-            "client_id": self.api_key,
-            "client_secret": self.api_secret
-        }
-        
-        try:
-            response = requests.post(url, headers=headers, data=data, timeout=10)
-            response.raise_for_status()
-            result = response.json()
-            
-            self.token = result["access_token"]
-            # Token expires in seconds, set expiry time
-            expires_in = result.get("expires_in", 1799)
-            self.token_expires = datetime.now() + timedelta(seconds=expires_in - 60)
-            
-            return self.token
-        except Exception as e:
-            print(f"Error getting Amadeus token: {e}")
-            return None
+        return await self.auth.get_token_async()
     
-    def search_flights(
+    async def search_flights(
         self,
         origin: str,
         destination: str,
@@ -74,12 +59,41 @@ class AmadeusAPI:
         Returns:
             Dict with flight offers or error message
         """
-        token = self._get_access_token()
+        cache_key = self.cache.make_key("amadeus:flight-offers", {
+            "origin": origin,
+            "destination": destination,
+            "departure_date": departure_date,
+            "return_date": return_date,
+            "adults": adults,
+            "travel_class": travel_class,
+            "non_stop": non_stop,
+            "max_results": max_results
+        })
+        return await self.cache.get_or_fetch_async(
+            cache_key,
+            lambda: self._search_flights(
+                origin, destination, departure_date, return_date, adults, travel_class, non_stop, max_results
+            ),
+            should_cache=lambda result: result.get("success", False)
+        )
+    
+    async def _search_flights(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: str,
+        return_date: Optional[str],
+        adults: int,
+        travel_class: str,
+        non_stop: bool,
+        max_results: int
+    ) -> Dict[str, Any]:
+        """Search flights without the cache"""
+        token = await self._get_access_token()
         if not token:
             return {"error": "Failed to authenticate with Amadeus API"}
         
         url = f"{self.base_url}/shopping/flight-offers"
-        headers = {"Authorization": f"Bearer {token}"}
         
         params = {
             "originLocationCode": origin,
@@ -96,7 +110,7 @@ class AmadeusAPI:
             params["returnDate"] = return_date
         
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
+            response = await self.auth.get_async(self.http, url, token, params=params, timeout=30)
             response.raise_for_status()
             data = response.json()
             
@@ -118,7 +132,7 @@ class AmadeusAPI:
                 "count": len(flights)
             }
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return {
                 "error": "API request failed",
                 "message": str(e)
@@ -129,6 +143,52 @@ class AmadeusAPI:
                 "message": str(e)
             }
     
+    async def search_price_calendar(
+        self,
+        origin: str,
+        destination: str,
+        earliest_departure: str,
+        latest_departure: str,
+        stay_nights: Union[int, List[int]],
+        adults: int = 1,
+        travel_class: str = "ECONOMY",
+        non_stop: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Get the lowest round-trip fare for every departure date in a window and stay length
+        
+        The date pairs are searched concurrently (at most max_parallel_calendar_searches
+        at a time) through search_flights, so recently searched pairs come from the cache.
+        
+        Args:
+            origin: IATA airport code (e.g., 'JFK')
+            destination: IATA airport code (e.g., 'JED')
+            earliest_departure: First departure date in YYYY-MM-DD format
+            latest_departure: Last departure date in YYYY-MM-DD format
+            stay_nights: Stay length in nights, or a list of stay lengths to compare
+            adults: Number of adult passengers
+            travel_class: ECONOMY, PREMIUM_ECONOMY, BUSINESS, or FIRST
+            non_stop: True for direct flights only
+        
+        Returns:
+            Dict with the lowest-fare matrix or error message
+        """
+        try:
+            grid = build_date_grid(earliest_departure, latest_departure, stay_nights)
+        except ValueError as e:
+            return {"error": "Invalid date window", "message": str(e)}
+        
+        semaphore = asyncio.Semaphore(self.max_parallel_calendar_searches)
+        
+        async def search(departure_date: str, return_date: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.search_flights(
+                    origin, destination, departure_date, return_date, adults, travel_class, non_stop
+                )
+        
+        results = await asyncio.gather(*(search(departure, return_date) for departure, return_date, _ in grid))
+        return {"success": True, **build_price_calendar(grid, results)}
+    
     def _parse_flight_offer(self, offer: Dict) -> Dict[str, Any]:
         """Parse Amadeus flight offer into simplified format"""
         try:
@@ -217,8 +277,35 @@ class AmadeusAPI:
         return airports.get(city_lower)
 
 
-# Create singleton instance
+class AmadeusAPI:
+    """Amadeus API client for flight searches (blocking wrapper around AsyncAmadeusAPI)"""
+    
+    def __init__(self, client: Optional[AsyncAmadeusAPI] = None):
+        self.client = client or get_async_amadeus_api()
+    
+    def search_flights(self, *args, **kwargs) -> Dict[str, Any]:
+        """Search for flights using Amadeus API (see AsyncAmadeusAPI.search_flights)"""
+        return self.client.http.run(self.client.search_flights(*args, **kwargs))
+    
+    def search_price_calendar(self, *args, **kwargs) -> Dict[str, Any]:
+        """Lowest fares over a date window (see AsyncAmadeusAPI.search_price_calendar)"""
+        return self.client.http.run(self.client.search_price_calendar(*args, **kwargs))
+    
+    def get_airport_code(self, city_name: str) -> Optional[str]:
+        """Get IATA airport code for a city"""
+        return self.client.get_airport_code(city_name)
+
+
+# Create singleton instances
 _amadeus_api = None
+_async_amadeus_api = None
+
+def get_async_amadeus_api() -> AsyncAmadeusAPI:
+    """Get or create Async Amadeus API instance"""
+    global _async_amadeus_api
+    if _async_amadeus_api is None:
+        _async_amadeus_api = AsyncAmadeusAPI()
+    return _async_amadeus_api
 
 def get_amadeus_api() -> AmadeusAPI:
     """Get or create Amadeus API instance"""
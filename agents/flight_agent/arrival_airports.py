@@ -0,0 +1,160 @@
+"""
+Umrah Arrival Airports
+Saudi arrival airports, departure alternates, and ranking of flight offers by price
+and total journey time to the Haram (flight plus ground transfer)
+"""
+
+from typing import Any, Dict, List, Tuple
+
+from trip_contract import parse_iso_duration
+
+
+# Saudi arrival airports with approximate ground-transfer times (road or Haramain rail)
+# from the airport to the Haram of each holy city, in minutes
+SAUDI_ARRIVAL_AIRPORTS = {
+    "JED": {
+        "name": "King Abdulaziz International (Jeddah)",
+        "transfer_minutes": {"makkah": 75, "madinah": 150}
+    },
+    "MED": {
+        "name": "Prince Mohammad bin Abdulaziz International (Madinah)",
+        "transfer_minutes": {"makkah": 170, "madinah": 25}
+    },
+    "TIF": {
+        "name": "Taif International",
+        "transfer_minutes": {"makkah": 90, "madinah": 390}
+    },
+    "RUH": {
+        "name": "King Khalid International (Riyadh)",
+        "transfer_minutes": {"makkah": 540, "madinah": 540}
+    }
+}
+
+# Nearby departure airports worth comparing for the same trip
+DEPARTURE_ALTERNATES = {
+    "LHR": ["LGW", "MAN"],
+    "LGW": ["LHR"],
+    "MAN": ["LHR"],
+    "JFK": ["EWR"],
+    "EWR": ["JFK"],
+    "IAD": ["DCA"],
+    "DCA": ["IAD"],
+    "YYZ": ["YTZ"]
+}
+
+# Value of one hour of journey time in USD when combining price and time into one score
+DEFAULT_VALUE_OF_TIME_PER_HOUR = 20.0
+
+# Currency the searches are priced in, so prices and the value of time can be added up
+RANKING_CURRENCY = "USD"
+
+
+def departure_airports(origin: str, include_alternates: bool = True) -> List[str]:
+    """Get the departure airport plus its nearby alternates"""
+    origin = origin.upper().strip()
+    airports = [origin]
+    if include_alternates:
+        airports.extend(code for code in DEPARTURE_ALTERNATES.get(origin, []) if code != origin)
+    return airports
+
+
+def normalize_start_city(city: str) -> str:
+    """Map a city name to the SAUDI_ARRIVAL_AIRPORTS transfer key ('makkah' or 'madinah')"""
+    return "madinah" if city.lower().strip() in ("madinah", "medina", "med") else "makkah"
+
+
+def rank_gateway_offers(
+    results: Dict[Tuple[str, str], Any],
+    start_city: str = "Makkah",
+    value_of_time_per_hour: float = DEFAULT_VALUE_OF_TIME_PER_HOUR,
+    max_results: int = 5,
+    currency: str = RANKING_CURRENCY
+) -> Dict[str, Any]:
+    """
+    Merge flight offers for several origin/arrival airport pairs and rank them
+
+    Each offer is scored as price + value_of_time_per_hour * (outbound flight time +
+    ground transfer from the arrival airport to the Haram of the start city). Offers
+    without a journey time (unparseable duration or unknown arrival airport) cannot be
+    scored, so they are listed separately by price instead of ranked on price alone.
+    Only offers priced in currency are compared; others are counted and left out.
+
+    Args:
+        results: Decoded Amadeus flight-offers responses keyed by (origin, destination)
+        start_city: City where the pilgrimage starts ('Makkah' or 'Madinah')
+        value_of_time_per_hour: Value of one hour of journey time, in currency
+        max_results: Number of ranked options to return
+        currency: Currency the searches were priced in (sent as currencyCode)
+
+    Returns:
+        Dict with the ranked options, the unscored (untimed) options, the cheapest and
+        fastest option, the pairs that returned no offers and the number of offers
+        left out for their currency
+    """
+    city = normalize_start_city(start_city)
+    options = []
+    without_offers = []
+    other_currency = 0
+
+    for (origin, destination), result in results.items():
+        offers = result.get("data") if isinstance(result, dict) else None
+        if not offers:
+            without_offers.append(f"{origin}-{destination}")
+            continue
+
+        airport = SAUDI_ARRIVAL_AIRPORTS.get(destination, {})
+        transfer = airport.get("transfer_minutes", {}).get(city)
+        for offer in offers:
+            price = offer.get("price", {})
+            try:
+                total = float(price.get("grandTotal") or price.get("total"))
+            except (TypeError, ValueError):
+                continue
+            if price.get("currency", currency) != currency:
+                other_currency += 1
+                continue
+
+            outbound = (offer.get("itineraries") or [{}])[0]
+            segments = outbound.get("segments", [])
+            flight_minutes = parse_iso_duration(outbound.get("duration"))
+            journey_minutes = None
+            if flight_minutes is not None and transfer is not None:
+                journey_minutes = flight_minutes + transfer
+
+            options.append({
+                "origin": origin,
+                "destination": destination,
+                "arrival_airport": airport.get("name", destination),
+                "price": round(total, 2),
+                "currency": currency,
+                "carrier": segments[0].get("carrierCode") if segments else None,
+                "departure": segments[0].get("departure", {}).get("at") if segments else None,
+                "arrival": segments[-1].get("arrival", {}).get("at") if segments else None,
+                "stops": max(len(segments) - 1, 0),
+                "flight_minutes": flight_minutes,
+                "transfer_minutes": transfer,
+                "journey_minutes": journey_minutes,
+                "score": (
+                    round(total + value_of_time_per_hour * journey_minutes / 60, 2)
+                    if journey_minutes is not None else None
+                )
+            })
+
+    timed = sorted(
+        (option for option in options if option["score"] is not None),
+        key=lambda option: option["score"]
+    )
+    untimed = sorted(
+        (option for option in options if option["score"] is None),
+        key=lambda option: option["price"]
+    )
+    return {
+        "start_city": city,
+        "options": timed[:max_results],
+        "untimed_options": untimed[:max_results],
+        "cheapest": min(options, key=lambda option: option["price"]) if options else None,
+        "fastest": min(timed, key=lambda option: option["journey_minutes"]) if timed else None,
+        "searched": [f"{origin}-{destination}" for origin, destination in results],
+        "without_offers": without_offers,
+        "other_currency_offers": other_currency
+    }
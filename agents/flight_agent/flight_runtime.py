@@ -4,74 +4,123 @@ Using AgentCore Gateway for Amadeus API access
 """
 
 import os
+import re
 import json
 import httpx
-import asyncio
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
 from strands import Agent, tool
-from bedrock_agentcore_starter_toolkit.operations.gateway.client import GatewayClient
+from token_cache import TokenCache
+from gateway_transport import GatewayTransport, decode_tool_text
+from offer_cache import get_offer_cache
+from price_calendar import build_date_grid, build_price_calendar
+from arrival_airports import RANKING_CURRENCY, SAUDI_ARRIVAL_AIRPORTS, departure_airports, rank_gateway_offers
+from agent_pool import AgentPool
+from model_provider import create_model, token_usage
+from trip_contract import collect_trip_data, flight_offers_from_amadeus, record_trip_data
 
 # Initialize AgentCore app
 app = BedrockAgentCoreApp()
 
 # Gateway configuration (embedded)
 gateway_config = {
-    "gateway_url": "https://amadeus-travel-api-1770163078-w86qyqprty.gateway.bedrock-agentcore.us-west-2.amazonaws.com/mcp",
+    "gateway_url": os.getenv(
+        "GATEWAY_URL",
+        "https://amadeus-travel-api-1770163078-w86qyqprty.gateway.bedrock-agentcore.us-west-2.amazonaws.com/mcp"
+    ),
     "gateway_id": "amadeus-travel-api-1770163078-w86qyqprty",
     "region": "us-west-2",
     "client_info": {
         "client_id": "3hjjn9im3lbp2ej6ts60d8lbke",
         "client_secret": "ivnc1krj47u6pp6nkh0bl8jvrtct18o7ars8ob2th5gqrcumpma",
         "user_pool_id": "us-west-2_BRecPKvre",
-        "token_endpoint": "https://agentcore-5c57a8a2.auth.us-west-2.amazoncognito.com/oauth2/token",
+        "token_endpoint": os.getenv(
+            "GATEWAY_TOKEN_ENDPOINT",
+            "https://agentcore-5c57a8a2.auth.us-west-2.amazoncognito.com/oauth2/token"
+        ),
         "scope": "AmadeusGateway/invoke",
         "domain_prefix": "agentcore-5c57a8a2"
     },
     "target_id": "EYFJ4BNWJV"
 }
 
-# Initialize Gateway client
-gateway_client = GatewayClient(region_name=gateway_config["region"])
+# Gateway access tokens are reused until shortly before they expire
+token_cache = TokenCache()
+GATEWAY_TOKEN_KEY = (gateway_config["client_info"]["client_id"], gateway_config["client_info"]["scope"])
+
+
+def fetch_gateway_access_token():
+    """Request a new OAuth access token from Cognito using the client credentials flow"""
+    client_info = gateway_config["client_info"]
+    response = httpx.post(
+        client_info["token_endpoint"],
+        data={
+            "grant_type": "client_credentials",
+            "client_id": client_info["client_id"],
+            "client_secret": client_info["client_secret"],
+            "scope": client_info["scope"]
+        },
+        timeout=10.0
+    )
+    response.raise_for_status()
+    token_data = response.json()
+    return token_data["access_token"], int(token_data.get("expires_in", 3600))
 
 
 def get_gateway_access_token():
-    """Get OAuth access token for Gateway"""
-    return gateway_client.get_access_token_for_cognito(gateway_config["client_info"])
+    """Get OAuth access token for Gateway (cached per client_id/scope)"""
+    return token_cache.get_token(GATEWAY_TOKEN_KEY, fetch_gateway_access_token)
+
+
+# One event loop and one pooled HTTP/2 client shared by every tool call in this runtime
+gateway = GatewayTransport(
+    gateway_config["gateway_url"],
+    get_token=get_gateway_access_token,
+    invalidate_token=lambda token: token_cache.invalidate(GATEWAY_TOKEN_KEY, token)
+)
+
 
+# Flight offers are shared by every request in this runtime for FLIGHT_CACHE_TTL seconds
+flight_cache = get_offer_cache("FLIGHT_CACHE", default_ttl=300)
 
-async def call_gateway_tool(tool_name: str, arguments: dict):
+# Price calendar searches sent to the Gateway per batch request (keeps us within the Amadeus rate limit)
+CALENDAR_BATCH_SIZE = int(os.getenv("FLIGHT_CALENDAR_BATCH_SIZE", "10"))
+
+
+def call_gateway_tool(tool_name: str, arguments: dict) -> str:
     """Call a Gateway MCP tool"""
-    access_token = get_gateway_access_token()
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            gateway_config["gateway_url"],
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "tools/call",
-                "params": {
-                    "name": tool_name,
-                    "arguments": arguments
-                }
-            },
-            timeout=60.0
-        )
-        
-        result = response.json()
-        if "result" in result:
-            # Extract text content from MCP response
-            if "content" in result["result"]:
-                for content in result["result"]["content"]:
-                    if content.get("type") == "text":
-                        return content["text"]
-            return json.dumps(result["result"])
-        else:
-            return json.dumps({"error": result.get("error", "Unknown error")})
+    return gateway.call_tool_sync(tool_name, arguments)
+
+
+def is_cacheable_result(result: str) -> bool:
+    """Only cache successful searches; errors should be retried on the next request"""
+    decoded = decode_tool_text(result)
+    return not (isinstance(decoded, dict) and ("error" in decoded or "errors" in decoded))
+
+
+def call_gateway_tools_cached(calls: list) -> list:
+    """
+    Call Gateway tools, answering repeated searches from the flight cache
+    
+    Cache misses are sent to the Gateway together in one batch.
+    
+    Args:
+        calls: List of (tool_name, arguments) tuples
+    
+    Returns:
+        List of result strings in the same order as calls
+    """
+    keys = [flight_cache.make_key(tool_name, arguments) for tool_name, arguments in calls]
+    results = [flight_cache.get(key) for key in keys]
+    
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        fetched = gateway.call_tools_batch_sync([calls[i] for i in missing])
+        for i, result in zip(missing, fetched):
+            results[i] = result
+            if is_cacheable_result(result):
+                flight_cache.set(keys[i], result)
+    
+    return results
 
 
 # Airport code mapping for common cities
@@ -87,10 +136,45 @@ AIRPORT_CODES = {
     "manchester": "MAN",
     "dubai": "DXB",
     "istanbul": "IST",
-    "riyadh": "RUH"
+    "riyadh": "RUH",
+    "taif": "TIF"
 }
 
 
+def build_flight_search_arguments(
+    origin: str,
+    destination: str,
+    departure_date: str,
+    return_date: str = None,
+    adults: int = 1,
+    travel_class: str = "ECONOMY",
+    non_stop: bool = False,
+    currency: str = None
+) -> dict:
+    """Build the Gateway searchFlights arguments for one origin/destination pair"""
+    arguments = {
+        "originLocationCode": origin.upper(),
+        "destinationLocationCode": destination.upper(),
+        "departureDate": departure_date,
+        "adults": adults,
+        "max": 5
+    }
+    
+    if return_date:
+        arguments["returnDate"] = return_date
+    
+    if travel_class and travel_class.upper() != "ECONOMY":
+        arguments["travelClass"] = travel_class.upper()
+    
+    if non_stop:
+        arguments["nonStop"] = True
+    
+    if currency:
+        arguments["currencyCode"] = currency.upper()
+    
+    return arguments
+
+
 @tool
 def search_flights(
     origin: str,
@@ -116,27 +200,158 @@ def search_flights(
     Returns:
         JSON string with flight results including prices, times, and airlines
     """
-    # Prepare arguments for Gateway tool
-    arguments = {
-        "originLocationCode": origin.upper(),
-        "destinationLocationCode": destination.upper(),
-        "departureDate": departure_date,
-        "adults": adults,
-        "max": 5
-    }
+    arguments = build_flight_search_arguments(
+        origin, destination, departure_date, return_date, adults, travel_class, non_stop
+    )
     
-    if return_date:
-        arguments["returnDate"] = return_date
+    # Call Gateway tool (or reuse a recent identical search)
+    result = call_gateway_tools_cached([("amadeus-api___searchFlights", arguments)])[0]
+    record_trip_data(flights=flight_offers_from_amadeus(decode_tool_text(result), adults))
+    return result
+
+
+@tool
+def search_flights_multi_airport(
+    origin: str,
+    destinations: list[str],
+    departure_date: str,
+    return_date: str = None,
+    adults: int = 1,
+    travel_class: str = "ECONOMY",
+    non_stop: bool = False
+) -> str:
+    """
+    Search flights to several arrival airports at once (e.g. both JED and MED) in one Gateway round trip.
     
-    if travel_class and travel_class.upper() != "ECONOMY":
-        arguments["travelClass"] = travel_class.upper()
+    Args:
+        origin: Departure airport code (e.g., 'JFK', 'LHR')
+        destinations: Arrival airport codes to compare (e.g., ['JED', 'MED'])
+        departure_date: Departure date in YYYY-MM-DD format
+        return_date: Return date in YYYY-MM-DD format (optional for one-way)
+        adults: Number of adult passengers (default: 1)
+        travel_class: ECONOMY, PREMIUM_ECONOMY, BUSINESS, or FIRST
+        non_stop: True for direct flights only, False to include connections
     
-    if non_stop:
-        arguments["nonStop"] = True
+    Returns:
+        JSON string mapping each destination code to its flight results
+    """
+    destinations = [destination.upper() for destination in destinations]
+    calls = [
+        ("amadeus-api___searchFlights", build_flight_search_arguments(
+            origin, destination, departure_date, return_date, adults, travel_class, non_stop
+        ))
+        for destination in destinations
+    ]
+    results = call_gateway_tools_cached(calls)
+    decoded = {destination: decode_tool_text(result) for destination, result in zip(destinations, results)}
+    for result in decoded.values():
+        record_trip_data(flights=flight_offers_from_amadeus(result, adults))
+    return json.dumps(decoded)
+
+
+@tool
+def search_flights_any_gateway(
+    origin: str,
+    departure_date: str,
+    return_date: str = None,
+    adults: int = 1,
+    travel_class: str = "ECONOMY",
+    non_stop: bool = False,
+    start_city: str = "Makkah",
+    include_departure_alternates: bool = True,
+    max_results: int = 5
+) -> str:
+    """
+    Search every Saudi arrival airport (JED, MED, TIF, RUH) and nearby departure airports (e.g. LHR/LGW/MAN, JFK/EWR)
+    in one parallel round, ranked by price and total journey time to the Haram including ground transfer.
     
-    # Call Gateway tool
-    result = asyncio.run(call_gateway_tool("amadeus-api___searchFlights", arguments))
-    return result
+    Args:
+        origin: Departure airport code (e.g., 'JFK', 'LHR')
+        departure_date: Departure date in YYYY-MM-DD format
+        return_date: Return date in YYYY-MM-DD format (optional for one-way)
+        adults: Number of adult passengers (default: 1)
+        travel_class: ECONOMY, PREMIUM_ECONOMY, BUSINESS, or FIRST
+        non_stop: True for direct flights only, False to include connections
+        start_city: City where the pilgrimage starts - 'Makkah' or 'Madinah' (sets the transfer times)
+        include_departure_alternates: Also search nearby departure airports (default: True)
+        max_results: Number of ranked options to return (default: 5)
+    
+    Returns:
+        JSON string with ranked options, unscored options without a journey time, the cheapest and the fastest option
+    """
+    pairs = [
+        (departure, arrival)
+        for departure in departure_airports(origin, include_departure_alternates)
+        for arrival in SAUDI_ARRIVAL_AIRPORTS
+    ]
+    calls = [
+        # Every pair is priced in one currency, so offers can be ranked against each other
+        ("amadeus-api___searchFlights", build_flight_search_arguments(
+            departure, arrival, departure_date, return_date, adults, travel_class, non_stop, RANKING_CURRENCY
+        ))
+        for departure, arrival in pairs
+    ]
+    
+    # All pairs go to the Gateway in one batch; recently searched pairs come from the flight cache
+    results = call_gateway_tools_cached(calls)
+    decoded = {pair: decode_tool_text(result) for pair, result in zip(pairs, results)}
+    for result in decoded.values():
+        record_trip_data(flights=flight_offers_from_amadeus(result, adults))
+    ranking = rank_gateway_offers(
+        decoded,
+        start_city=start_city,
+        max_results=max_results
+    )
+    return json.dumps(ranking)
+
+
+@tool
+def search_flight_price_calendar(
+    origin: str,
+    destination: str,
+    earliest_departure: str,
+    latest_departure: str,
+    stay_nights: list[int],
+    adults: int = 1,
+    travel_class: str = "ECONOMY",
+    non_stop: bool = False
+) -> str:
+    """
+    Find the cheapest travel dates: lowest round-trip fare for every departure date in a window and stay length.
+    
+    Args:
+        origin: Departure airport code (e.g., 'JFK', 'LHR')
+        destination: Arrival airport code (e.g., 'JED', 'MED')
+        earliest_departure: First possible departure date in YYYY-MM-DD format
+        latest_departure: Last possible departure date in YYYY-MM-DD format
+        stay_nights: Stay lengths in nights to compare (e.g., [7, 10, 14])
+        adults: Number of adult passengers (default: 1)
+        travel_class: ECONOMY, PREMIUM_ECONOMY, BUSINESS, or FIRST
+        non_stop: True for direct flights only, False to include connections
+    
+    Returns:
+        JSON string with a lowest-fare matrix (one row per departure date) and the cheapest combination
+    """
+    try:
+        grid = build_date_grid(earliest_departure, latest_departure, stay_nights)
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    
+    calls = [
+        ("amadeus-api___searchFlights", build_flight_search_arguments(
+            origin, destination, departure_date, return_date, adults, travel_class, non_stop
+        ))
+        for departure_date, return_date, _ in grid
+    ]
+    
+    # Each batch is searched in parallel by the Gateway; dates seen recently come from the flight cache
+    results = []
+    for start in range(0, len(calls), CALENDAR_BATCH_SIZE):
+        results.extend(call_gateway_tools_cached(calls[start:start + CALENDAR_BATCH_SIZE]))
+    
+    calendar = build_price_calendar(grid, [decode_tool_text(result) for result in results])
+    calendar.update({"origin": origin.upper(), "destination": destination.upper()})
+    return json.dumps(calendar)
 
 
 @tool
@@ -159,21 +374,103 @@ def get_airport_code(city_name: str) -> str:
         return f"Airport code not found for {city_name}. Common codes: JED (Jeddah), MED (Medina), JFK (New York), LAX (Los Angeles), MAN (Manchester)"
 
 
-# Create flight agent with tools
-flight_agent = Agent(
-    model=os.getenv("FLIGHT_AGENT_MODEL", "anthropic.claude-3-5-sonnet-20241022-v2:0"),
-    tools=[search_flights, get_airport_code],
-    system_prompt="""You are a Flight Search Specialist for Umrah trips with access to REAL-TIME flight data via Amadeus API through AgentCore Gateway.
+# Cabin class labels used by the frontend wizard
+CABIN_CLASSES = {
+    "economy": "ECONOMY",
+    "premium economy": "PREMIUM_ECONOMY",
+    "business": "BUSINESS",
+    "first": "FIRST",
+    "first class": "FIRST"
+}
+
+
+def airport_code_from_form(value: str):
+    """Get the IATA code from a form value such as 'London Heathrow (LHR)' or a known city name"""
+    match = re.search(r"\(([A-Z]{3})\)", value or "")
+    if match:
+        return match.group(1)
+    return AIRPORT_CODES.get((value or "").lower().strip())
+
+
+def structured_flight_search(requirements: dict) -> dict:
+    """
+    Search flights for the frontend's structured trip requirements without an LLM turn
+    
+    The form fields map straight onto the Gateway searchFlights arguments. If
+    direct flights are preferred but none are found, connections are searched too.
+    
+    Args:
+        requirements: Trip requirements (travel_dates, travelers, flight_preferences)
+    
+    Returns:
+        Dict with a short summary in 'result' and the status; the offers are recorded as trip data
+    """
+    travel_dates = requirements.get("travel_dates", {})
+    flight_prefs = requirements.get("flight_preferences", {})
+    origin = airport_code_from_form(travel_dates.get("departure_airport"))
+    destination = airport_code_from_form(travel_dates.get("arrival_city", "Jeddah (JED)"))
+    
+    if not origin or not destination or not travel_dates.get("departure"):
+        return {
+            "result": "Cannot search flights: departure airport, arrival city and departure date are required.",
+            "status": "error"
+        }
+    
+    adults = len(requirements.get("travelers", [])) or requirements.get("num_travelers", 1)
+    travel_class = CABIN_CLASSES.get(str(flight_prefs.get("cabin_class", "Economy")).lower(), "ECONOMY")
+    non_stop = bool(flight_prefs.get("direct_flights", True))
+    
+    def search(non_stop: bool):
+        arguments = build_flight_search_arguments(
+            origin, destination, travel_dates["departure"], travel_dates.get("return"),
+            adults, travel_class, non_stop
+        )
+        result = call_gateway_tools_cached([("amadeus-api___searchFlights", arguments)])[0]
+        return flight_offers_from_amadeus(decode_tool_text(result), adults)
+    
+    offers = search(non_stop)
+    if not offers and non_stop:
+        offers = search(False)
+    record_trip_data(flights=offers)
+    
+    if not offers:
+        return {
+            "result": f"No flights found from {origin} to {destination} on {travel_dates['departure']}.",
+            "status": "success"
+        }
+    
+    lines = [
+        f"Found {len(offers)} flight offers from {origin} to {destination} departing "
+        f"{travel_dates['departure']} for {adults} adults ({travel_class}):"
+    ]
+    for offer in sorted(offers, key=lambda offer: offer.price_total)[:3]:
+        legs = [leg for leg in (offer.outbound, offer.inbound) if leg]
+        lines.append(
+            f"- {offer.airline}, {offer.currency} {offer.price_total:,.2f} total: " + "; ".join(
+                f"{leg.departure_airport} {leg.departure_time} -> {leg.arrival_airport} {leg.arrival_time}, "
+                f"{leg.stops} stop(s)"
+                for leg in legs
+            )
+        )
+    return {"result": "\n".join(lines), "status": "success"}
+
+
+FLIGHT_AGENT_PROMPT = """You are a Flight Search Specialist for Umrah trips with access to REAL-TIME flight data via Amadeus API through AgentCore Gateway.
 
 IMPORTANT: You have access to actual flight search tools. Always use them!
 
 Your tools:
 1. search_flights() - Search for real flights with live prices and availability (via Gateway)
-2. get_airport_code() - Get IATA codes for cities
+2. search_flights_multi_airport() - Compare several arrival airports (e.g. JED and MED) in ONE call
+3. search_flights_any_gateway() - Search ALL Saudi arrival airports and nearby departure airports in ONE call,
+   ranked by price and total journey time to the Haram (including ground transfer)
+4. search_flight_price_calendar() - Lowest fares for every departure date in a window and stay length in ONE call
+5. get_airport_code() - Get IATA codes for cities
 
 Key airports for Umrah:
 - Jeddah: JED (most common, closer to Makkah)
 - Medina: MED (for those starting in Madinah)
+- Taif: TIF and Riyadh: RUH (occasionally cheaper, but with a long ground transfer)
 
 When users request flights:
 1. Ask for missing information if needed:
@@ -186,6 +483,11 @@ When users request flights:
 2. Use get_airport_code() to find airport codes if needed
 
 3. Use search_flights() with the correct parameters
+   - If the user has no arrival preference, use search_flights_any_gateway() (with start_city set to
+     where the pilgrimage begins) instead of calling search_flights() once per airport
+   - Use search_flights_multi_airport() only to compare a specific set of arrival airports
+   - If the user's dates are flexible ("which week is cheapest?"), use search_flight_price_calendar()
+     instead of calling search_flights() once per date, then search_flights() for the cheapest dates
 
 4. ALWAYS PROVIDE MULTIPLE OPTIONS (2-3 minimum):
    - The search_flights tool returns up to 5 results
@@ -217,7 +519,25 @@ CRITICAL:
 - If user mentions Medina/Madinah as destination, use 'MED' airport code, NOT 'JED'!
 - Always respect the user's destination preference.
 - All API calls go through the Gateway - no direct API access needed!"""
-)
+
+
+def create_flight_agent() -> Agent:
+    """Create a flight agent; requests take one from flight_agents below"""
+    return Agent(
+        model=create_model("flight_agent", "FLIGHT_AGENT_MODEL", "anthropic.claude-3-5-sonnet-20241022-v2:0", prompt_cache=True),
+        tools=[
+            search_flights,
+            search_flights_multi_airport,
+            search_flights_any_gateway,
+            search_flight_price_calendar,
+            get_airport_code
+        ],
+        system_prompt=FLIGHT_AGENT_PROMPT
+    )
+
+
+# Each request checks out its own agent, so concurrent requests never share a conversation
+flight_agents = AgentPool(create_flight_agent, name="flight agent")
 
 
 @app.entrypoint
@@ -227,7 +547,16 @@ def invoke(payload, context):
     user_message = payload.get("prompt", "Hello")
     
     try:
-        response = flight_agent(user_message)
+        # The frontend's form fields already hold the search arguments; skip the model entirely
+        if payload.get("mode") == "structured_search":
+            with collect_trip_data() as collector:
+                response = structured_flight_search(payload.get("requirements") or {})
+            return {**response, "data": collector.dump(), "cache": flight_cache.get_stats()}
+        
+        # Tools record the offers they found; they are returned next to the prose
+        with collect_trip_data() as collector, flight_agents.agent() as flight_agent:
+            response = flight_agent(user_message)
+            usage = token_usage(flight_agent)
         
         if hasattr(response, 'message') and 'content' in response.message:
             result_text = response.message['content'][0]['text']
@@ -236,7 +565,10 @@ def invoke(payload, context):
         
         return {
             "result": result_text,
-            "status": "success"
+            "status": "success",
+            "data": collector.dump(),
+            "cache": flight_cache.get_stats(),
+            "usage": usage
         }
     except Exception as e:
         print(f"Error processing request: {e}")
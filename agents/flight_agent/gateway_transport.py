@@ -0,0 +1,226 @@
+"""
+AgentCore Gateway Transport
+Long-lived MCP client: one background event loop and one pooled httpx.AsyncClient
+
+Kept identical in agents/flight_agent and agents/hotel_agent, because each
+runtime is deployed from its own directory.
+"""
+
+import json
+import asyncio
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+try:
+    import h2  # noqa: F401 - HTTP/2 support is optional (pip install httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# JSON-RPC error code for a request the server cannot handle, e.g. a batch it does not support
+JSONRPC_INVALID_REQUEST = -32600
+
+
+class GatewayTransport:
+    """Sends MCP requests to the AgentCore Gateway over reused keep-alive connections"""
+
+    def __init__(
+        self,
+        gateway_url: str,
+        get_token: Callable[[], str],
+        invalidate_token: Optional[Callable[[str], None]] = None,
+        timeout: float = 60.0,
+        max_connections: int = 20,
+        keepalive_expiry: float = 120.0
+    ):
+        """
+        Initialize the transport (the loop and client start on first use)
+
+        Args:
+            gateway_url: Gateway MCP endpoint
+            get_token: Returns a (cached) OAuth access token; may block
+            invalidate_token: Called with the rejected token on 401 (keeps a token another
+                request already refreshed); may block
+            timeout: Request timeout in seconds
+            max_connections: Maximum pooled connections to the gateway
+            keepalive_expiry: Seconds an idle connection is kept open
+        """
+        self.gateway_url = gateway_url
+        self.get_token = get_token
+        self.invalidate_token = invalidate_token
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+
+        self._batch_supported = True
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop thread and HTTP client once"""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="gateway-transport", daemon=True)
+                thread.start()
+                self._client = httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=self.limits, timeout=self.timeout)
+                self._loop = loop
+            return self._loop
+
+    def run(self, coro, timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the transport's event loop from synchronous code
+
+        Args:
+            coro: Coroutine to run (typically from call_tool)
+            timeout: Optional seconds to wait for the result
+
+        Returns:
+            The coroutine's result
+        """
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+    async def post(self, body: Any) -> httpx.Response:
+        """POST a JSON-RPC body to the gateway, refreshing the token once on 401"""
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            # Token fetches may block on the network, keep them off the event loop
+            access_token = await loop.run_in_executor(None, self.get_token)
+            response = await self._client.post(
+                self.gateway_url,
+                headers={
+                    "Authorization": f"Bearer {access_token}",
+                    "Content-Type": "application/json"
+                },
+                json=body
+            )
+            # A cached token may have been revoked; fetch a new one and retry once
+            if response.status_code != 401 or self.invalidate_token is None:
+                break
+            # Invalidation waits on the token lock, which a concurrent fetch may hold
+            await loop.run_in_executor(None, self.invalidate_token, access_token)
+        return response
+
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
+        """
+        Call a Gateway MCP tool
+
+        Args:
+            tool_name: Gateway tool name (e.g. 'amadeus-api___searchFlights')
+            arguments: Tool arguments
+
+        Returns:
+            Text content of the tool result, or a JSON error string
+        """
+        response = await self.post({
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "tools/call",
+            "params": {
+                "name": tool_name,
+                "arguments": arguments
+            }
+        })
+        return extract_tool_text(response.json())
+
+    def call_tool_sync(self, tool_name: str, arguments: Dict[str, Any]) -> str:
+        """Call a Gateway MCP tool from synchronous code (e.g. a Strands tool)"""
+        return self.run(self.call_tool(tool_name, arguments))
+
+    async def call_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """
+        Call several Gateway MCP tools in one JSON-RPC batch request
+
+        Each call gets its own request id and results are matched back by id, so one
+        failed call only produces an error for that call. If the gateway does not accept
+        batches, the calls are sent concurrently as single requests over the shared pool.
+
+        Args:
+            calls: List of (tool_name, arguments) tuples
+
+        Returns:
+            List of result strings in the same order as calls
+        """
+        if len(calls) <= 1 or not self._batch_supported:
+            return await self._call_tools_individually(calls)
+
+        response = await self.post([
+            {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": "tools/call",
+                "params": {
+                    "name": tool_name,
+                    "arguments": arguments
+                }
+            }
+            for request_id, (tool_name, arguments) in enumerate(calls, 1)
+        ])
+
+        try:
+            results = response.json()
+        except ValueError:
+            results = None
+
+        if not isinstance(results, list):
+            # Only a definitive rejection turns batching off; a transient failure
+            # (5xx, error page, undecodable body) falls back for this request only
+            if is_batch_rejection(response.status_code, results):
+                self._batch_supported = False
+            return await self._call_tools_individually(calls)
+
+        results_by_id = {result.get("id"): result for result in results if isinstance(result, dict)}
+        return [
+            extract_tool_text(results_by_id.get(request_id, {"error": f"No response for request {request_id}"}))
+            for request_id in range(1, len(calls) + 1)
+        ]
+
+    async def _call_tools_individually(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Send the calls concurrently as single requests over the shared pool"""
+        return list(await asyncio.gather(*(
+            self.call_tool(tool_name, arguments) for tool_name, arguments in calls
+        )))
+
+    def call_tools_batch_sync(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Call several Gateway MCP tools in one batch from synchronous code"""
+        return self.run(self.call_tools_batch(calls))
+
+
+def is_batch_rejection(status_code: int, body: Any) -> bool:
+    """Whether a response to a batch means the gateway does not accept batches at all"""
+    if status_code == 400:
+        return True
+    error = body.get("error") if isinstance(body, dict) else None
+    return isinstance(error, dict) and error.get("code") == JSONRPC_INVALID_REQUEST
+
+
+def extract_tool_text(result: Dict[str, Any]) -> str:
+    """Extract the text content from an MCP JSON-RPC response (failed tool calls become a JSON error)"""
+    if "result" in result:
+        text = None
+        if "content" in result["result"]:
+            for content in result["result"]["content"]:
+                if content.get("type") == "text":
+                    text = content["text"]
+                    break
+        # A failed tool call (e.g. an upstream 5xx or timeout) is a result with isError and plain text
+        if result["result"].get("isError"):
+            return json.dumps({"error": text or "Tool call failed"})
+        return text if text is not None else json.dumps(result["result"])
+    else:
+        return json.dumps({"error": result.get("error", "Unknown error")})
+
+
+def decode_tool_text(text: str) -> Any:
+    """Decode a tool result as JSON when possible, so batched results are not double-encoded"""
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        return text
@@ -0,0 +1,248 @@
+"""
+HTTP Transport
+Shared, connection-pooled HTTP clients for the direct API clients: a requests.Session
+for blocking calls and an httpx.AsyncClient on a background event loop for async calls
+
+Kept identical in agents/flight_agent and agents/hotel_agent, because each
+runtime is deployed from its own directory.
+"""
+
+import os
+import random
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import h2  # noqa: F401 - HTTP/2 support is optional (pip install httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# Rate limiting and transient server errors are retried; everything else is returned to the caller
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class JitteredRetry(Retry):
+    """urllib3 Retry with full jitter, so concurrent clients do not retry in lockstep"""
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return random.uniform(0, backoff) if backoff > 0 else 0
+
+
+class HTTPTransport:
+    """Keep-alive connection pool with retries and a concurrency limit per host"""
+
+    def __init__(
+        self,
+        pool_maxsize: int = 20,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_concurrency_per_host: int = 10
+    ):
+        """
+        Initialize the transport
+
+        Args:
+            pool_maxsize: Connections kept open per host
+            max_retries: Retries on connection errors and 429/5xx responses
+            backoff_factor: Base for the exponential (jittered) backoff in seconds
+            max_concurrency_per_host: Requests allowed in flight to one host at a time
+        """
+        self.max_concurrency_per_host = max_concurrency_per_host
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+        retry = JitteredRetry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            respect_retry_after_header=True,
+            raise_on_status=False  # Return the last response so raise_for_status() reports it
+        )
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_maxsize, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive"
+        })
+
+    def _semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(self.max_concurrency_per_host)
+            return semaphore
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request over the pooled session, waiting if the host is at its concurrency limit"""
+        with self._semaphore(url):
+            return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+
+class AsyncHTTPTransport:
+    """
+    One pooled httpx.AsyncClient for every async API client in the process
+
+    The client lives on a background event loop, so it can be awaited from any
+    event loop and driven from blocking code with run(). It applies the same
+    retry policy and per-host concurrency limit as HTTPTransport.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_concurrency_per_host: int = 10,
+        keepalive_expiry: float = 120.0
+    ):
+        """
+        Initialize the transport (the loop and client start on first use)
+
+        Args:
+            max_connections: Maximum pooled connections across all hosts
+            max_retries: Retries on connection errors and 429/5xx responses
+            backoff_factor: Base for the exponential (jittered) backoff in seconds
+            max_concurrency_per_host: Requests allowed in flight to one host at a time
+            keepalive_expiry: Seconds an idle connection is kept open
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_concurrency_per_host = max_concurrency_per_host
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}  # Only used on the transport loop
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop thread and HTTP client once"""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="http-transport", daemon=True)
+                thread.start()
+                self._client = httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=self.limits)
+                self._loop = loop
+            return self._loop
+
+    def run(self, coro, timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the transport's event loop from blocking code
+
+        Args:
+            coro: Coroutine to run (e.g. AsyncAmadeusAPI.search_flights(...))
+            timeout: Optional seconds to wait for the result
+
+        Returns:
+            The coroutine's result
+        """
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request over the pooled client, retrying connection errors and 429/5xx responses"""
+        loop = self._ensure_started()
+        if asyncio.get_running_loop() is not loop:
+            # The pooled connections belong to the transport loop; hand the request over to it
+            return await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(self._request(method, url, **kwargs), loop)
+            )
+        return await self._request(method, url, **kwargs)
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        host = urlsplit(url).netloc
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.max_concurrency_per_host)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with semaphore:
+                    response = await self._client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                    return response
+                delay = self._retry_after(response)
+                if delay is None:
+                    delay = self._backoff(attempt)
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, self.backoff_factor * (2 ** attempt))
+
+    def _retry_after(self, response: httpx.Response) -> Optional[float]:
+        """Seconds requested by a Retry-After header, if any"""
+        try:
+            return min(float(response.headers["Retry-After"]), 30.0)
+        except (KeyError, ValueError):
+            return None
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+
+# Create singleton instances
+_http_transport: Optional[HTTPTransport] = None
+_async_http_transport: Optional[AsyncHTTPTransport] = None
+_http_transport_lock = threading.Lock()
+
+
+def get_http_transport() -> HTTPTransport:
+    """Get or create the process-wide HTTP transport (configured by HTTP_* environment variables)"""
+    global _http_transport
+    with _http_transport_lock:
+        if _http_transport is None:
+            _http_transport = HTTPTransport(
+                pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", "20")),
+                max_retries=int(os.getenv("HTTP_MAX_RETRIES", "3")),
+                backoff_factor=float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5")),
+                max_concurrency_per_host=int(os.getenv("HTTP_MAX_CONCURRENCY_PER_HOST", "10"))
+            )
+        return _http_transport
+
+
+def get_async_http_transport() -> AsyncHTTPTransport:
+    """Get or create the process-wide async HTTP transport (configured by HTTP_* environment variables)"""
+    global _async_http_transport
+    with _http_transport_lock:
+        if _async_http_transport is None:
+            _async_http_transport = AsyncHTTPTransport(
+                max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+                max_retries=int(os.getenv("HTTP_MAX_RETRIES", "3")),
+                backoff_factor=float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5")),
+                max_concurrency_per_host=int(os.getenv("HTTP_MAX_CONCURRENCY_PER_HOST", "10"))
+            )
+        return _async_http_transport
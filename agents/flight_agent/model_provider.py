@@ -0,0 +1,275 @@
+"""
+Model Provider
+Chooses the model backend for an agent: Bedrock (the default) or a scripted
+model that replays recorded tool calls and answers without network access
+
+{PREFIX}_PROMPT_CACHE (e.g. FLIGHT_AGENT_PROMPT_CACHE) switches Bedrock prompt
+caching on or off per runtime. With caching on, cache points are placed after
+the system prompt, the tool schemas and the conversation so far; Strands only
+sends them for models that support caching (Claude). token_usage() reports the
+cache-read and cache-write token counts.
+
+MODEL_PROVIDER=scripted turns the scripted backend on for every agent. It is
+meant for benchmarking framework overhead, serialization and concurrency:
+    SCRIPTED_MODEL_SCRIPT     JSON file mapping agent name to a list of steps
+    SCRIPTED_MODEL_LATENCY_MS Delay before the first token of each response
+    SCRIPTED_MODEL_TOKEN_MS   Delay per output token (about 4 characters)
+
+A step is one model response, either {"text": "..."} or
+{"tool_calls": [{"name": "...", "input": {...}}]}. Text may contain {prompt}
+(the user's message) and {tool_results} (the tool results of the current turn).
+A {"structured_output": {...}} step is used when the agent is asked for
+structured output; without one, an empty instance of the schema is returned.
+
+Kept identical in every agent directory, because each runtime is deployed
+from its own directory.
+"""
+
+import os
+import json
+import uuid
+import asyncio
+import threading
+from typing import Any, AsyncGenerator, Dict, List, Optional, Union
+
+from strands.models import BedrockModel, CacheConfig, Model
+
+
+# Response used when SCRIPTED_MODEL_SCRIPT has no entry for an agent
+DEFAULT_STEP = {"text": "Scripted response to: {prompt}"}
+
+CHARS_PER_TOKEN = 4
+
+
+def _text_of(message: Dict[str, Any]) -> str:
+    return "".join(block.get("text", "") for block in message.get("content", []))
+
+
+def _tool_result_text(block: Dict[str, Any]) -> str:
+    content = block["toolResult"].get("content", [])
+    return "".join(item.get("text", "") or json.dumps(item.get("json", "")) for item in content)
+
+
+def _empty_instance(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Smallest input that satisfies the required fields of a JSON schema"""
+    empty = {"array": [], "string": "", "integer": 0, "number": 0, "boolean": False}
+    properties = schema.get("properties", {})
+    return {
+        name: empty.get(properties.get(name, {}).get("type"), {})
+        for name in schema.get("required", [])
+    }
+
+
+class ScriptedModel(Model):
+    """Strands model that replays a fixed sequence of responses with simulated latency"""
+
+    def __init__(
+        self,
+        agent_name: str,
+        steps: List[Dict[str, Any]],
+        latency_ms: float = 0,
+        token_ms: float = 0,
+        prompt_cache: bool = False
+    ):
+        """
+        Args:
+            agent_name: Agent the script belongs to (reported in get_config)
+            steps: Responses to replay, one per model call within a user turn
+            latency_ms: Delay before the first token of each response
+            token_ms: Delay per output token
+            prompt_cache: Report the system prompt and tool schemas as cache writes, then cache reads
+        """
+        self.prompt_cache = prompt_cache
+        self._cache_written = False
+        self.structured_step = next((step for step in steps if "structured_output" in step), None)
+        self.config = {
+            "model_id": f"scripted:{agent_name}",
+            "steps": [step for step in steps if "structured_output" not in step] or [DEFAULT_STEP],
+            "latency_ms": latency_ms,
+            "token_ms": token_ms
+        }
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    def _next_step(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Pick the step for this call: the number of assistant messages since the user's last message"""
+        turn = 0
+        for message in reversed(messages):
+            if message["role"] == "assistant":
+                turn += 1
+            elif not any("toolResult" in block for block in message.get("content", [])):
+                break
+        steps = self.config["steps"]
+        if turn < len(steps):
+            return steps[turn]
+        # Never repeat a tool call past the end of the script, or the agent would loop forever
+        return steps[-1] if "text" in steps[-1] else DEFAULT_STEP
+
+    def _render(self, text: str, messages: List[Dict[str, Any]]) -> str:
+        prompt, tool_results = "", []
+        for message in reversed(messages):
+            results = [block for block in message.get("content", []) if "toolResult" in block]
+            if message["role"] == "user" and not results:
+                prompt = _text_of(message)
+                break
+            tool_results[:0] = [_tool_result_text(block) for block in results]
+        return text.replace("{prompt}", prompt).replace("{tool_results}", "\n\n".join(tool_results))
+
+    async def _delay(self, tokens: int):
+        seconds = tokens * self.config["token_ms"] / 1000
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_specs: Optional[List[Dict[str, Any]]] = None,
+        system_prompt: Optional[str] = None,
+        *,
+        tool_choice: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        if self.config["latency_ms"]:
+            await asyncio.sleep(self.config["latency_ms"] / 1000)
+
+        if tool_choice is not None and tool_specs:
+            # Forced tool call: the agent wants structured output
+            spec = tool_specs[0]
+            payload = (self.structured_step or {}).get("structured_output")
+            if payload is None:
+                payload = _empty_instance(spec.get("inputSchema", {}).get("json", {}))
+            step = {"tool_calls": [{"name": spec["name"], "input": payload}]}
+        else:
+            step = self._next_step(messages)
+
+        yield {"messageStart": {"role": "assistant"}}
+        output_tokens = 0
+
+        if "tool_calls" in step:
+            for call in step["tool_calls"]:
+                arguments = json.dumps(call.get("input", {}))
+                tokens = len(arguments) // CHARS_PER_TOKEN + 1
+                await self._delay(tokens)
+                output_tokens += tokens
+                yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": f"tooluse_{uuid.uuid4().hex[:22]}", "name": call["name"]}}}}
+                yield {"contentBlockDelta": {"delta": {"toolUse": {"input": arguments}}}}
+                yield {"contentBlockStop": {}}
+            stop_reason = "tool_use"
+        else:
+            text = self._render(step.get("text", ""), messages)
+            yield {"contentBlockStart": {"start": {}}}
+            if self.config["token_ms"]:
+                for start in range(0, len(text), CHARS_PER_TOKEN):
+                    await self._delay(1)
+                    yield {"contentBlockDelta": {"delta": {"text": text[start:start + CHARS_PER_TOKEN]}}}
+            else:
+                yield {"contentBlockDelta": {"delta": {"text": text}}}
+            yield {"contentBlockStop": {}}
+            output_tokens = len(text) // CHARS_PER_TOKEN + 1
+            stop_reason = "end_turn"
+
+        yield {"messageStop": {"stopReason": stop_reason}}
+
+        static_tokens = (len(system_prompt or "") + len(json.dumps(tool_specs or []))) // CHARS_PER_TOKEN
+        input_tokens = sum(len(json.dumps(message["content"])) for message in messages) // CHARS_PER_TOKEN
+        usage = {"inputTokens": input_tokens, "outputTokens": output_tokens}
+        if not self.prompt_cache:
+            usage["inputTokens"] += static_tokens
+        elif self._cache_written:
+            usage["cacheReadInputTokens"] = static_tokens
+        else:
+            usage["cacheWriteInputTokens"] = static_tokens
+            self._cache_written = True
+        usage["totalTokens"] = input_tokens + static_tokens + output_tokens
+        yield {"metadata": {"usage": usage, "metrics": {"latencyMs": 0}}}
+
+    async def structured_output(
+        self, output_model, prompt, system_prompt: Optional[str] = None, **kwargs: Any
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        payload = (self.structured_step or {}).get("structured_output")
+        if payload is None:
+            payload = _empty_instance(output_model.model_json_schema())
+        yield {"output": output_model(**payload)}
+
+
+_scripts: Optional[Dict[str, List[Dict[str, Any]]]] = None
+_scripts_lock = threading.Lock()
+
+
+def load_scripts() -> Dict[str, List[Dict[str, Any]]]:
+    """Load SCRIPTED_MODEL_SCRIPT once per process (an empty mapping if it is not set)"""
+    global _scripts
+    with _scripts_lock:
+        if _scripts is None:
+            path = os.getenv("SCRIPTED_MODEL_SCRIPT")
+            if path:
+                with open(path) as f:
+                    _scripts = json.load(f)
+            else:
+                _scripts = {}
+        return _scripts
+
+
+def prompt_cache_enabled(model_env: str, default: bool) -> bool:
+    """Read the {PREFIX}_PROMPT_CACHE switch that belongs to a {PREFIX}_MODEL variable"""
+    switch = os.getenv(f"{model_env.removesuffix('_MODEL')}_PROMPT_CACHE")
+    if switch is None:
+        return default
+    return switch.lower() in ("1", "true", "yes", "on")
+
+
+def create_model(
+    agent_name: str,
+    model_env: str,
+    default_model_id: str,
+    prompt_cache: bool = False
+) -> Union[str, Model]:
+    """
+    Create the model for an agent
+
+    Args:
+        agent_name: Script key for the scripted provider (e.g. 'flight_agent')
+        model_env: Environment variable holding the Bedrock model ID (e.g. 'FLIGHT_AGENT_MODEL')
+        default_model_id: Bedrock model ID used when model_env is not set
+        prompt_cache: Whether prompt caching is on when {PREFIX}_PROMPT_CACHE is not set
+
+    Returns:
+        A Bedrock model ID (Strands builds the BedrockModel), a BedrockModel with
+        prompt caching, or a ScriptedModel when MODEL_PROVIDER=scripted
+    """
+    prompt_cache = prompt_cache_enabled(model_env, prompt_cache)
+
+    if os.getenv("MODEL_PROVIDER", "bedrock").lower() == "scripted":
+        return ScriptedModel(
+            agent_name,
+            load_scripts().get(agent_name, [DEFAULT_STEP]),
+            latency_ms=float(os.getenv("SCRIPTED_MODEL_LATENCY_MS", "0")),
+            token_ms=float(os.getenv("SCRIPTED_MODEL_TOKEN_MS", "0")),
+            prompt_cache=prompt_cache
+        )
+
+    model_id = os.getenv(model_env, default_model_id)
+    if not prompt_cache:
+        return model_id
+    # "auto" only places cache points for models that support them
+    return BedrockModel(model_id=model_id, cache_config=CacheConfig(strategy="auto", tools_ttl=True))
+
+
+def token_usage(agent) -> Dict[str, int]:
+    """
+    Token usage of an agent since it was checked out of its pool (or created)
+
+    Returns:
+        Dict with input, output, cache-read and cache-write token counts
+    """
+    usage = agent.event_loop_metrics.accumulated_usage
+    return {
+        "input_tokens": usage.get("inputTokens", 0),
+        "output_tokens": usage.get("outputTokens", 0),
+        "cache_read_input_tokens": usage.get("cacheReadInputTokens", 0),
+        "cache_write_input_tokens": usage.get("cacheWriteInputTokens", 0)
+    }
@@ -0,0 +1,124 @@
+"""
+Flight Price Calendar
+Builds departure/return date grids and turns search results into a lowest-fare matrix
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+
+# Upper bound on searches per calendar, so one question cannot exhaust the API quota
+MAX_CALENDAR_SEARCHES = 60
+
+
+def build_date_grid(
+    earliest_departure: str,
+    latest_departure: str,
+    stay_nights: Union[int, Iterable[int]]
+) -> List[Tuple[str, str, int]]:
+    """
+    Build every (departure_date, return_date, nights) combination in a date window
+
+    Args:
+        earliest_departure: First departure date in YYYY-MM-DD format
+        latest_departure: Last departure date in YYYY-MM-DD format
+        stay_nights: Stay length in nights, or several stay lengths to compare
+
+    Returns:
+        List of (departure_date, return_date, nights) tuples
+
+    Raises:
+        ValueError: If the dates are invalid or the grid exceeds MAX_CALENDAR_SEARCHES
+    """
+    start = date.fromisoformat(earliest_departure)
+    end = date.fromisoformat(latest_departure)
+    if end < start:
+        raise ValueError("latest_departure must not be before earliest_departure")
+
+    nights_list = sorted({stay_nights} if isinstance(stay_nights, int) else set(stay_nights))
+    if not nights_list or nights_list[0] < 1:
+        raise ValueError("stay_nights must be at least 1")
+
+    days = (end - start).days + 1
+    if days * len(nights_list) > MAX_CALENDAR_SEARCHES:
+        raise ValueError(
+            f"Date window too large: {days} departure dates x {len(nights_list)} stay lengths "
+            f"exceeds {MAX_CALENDAR_SEARCHES} searches. Narrow the window or use fewer stay lengths."
+        )
+
+    grid = []
+    for offset in range(days):
+        departure = start + timedelta(days=offset)
+        for nights in nights_list:
+            grid.append((departure.isoformat(), (departure + timedelta(days=nights)).isoformat(), nights))
+    return grid
+
+
+def lowest_fare(result: Any) -> Optional[Tuple[float, str]]:
+    """
+    Get the lowest fare from a flight search result
+
+    Accepts both the raw Amadeus flight-offers response ({"data": [...]}) returned by the
+    Gateway and the parsed AmadeusAPI.search_flights result ({"flights": [...]}).
+
+    Returns:
+        (price, currency) tuple, or None if the result has no priced offers
+    """
+    if not isinstance(result, dict):
+        return None
+
+    best = None
+    for offer in result.get("data") or result.get("flights") or []:
+        price = offer.get("price", {}) if isinstance(offer, dict) else {}
+        try:
+            total = float(price.get("grandTotal") or price.get("total"))
+        except (TypeError, ValueError):
+            continue
+        if best is None or total < best[0]:
+            best = (total, price.get("currency", "USD"))
+    return best
+
+
+def build_price_calendar(grid: List[Tuple[str, str, int]], results: List[Any]) -> Dict[str, Any]:
+    """
+    Combine the search results for a date grid into a lowest-fare matrix
+
+    Args:
+        grid: Output of build_date_grid
+        results: One search result per grid entry, in the same order
+
+    Returns:
+        Dict with one row per departure date (lowest fare per stay length, None if
+        no offers were found) and the cheapest combination overall
+    """
+    stay_nights = sorted({nights for _, _, nights in grid})
+    rows: Dict[str, Dict[str, Any]] = {}
+    cheapest = None
+    currency = "USD"
+    failed = 0
+
+    for (departure, return_date, nights), result in zip(grid, results):
+        row = rows.setdefault(departure, {"departure_date": departure, "fares": {str(n): None for n in stay_nights}})
+        fare = lowest_fare(result)
+        if fare is None:
+            failed += 1
+            continue
+
+        price, currency = fare
+        row["fares"][str(nights)] = round(price, 2)
+        if cheapest is None or price < cheapest["price"]:
+            cheapest = {
+                "departure_date": departure,
+                "return_date": return_date,
+                "stay_nights": nights,
+                "price": round(price, 2)
+            }
+
+    return {
+        "currency": currency,
+        "stay_nights": stay_nights,
+        "rows": list(rows.values()),
+        "cheapest": cheapest,
+        "searched": len(grid),
+        "without_offers": failed
+    }
@@ -4,48 +4,38 @@ Real-time hotel data integration
 """
 
 import os
-import requests
+import httpx
+import asyncio
 from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 
+from amadeus_auth import AMADEUS_BASE_URL, get_amadeus_token_broker
+from http_transport import get_async_http_transport
+from offer_cache import get_offer_cache
 
-class AmadeusHotelAPI:
-    """Amadeus API client for hotel searches"""
+
+class AsyncAmadeusHotelAPI:
+    """Async Amadeus API client for hotel searches on the shared async HTTP client"""
+    
+    # The hotel-offers API accepts at most 50 hotel IDs per request
+    OFFERS_CHUNK_SIZE = 50
     
     def __init__(self):
         self.api_key = os.getenv("AMADEUS_API_KEY")
         self.api_secret = os.getenv("AMADEUS_API_SECRET")
-        self.base_url = "https://test.api.amadeus.com"
-        self.token = None
-        self.token_expires = None
+        self.base_url = AMADEUS_BASE_URL
+        # Shared with the other Amadeus clients in this process: at most one token fetch per expiry window
+        self.auth = get_amadeus_token_broker(self.api_key, self.api_secret)
+        self.http = get_async_http_transport()
+        # Two tiers: hotel lists are reference data (hours), priced offers change quickly (minutes)
+        self.list_cache = get_offer_cache("HOTEL_LIST_CACHE", default_ttl=6 * 3600)
+        self.offer_cache = get_offer_cache("HOTEL_OFFER_CACHE", default_ttl=600)
+        # Concurrent hotel-offers requests per search (stays within the API rate limit)
+        self.max_parallel_offer_requests = int(os.getenv("HOTEL_OFFERS_MAX_PARALLEL", "4"))
     
-    def _get_access_token(self) -> str:
+    async def _get_access_token(self) -> str:
         """Get OAuth access token"""
-        if self.token and self.token_expires and datetime.now() < self.token_expires:
-            return self.token
-        
-        url = "https://test.api.amadeus.com/v1/security/oauth2/token"
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        data = {
-            "grant_type": "client_credentials",
-            "client_id": self.api_key,
-            "client_secret": self.api_secret
-        }
-        
-        try:
-            response = requests.post(url, headers=headers, data=data, timeout=10)
-            response.raise_for_status()
-            result = response.json()
-            
-            self.token = result["access_token"]
-            # Token expires in seconds, set expiry time
-            expires_in = result.get("expires_in", 1799)
-            self.token_expires = datetime.now() + timedelta(seconds=expires_in - 60)
-            
-            return self.token
-        except Exception as e:
-            print(f"Error getting Amadeus token: {e}")
-            return None
+        return await self.auth.get_token_async()
     
     def get_city_code(self, city_name: str) -> Optional[str]:
         """Get IATA city code for hotel search"""
@@ -62,7 +52,34 @@ class AmadeusHotelAPI:
         city_lower = city_name.lower().strip()
         return cities.get(city_lower)
     
-    def search_hotels_by_city(
+    async def _list_hotels(self, endpoint: str, params: Dict[str, Any], token: str) -> List[Dict[str, Any]]:
+        """
+        Get the hotel list for a reference-data search (by-city or by-geocode)
+        
+        The list does not depend on travel dates, so it is served from the hotel list
+        cache and only re-fetched every few hours.
+        
+        Raises:
+            httpx.HTTPError: If the API request fails
+        """
+        async def fetch():
+            response = await self.auth.get_async(
+                self.http,
+                f"{self.base_url}/v1/reference-data/locations/hotels/{endpoint}",
+                token,
+                params=params,
+                timeout=30
+            )
+            response.raise_for_status()
+            return response.json().get("data", [])
+        
+        return await self.list_cache.get_or_fetch_async(
+            self.list_cache.make_key(f"amadeus:hotels-{endpoint}", params),
+            fetch,
+            should_cache=lambda hotels: len(hotels) > 0
+        )
+    
+    async def search_hotels_by_city(
         self,
         city_code: str,
         check_in: str,
@@ -91,14 +108,11 @@ class AmadeusHotelAPI:
         Returns:
             Dict with hotel offers or error message
         """
-        token = self._get_access_token()
+        token = await self._get_access_token()
         if not token:
             return {"error": "Failed to authenticate with Amadeus API"}
         
         # First, get hotel IDs in the city
-        url = f"{self.base_url}/v1/reference-data/locations/hotels/by-city"
-        headers = {"Authorization": f"Bearer {token}"}
-        
         params = {
             "cityCode": city_code,
             "radius": radius,
@@ -113,24 +127,22 @@ class AmadeusHotelAPI:
             params["amenities"] = ",".join(amenities)
         
         try:
-            # Get hotel IDs
-            response = requests.get(url, headers=headers, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
+            # Get hotel IDs (cached reference data)
+            hotels = await self._list_hotels("by-city", params, token)
             
-            if "data" not in data or len(data["data"]) == 0:
+            if len(hotels) == 0:
                 return {
                     "error": "No hotels found",
                     "message": f"No hotels available in city code {city_code}"
                 }
             
-            # Get hotel IDs (limit to max_results)
-            hotel_ids = [hotel["hotelId"] for hotel in data["data"][:max_results]]
+            # Price every hotel in the list, then keep the first max_results with availability
+            hotel_ids = [hotel["hotelId"] for hotel in hotels]
             
             # Now get hotel offers with pricing
-            return self.get_hotel_offers(hotel_ids, check_in, check_out, adults)
+            return self._limit_results(await self.get_hotel_offers(hotel_ids, check_in, check_out, adults), max_results)
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return {
                 "error": "API request failed",
                 "message": str(e)
@@ -141,7 +153,7 @@ class AmadeusHotelAPI:
                 "message": str(e)
             }
     
-    def get_hotel_offers(
+    async def get_hotel_offers(
         self,
         hotel_ids: List[str],
         check_in: str,
@@ -164,15 +176,120 @@ class AmadeusHotelAPI:
         Returns:
             Dict with hotel offers including prices
         """
-        token = self._get_access_token()
+        cache_key = self.offer_cache.make_key("amadeus:hotel-offers", {
+            "hotel_ids": sorted(hotel_ids),
+            "check_in": check_in,
+            "check_out": check_out,
+            "adults": adults,
+            "room_quantity": room_quantity,
+            "currency": currency
+        })
+        return await self.offer_cache.get_or_fetch_async(
+            cache_key,
+            lambda: self._get_hotel_offers(hotel_ids, check_in, check_out, adults, room_quantity, currency),
+            # A result with failed chunks is incomplete; retry it next time rather than serve it for the whole TTL
+            should_cache=lambda result: result.get("success", False) and "failed_chunks" not in result
+        )
+    
+    async def _get_hotel_offers(
+        self,
+        hotel_ids: List[str],
+        check_in: str,
+        check_out: str,
+        adults: int,
+        room_quantity: int,
+        currency: str
+    ) -> Dict[str, Any]:
+        """
+        Get hotel offers without the cache
+        
+        The IDs are split into API-sized chunks which are priced concurrently
+        (at most max_parallel_offer_requests at a time) and merged in input order.
+        """
+        token = await self._get_access_token()
         if not token:
             return {"error": "Failed to authenticate with Amadeus API"}
         
+        # Drop duplicates but keep the caller's order (e.g. by distance)
+        hotel_ids = list(dict.fromkeys(hotel_ids))
+        chunks = [
+            hotel_ids[i:i + self.OFFERS_CHUNK_SIZE]
+            for i in range(0, len(hotel_ids), self.OFFERS_CHUNK_SIZE)
+        ]
+        if not chunks:
+            return {
+                "error": "No hotel offers found",
+                "message": "No hotel IDs to price"
+            }
+        
+        semaphore = asyncio.Semaphore(self.max_parallel_offer_requests)
+        
+        async def fetch_chunk(chunk: List[str]) -> Dict[str, Any]:
+            try:
+                async with semaphore:
+                    data = await self._fetch_offer_chunk(
+                        chunk, token, check_in, check_out, adults, room_quantity, currency
+                    )
+                return {"data": data}
+            except httpx.HTTPError as e:
+                return {"error": "API request failed", "message": str(e)}
+            except Exception as e:
+                return {"error": "Failed to get hotel offers", "message": str(e)}
+        
+        chunk_results = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks))
+        
+        failed = [result for result in chunk_results if "error" in result]
+        hotel_data_list = [hotel_data for result in chunk_results for hotel_data in result.get("data", [])]
+        
+        if not hotel_data_list:
+            if failed:
+                return failed[0]
+            return {
+                "error": "No hotel offers found",
+                "message": "No availability for the selected dates"
+            }
+        
+        # Parse hotel offers, keeping the order of the requested IDs
+        position = {hotel_id: i for i, hotel_id in enumerate(hotel_ids)}
+        hotels = []
+        for hotel_data in hotel_data_list:
+            hotel_info = self._parse_hotel_offer(hotel_data, check_in, check_out)
+            if hotel_info:
+                hotels.append(hotel_info)
+        hotels.sort(key=lambda hotel: position.get(hotel.get("hotel_id"), len(position)))
+        
+        result = {
+            "success": True,
+            "hotels": hotels,
+            "count": len(hotels),
+            "check_in": check_in,
+            "check_out": check_out
+        }
+        if failed:
+            # Some chunks failed; report the partial coverage instead of dropping the priced hotels
+            result["failed_chunks"] = len(failed)
+        return result
+    
+    async def _fetch_offer_chunk(
+        self,
+        hotel_ids: List[str],
+        token: str,
+        check_in: str,
+        check_out: str,
+        adults: int,
+        room_quantity: int,
+        currency: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the raw hotel-offers data for at most OFFERS_CHUNK_SIZE hotel IDs
+        
+        Raises:
+            httpx.HTTPError: If the API request fails
+        """
         url = f"{self.base_url}/v3/shopping/hotel-offers"
-        headers = {"Authorization": f"Bearer {token}"}
         
         params = {
-            "hotelIds": ",".join(hotel_ids[:50]),  # API limit is 50 hotels per request
+            "hotelIds": ",".join(hotel_ids),
             "checkInDate": check_in,
             "checkOutDate": check_out,
             "adults": adults,
@@ -181,42 +298,22 @@ class AmadeusHotelAPI:
             "bestRateOnly": "true"
         }
         
-        try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            if "data" not in data or len(data["data"]) == 0:
-                return {
-                    "error": "No hotel offers found",
-                    "message": "No availability for the selected dates"
-                }
-            
-            # Parse hotel offers
-            hotels = []
-            for hotel_data in data["data"]:
-                hotel_info = self._parse_hotel_offer(hotel_data, check_in, check_out)
-                if hotel_info:
-                    hotels.append(hotel_info)
-            
-            return {
-                "success": True,
-                "hotels": hotels,
-                "count": len(hotels),
-                "check_in": check_in,
-                "check_out": check_out
-            }
-            
-        except requests.exceptions.RequestException as e:
-            return {
-                "error": "API request failed",
-                "message": str(e)
-            }
-        except Exception as e:
-            return {
-                "error": "Failed to get hotel offers",
-                "message": str(e)
-            }
+        response = await self.auth.get_async(self.http, url, token, params=params, timeout=30)
+        response.raise_for_status()
+        return response.json().get("data", [])
+    
+    def _limit_results(self, offers_result: Dict[str, Any], max_results: int) -> Dict[str, Any]:
+        """Keep the first max_results priced hotels without modifying the cached result"""
+        if not offers_result.get("success"):
+            return offers_result
+        
+        hotels = offers_result["hotels"][:max_results]
+        return {
+            **offers_result,
+            "hotels": hotels,
+            "count": len(hotels),
+            "priced_count": offers_result["count"]
+        }
     
     def _parse_hotel_offer(self, hotel_data: Dict, check_in: str, check_out: str) -> Optional[Dict[str, Any]]:
         """Parse Amadeus hotel offer into simplified format"""
@@ -279,7 +376,7 @@ class AmadeusHotelAPI:
             print(f"Error parsing hotel offer: {e}")
             return None
     
-    def search_hotels_near_landmark(
+    async def search_hotels_near_landmark(
         self,
         latitude: float,
         longitude: float,
@@ -308,14 +405,11 @@ class AmadeusHotelAPI:
         Returns:
             Dict with hotel offers
         """
-        token = self._get_access_token()
+        token = await self._get_access_token()
         if not token:
             return {"error": "Failed to authenticate with Amadeus API"}
         
         # Get hotels by geocode
-        url = f"{self.base_url}/v1/reference-data/locations/hotels/by-geocode"
-        headers = {"Authorization": f"Bearer {token}"}
-        
         params = {
             "latitude": latitude,
             "longitude": longitude,
@@ -328,19 +422,18 @@ class AmadeusHotelAPI:
             params["ratings"] = ",".join(str(r) for r in ratings)
         
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
+            # Landmark searches repeat the same coordinates and radius, so this is usually a cache hit
+            hotels = await self._list_hotels("by-geocode", params, token)
             
-            if "data" not in data or len(data["data"]) == 0:
+            if len(hotels) == 0:
                 return {
                     "error": "No hotels found",
                     "message": f"No hotels near coordinates ({latitude}, {longitude})"
                 }
             
-            # Get hotel IDs with distance information
+            # Get hotel IDs with distance information (all of them are priced)
             hotels_with_distance = []
-            for hotel in data["data"][:max_results]:
+            for hotel in hotels:
                 hotels_with_distance.append({
                     "hotel_id": hotel["hotelId"],
                     "name": hotel.get("name"),
@@ -350,23 +443,29 @@ class AmadeusHotelAPI:
             
             hotel_ids = [h["hotel_id"] for h in hotels_with_distance]
             
-            # Get offers with pricing
-            offers_result = self.get_hotel_offers(hotel_ids, check_in, check_out, adults)
+            # Get offers with pricing, closest available hotels first
+            offers_result = self._limit_results(
+                await self.get_hotel_offers(hotel_ids, check_in, check_out, adults),
+                max_results
+            )
             
-            # Add distance information to results
+            # Add distance information to results (as new dicts: the offers may be shared cache entries)
             if offers_result.get("success") and offers_result.get("hotels"):
                 distance_map = {h["hotel_id"]: h for h in hotels_with_distance}
-                for hotel in offers_result["hotels"]:
-                    hotel_id = hotel.get("hotel_id")
-                    if hotel_id in distance_map:
-                        hotel["distance_to_landmark"] = {
-                            "value": distance_map[hotel_id]["distance"],
-                            "unit": distance_map[hotel_id]["distance_unit"]
+                offers_result["hotels"] = [
+                    {
+                        **hotel,
+                        "distance_to_landmark": {
+                            "value": distance_map[hotel["hotel_id"]]["distance"],
+                            "unit": distance_map[hotel["hotel_id"]]["distance_unit"]
                         }
+                    } if hotel.get("hotel_id") in distance_map else hotel
+                    for hotel in offers_result["hotels"]
+                ]
             
             return offers_result
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return {
                 "error": "API request failed",
                 "message": str(e)
@@ -378,6 +477,32 @@ class AmadeusHotelAPI:
             }
 
 
+class AmadeusHotelAPI:
+    """Amadeus API client for hotel searches (blocking wrapper around AsyncAmadeusHotelAPI)"""
+    
+    def __init__(self, client: Optional[AsyncAmadeusHotelAPI] = None):
+        self.client = client or get_async_amadeus_hotel_api()
+    
+    def _run(self, coro) -> Dict[str, Any]:
+        return self.client.http.run(coro)
+    
+    def get_city_code(self, city_name: str) -> Optional[str]:
+        """Get IATA city code for hotel search"""
+        return self.client.get_city_code(city_name)
+    
+    def search_hotels_by_city(self, *args, **kwargs) -> Dict[str, Any]:
+        """Search for hotels by city (see AsyncAmadeusHotelAPI.search_hotels_by_city)"""
+        return self._run(self.client.search_hotels_by_city(*args, **kwargs))
+    
+    def get_hotel_offers(self, *args, **kwargs) -> Dict[str, Any]:
+        """Get hotel offers with pricing (see AsyncAmadeusHotelAPI.get_hotel_offers)"""
+        return self._run(self.client.get_hotel_offers(*args, **kwargs))
+    
+    def search_hotels_near_landmark(self, *args, **kwargs) -> Dict[str, Any]:
+        """Search for hotels near a landmark (see AsyncAmadeusHotelAPI.search_hotels_near_landmark)"""
+        return self._run(self.client.search_hotels_near_landmark(*args, **kwargs))
+
+
 # Landmark coordinates for Umrah destinations
 LANDMARKS = {
     "masjid_al_haram": {
@@ -395,8 +520,16 @@ LANDMARKS = {
 }
 
 
-# Create singleton instance
+# Create singleton instances
 _amadeus_hotel_api = None
+_async_amadeus_hotel_api = None
+
+def get_async_amadeus_hotel_api() -> AsyncAmadeusHotelAPI:
+    """Get or create Async Amadeus Hotel API instance"""
+    global _async_amadeus_hotel_api
+    if _async_amadeus_hotel_api is None:
+        _async_amadeus_hotel_api = AsyncAmadeusHotelAPI()
+    return _async_amadeus_hotel_api
 
 def get_amadeus_hotel_api() -> AmadeusHotelAPI:
     """Get or create Amadeus Hotel API instance"""
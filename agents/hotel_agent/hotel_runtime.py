@@ -6,32 +6,44 @@ Using AgentCore Gateway for Amadeus Hotel API access
 import os
 import json
 import httpx
-import asyncio
+from datetime import date
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
 from strands import Agent, tool
-from bedrock_agentcore_starter_toolkit.operations.gateway.client import GatewayClient
+from token_cache import TokenCache
+from gateway_transport import GatewayTransport, decode_tool_text
+from offer_cache import get_offer_cache
+from agent_pool import AgentPool
+from model_provider import create_model, token_usage
+from trip_contract import collect_trip_data, hotel_offers_from_amadeus, record_trip_data
 
 # Initialize AgentCore app
 app = BedrockAgentCoreApp()
 
 # Gateway configuration (embedded)
 gateway_config = {
-    "gateway_url": "https://amadeus-travel-api-1770163078-w86qyqprty.gateway.bedrock-agentcore.us-west-2.amazonaws.com/mcp",
+    "gateway_url": os.getenv(
+        "GATEWAY_URL",
+        "https://amadeus-travel-api-1770163078-w86qyqprty.gateway.bedrock-agentcore.us-west-2.amazonaws.com/mcp"
+    ),
     "gateway_id": "amadeus-travel-api-1770163078-w86qyqprty",
     "region": "us-west-2",
     "client_info": {
         "client_id": "3hjjn9im3lbp2ej6ts60d8lbke",
         "client_secret": "ivnc1krj47u6pp6nkh0bl8jvrtct18o7ars8ob2th5gqrcumpma",
         "user_pool_id": "us-west-2_BRecPKvre",
-        "token_endpoint": "https://agentcore-5c57a8a2.auth.us-west-2.amazoncognito.com/oauth2/token",
+        "token_endpoint": os.getenv(
+            "GATEWAY_TOKEN_ENDPOINT",
+            "https://agentcore-5c57a8a2.auth.us-west-2.amazoncognito.com/oauth2/token"
+        ),
         "scope": "AmadeusGateway/invoke",
         "domain_prefix": "agentcore-5c57a8a2"
     },
     "target_id": "EYFJ4BNWJV"
 }
 
-# Initialize Gateway client
-gateway_client = GatewayClient(region_name=gateway_config["region"])
+# Gateway access tokens are reused until shortly before they expire
+token_cache = TokenCache()
+GATEWAY_TOKEN_KEY = (gateway_config["client_info"]["client_id"], gateway_config["client_info"]["scope"])
 
 # Landmark coordinates for Umrah
 LANDMARKS = {
@@ -58,44 +70,130 @@ CITY_CODES = {
 }
 
 
+def fetch_gateway_access_token():
+    """Request a new OAuth access token from Cognito using the client credentials flow"""
+    client_info = gateway_config["client_info"]
+    response = httpx.post(
+        client_info["token_endpoint"],
+        data={
+            "grant_type": "client_credentials",
+            "client_id": client_info["client_id"],
+            "client_secret": client_info["client_secret"],
+            "scope": client_info["scope"]
+        },
+        timeout=10.0
+    )
+    response.raise_for_status()
+    token_data = response.json()
+    return token_data["access_token"], int(token_data.get("expires_in", 3600))
+
+
 def get_gateway_access_token():
-    """Get OAuth access token for Gateway"""
-    return gateway_client.get_access_token_for_cognito(gateway_config["client_info"])
+    """Get OAuth access token for Gateway (cached per client_id/scope)"""
+    return token_cache.get_token(GATEWAY_TOKEN_KEY, fetch_gateway_access_token)
+
+
+# One event loop and one pooled HTTP/2 client shared by every tool call in this runtime
+gateway = GatewayTransport(
+    gateway_config["gateway_url"],
+    get_token=get_gateway_access_token,
+    invalidate_token=lambda token: token_cache.invalidate(GATEWAY_TOKEN_KEY, token)
+)
 
 
-async def call_gateway_tool(tool_name: str, arguments: dict):
+# Hotel lists by geocode/city are reference data: they change rarely and carry no dates,
+# so they are kept for hours (HOTEL_LIST_CACHE_TTL seconds)
+hotel_list_cache = get_offer_cache("HOTEL_LIST_CACHE", default_ttl=6 * 3600)
+
+
+def call_gateway_tool(tool_name: str, arguments: dict) -> str:
     """Call a Gateway MCP tool"""
-    access_token = get_gateway_access_token()
+    return gateway.call_tool_sync(tool_name, arguments)
+
+
+def is_cacheable_result(result: str) -> bool:
+    """Only cache successful searches; errors should be retried on the next request"""
+    decoded = decode_tool_text(result)
+    return not (isinstance(decoded, dict) and ("error" in decoded or "errors" in decoded))
+
+
+def call_gateway_tools_cached(calls: list) -> list:
+    """
+    Call Gateway hotel list tools, answering repeated searches from the hotel list cache
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            gateway_config["gateway_url"],
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "tools/call",
-                "params": {
-                    "name": tool_name,
-                    "arguments": arguments
-                }
-            },
-            timeout=60.0
-        )
-        
-        result = response.json()
-        if "result" in result:
-            # Extract text content from MCP response
-            if "content" in result["result"]:
-                for content in result["result"]["content"]:
-                    if content.get("type") == "text":
-                        return content["text"]
-            return json.dumps(result["result"])
-        else:
-            return json.dumps({"error": result.get("error", "Unknown error")})
+    Cache misses are sent to the Gateway together in one batch.
+    
+    Args:
+        calls: List of (tool_name, arguments) tuples
+    
+    Returns:
+        List of result strings in the same order as calls
+    """
+    keys = [hotel_list_cache.make_key(tool_name, arguments) for tool_name, arguments in calls]
+    results = [hotel_list_cache.get(key) for key in keys]
+    
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        fetched = gateway.call_tools_batch_sync([calls[i] for i in missing])
+        for i, result in zip(missing, fetched):
+            results[i] = result
+            if is_cacheable_result(result):
+                hotel_list_cache.set(keys[i], result)
+    
+    return results
+
+
+def build_hotel_search(city: str, near_haram: bool = True):
+    """
+    Choose the Gateway tool and arguments for a hotel search in one city
+    
+    Returns:
+        (tool_name, arguments) tuple, or None if the city is unknown
+    """
+    city_lower = city.lower().strip()
+    
+    # Search near Haram landmarks for better proximity results
+    if near_haram and city_lower in ['makkah', 'mecca', 'medina', 'madinah']:
+        landmark = LANDMARKS['masjid_al_haram' if city_lower in ['makkah', 'mecca'] else 'masjid_nabawi']
+        return "amadeus-api___searchHotelsByLocation", {
+            "latitude": landmark['latitude'],
+            "longitude": landmark['longitude'],
+            "radius": 2,
+            "radiusUnit": "KM"
+        }
+    
+    # City-wide search (also the fallback for other cities)
+    city_code = CITY_CODES.get(city_lower)
+    if not city_code:
+        return None
+    
+    return "amadeus-api___searchHotelsByCity", {
+        "cityCode": city_code,
+        "radius": 5,
+        "radiusUnit": "KM"
+    }
+
+
+def record_hotels(result, search, city: str, check_in: str, check_out: str, limit: int = 10):
+    """
+    Record the hotels of one search for the structured response (unpriced list results get the stay dates)
+    
+    Only the landmark search measures Amadeus' distance from the Haram; a city-code
+    search measures it from the city centre, so those hotels get no distance.
+    """
+    near_landmark = search[0] == "amadeus-api___searchHotelsByLocation"
+    hotels = hotel_offers_from_amadeus(decode_tool_text(result), city.title(), limit, distance_from_haram=near_landmark)
+    try:
+        nights = (date.fromisoformat(check_out) - date.fromisoformat(check_in)).days
+    except (TypeError, ValueError):
+        nights = None
+    for hotel in hotels:
+        hotel.check_in = hotel.check_in or check_in
+        hotel.check_out = hotel.check_out or check_out
+        hotel.nights = nights
+        if hotel.price_total is not None and nights:
+            hotel.price_per_night = round(hotel.price_total / nights, 2)
+    record_trip_data(hotels=hotels)
 
 
 @tool
@@ -123,59 +221,55 @@ def search_hotels(
     Returns:
         JSON string with hotel results including prices, ratings, and distances
     """
-    city_lower = city.lower().strip()
+    search = build_hotel_search(city, near_haram)
+    if not search:
+        return json.dumps({
+            "error": f"Unknown city: {city}. Please use 'Makkah' or 'Medina'"
+        })
+    
+    # Near-Haram searches always use the same landmark and radius, so this is usually a cache hit
+    result = call_gateway_tools_cached([search])[0]
+    record_hotels(result, search, city, check_in, check_out, max_results)
+    return result
+
+
+@tool
+def search_hotels_multi_city(
+    cities: list[str],
+    check_in: str,
+    check_out: str,
+    adults: int = 2,
+    near_haram: bool = True
+) -> str:
+    """
+    Search hotels in several cities at once (e.g. Makkah and Medina) in one Gateway round trip.
     
-    # Determine search method
-    if near_haram:
-        # Search near Haram landmarks for better proximity results
-        if city_lower in ['makkah', 'mecca']:
-            landmark = LANDMARKS['masjid_al_haram']
-            arguments = {
-                "latitude": landmark['latitude'],
-                "longitude": landmark['longitude'],
-                "radius": 2,
-                "radiusUnit": "KM"
-            }
-            result = asyncio.run(call_gateway_tool("amadeus-api___searchHotelsByLocation", arguments))
-        elif city_lower in ['medina', 'madinah']:
-            landmark = LANDMARKS['masjid_nabawi']
-            arguments = {
-                "latitude": landmark['latitude'],
-                "longitude": landmark['longitude'],
-                "radius": 2,
-                "radiusUnit": "KM"
-            }
-            result = asyncio.run(call_gateway_tool("amadeus-api___searchHotelsByLocation", arguments))
+    Args:
+        cities: City names - e.g. ['Makkah', 'Medina']
+        check_in: Check-in date in YYYY-MM-DD format
+        check_out: Check-out date in YYYY-MM-DD format
+        adults: Number of adult guests (default: 2)
+        near_haram: If True, search near Haram/Masjid (default: True)
+    
+    Returns:
+        JSON string mapping each city to its hotel results
+    """
+    results = {}
+    calls = []
+    searched_cities = []
+    
+    for city in cities:
+        search = build_hotel_search(city, near_haram)
+        if search:
+            calls.append(search)
+            searched_cities.append(city)
         else:
-            # Fallback to city search
-            city_code = CITY_CODES.get(city_lower)
-            if not city_code:
-                return json.dumps({
-                    "error": f"Unknown city: {city}. Please use 'Makkah' or 'Medina'"
-                })
-            
-            arguments = {
-                "cityCode": city_code,
-                "radius": 5,
-                "radiusUnit": "KM"
-            }
-            result = asyncio.run(call_gateway_tool("amadeus-api___searchHotelsByCity", arguments))
-    else:
-        # City-wide search
-        city_code = CITY_CODES.get(city_lower)
-        if not city_code:
-            return json.dumps({
-                "error": f"Unknown city: {city}. Please use 'Makkah' or 'Medina'"
-            })
-        
-        arguments = {
-            "cityCode": city_code,
-            "radius": 5,
-            "radiusUnit": "KM"
-        }
-        result = asyncio.run(call_gateway_tool("amadeus-api___searchHotelsByCity", arguments))
+            results[city] = {"error": f"Unknown city: {city}. Please use 'Makkah' or 'Medina'"}
     
-    return result
+    for city, search, result in zip(searched_cities, calls, call_gateway_tools_cached(calls)):
+        results[city] = decode_tool_text(result)
+        record_hotels(result, search, city, check_in, check_out)
+    return json.dumps(results)
 
 
 @tool
@@ -198,17 +292,14 @@ def get_city_code(city_name: str) -> str:
         return f"City code not found for {city_name}. Common codes: MEC (Makkah), MED (Medina), JED (Jeddah)"
 
 
-# Create hotel agent with tools
-hotel_agent = Agent(
-    model=os.getenv("HOTEL_AGENT_MODEL", "anthropic.claude-3-5-sonnet-20241022-v2:0"),
-    tools=[search_hotels, get_city_code],
-    system_prompt="""You are a Hotel Booking Specialist for Umrah trips with access to REAL-TIME hotel data via Amadeus API through AgentCore Gateway.
+HOTEL_AGENT_PROMPT = """You are a Hotel Booking Specialist for Umrah trips with access to REAL-TIME hotel data via Amadeus API through AgentCore Gateway.
 
 IMPORTANT: You have access to actual hotel search tools. Always use them!
 
 Your tools:
 1. search_hotels() - Search for real hotels with live prices and availability (via Gateway)
-2. get_city_code() - Get IATA city codes for hotel searches
+2. search_hotels_multi_city() - Search several cities (e.g. Makkah AND Medina) in ONE call
+3. get_city_code() - Get IATA city codes for hotel searches
 
 Key cities for Umrah:
 - Makkah (Mecca): Hotels near Masjid al-Haram
@@ -226,6 +317,8 @@ When users request hotels:
    - Set near_haram=True for hotels close to the Haram (highly recommended)
    - This searches within 2km of Masjid al-Haram or Masjid an-Nabawi
    - Set max_results=10 to get multiple options
+   - When the user needs hotels in both Makkah and Medina, use search_hotels_multi_city()
+     instead of calling search_hotels() once per city
 
 3. ALWAYS PROVIDE MULTIPLE OPTIONS (2-3 minimum):
    - The search_hotels tool returns up to 10 results
@@ -286,7 +379,19 @@ The Amadeus API provides:
 - Room descriptions and policies
 
 Be specific about dates and always show the actual prices returned by the API."""
-)
+
+
+def create_hotel_agent() -> Agent:
+    """Create a hotel agent; requests take one from hotel_agents below"""
+    return Agent(
+        model=create_model("hotel_agent", "HOTEL_AGENT_MODEL", "anthropic.claude-3-5-sonnet-20241022-v2:0", prompt_cache=True),
+        tools=[search_hotels, search_hotels_multi_city, get_city_code],
+        system_prompt=HOTEL_AGENT_PROMPT
+    )
+
+
+# Each request checks out its own agent, so concurrent requests never share a conversation
+hotel_agents = AgentPool(create_hotel_agent, name="hotel agent")
 
 
 @app.entrypoint
@@ -296,7 +401,10 @@ def invoke(payload, context):
     user_message = payload.get("prompt", "Hello")
     
     try:
-        response = hotel_agent(user_message)
+        # Tools record the hotels they found; they are returned next to the prose
+        with collect_trip_data() as collector, hotel_agents.agent() as hotel_agent:
+            response = hotel_agent(user_message)
+            usage = token_usage(hotel_agent)
         
         if hasattr(response, 'message') and 'content' in response.message:
             result_text = response.message['content'][0]['text']
@@ -305,7 +413,10 @@ def invoke(payload, context):
         
         return {
             "result": result_text,
-            "status": "success"
+            "status": "success",
+            "data": collector.dump(),
+            "cache": hotel_list_cache.get_stats(),
+            "usage": usage
         }
     except Exception as e:
         print(f"Error processing request: {e}")
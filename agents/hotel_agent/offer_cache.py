@@ -0,0 +1,241 @@
+"""
+Offer Cache
+TTL + LRU cache for API search results with in-memory and SQLite backends
+
+Kept identical in agents/flight_agent and agents/hotel_agent, because each
+runtime is deployed from its own directory.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class MemoryCacheBackend:
+    """In-process LRU store; entries expire after their TTL"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """On-disk LRU store shared by every process on the host; values must be JSON-serializable"""
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS offer_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS offer_cache_last_used ON offer_cache (last_used)")
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM offer_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now >= row[1]:
+                self._conn.execute("DELETE FROM offer_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE offer_cache SET last_used = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO offer_cache (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now)
+            )
+            # Drop expired rows first, then the least recently used ones over the limit
+            self._conn.execute("DELETE FROM offer_cache WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM offer_cache WHERE key IN ("
+                "SELECT key FROM offer_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM offer_cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM offer_cache").fetchone()[0]
+
+
+class OfferCache:
+    """Caches search results under normalized request keys and tracks the hit rate"""
+
+    def __init__(self, backend, ttl: float = 300):
+        """
+        Initialize the cache
+
+        Args:
+            backend: MemoryCacheBackend or SQLiteCacheBackend
+            ttl: Default time-to-live in seconds
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(namespace: str, params: Dict[str, Any]) -> str:
+        """
+        Build a normalized cache key
+
+        String values are stripped and upper-cased and unset values are dropped, so
+        'jfk'/'JFK ' or a missing vs None return date produce the same key.
+        """
+        normalized = {}
+        for name, value in params.items():
+            if value is None:
+                continue
+            if isinstance(value, str):
+                value = value.strip().upper()
+            elif isinstance(value, (list, tuple)):
+                value = [item.strip().upper() if isinstance(item, str) else item for item in value]
+            normalized[name] = value
+        return f"{namespace}:{json.dumps(normalized, sort_keys=True, separators=(',', ':'))}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None on a miss"""
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value for ttl seconds (defaults to the cache TTL)"""
+        self.backend.set(key, value, self.ttl if ttl is None else ttl)
+
+    def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Any],
+        ttl: Optional[float] = None,
+        should_cache: Callable[[Any], bool] = lambda value: True
+    ) -> Any:
+        """
+        Return the cached value for key, or call fetch and cache its result
+
+        Args:
+            key: Cache key from make_key
+            fetch: Function that performs the real search
+            ttl: Optional TTL override in seconds
+            should_cache: Predicate deciding whether a result is cached (e.g. skip errors)
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        value = fetch()
+        if value is not None and should_cache(value):
+            self.set(key, value, ttl)
+        return value
+
+    async def get_or_fetch_async(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        should_cache: Callable[[Any], bool] = lambda value: True
+    ) -> Any:
+        """Async variant of get_or_fetch: fetch is a coroutine function"""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        value = await fetch()
+        if value is not None and should_cache(value):
+            self.set(key, value, ttl)
+        return value
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counts, hit rate and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "size": len(self.backend)
+            }
+
+
+# Process-wide caches, one per configuration prefix
+_offer_caches: Dict[str, OfferCache] = {}
+_offer_caches_lock = threading.Lock()
+
+
+def get_offer_cache(prefix: str, default_ttl: float = 300, default_max_entries: int = 1000) -> OfferCache:
+    """
+    Get or create the offer cache configured by environment variables
+
+    Reads {prefix}_BACKEND ('memory' or 'sqlite'), {prefix}_TTL (seconds),
+    {prefix}_MAX_ENTRIES and {prefix}_PATH (SQLite file).
+
+    Args:
+        prefix: Environment variable prefix, e.g. 'FLIGHT_CACHE'
+        default_ttl: TTL in seconds when {prefix}_TTL is not set
+        default_max_entries: Size bound when {prefix}_MAX_ENTRIES is not set
+    """
+    with _offer_caches_lock:
+        if prefix not in _offer_caches:
+            backend_name = os.getenv(f"{prefix}_BACKEND", "memory").lower()
+            max_entries = int(os.getenv(f"{prefix}_MAX_ENTRIES", default_max_entries))
+            if backend_name == "sqlite":
+                path = os.getenv(
+                    f"{prefix}_PATH",
+                    os.path.join(tempfile.gettempdir(), f"umrah_{prefix.lower()}.sqlite3")
+                )
+                backend = SQLiteCacheBackend(path, max_entries)
+            else:
+                backend = MemoryCacheBackend(max_entries)
+            _offer_caches[prefix] = OfferCache(backend, float(os.getenv(f"{prefix}_TTL", default_ttl)))
+        return _offer_caches[prefix]
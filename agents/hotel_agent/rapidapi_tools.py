@@ -4,13 +4,15 @@ Real-time hotel data integration using Booking.com API
 """
 
 import os
-import requests
+import httpx
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
+from http_transport import get_async_http_transport
 
-class RapidAPIHotels:
-    """RapidAPI client for hotel searches using Booking.com"""
+
+class AsyncRapidAPIHotels:
+    """Async RapidAPI client for hotel searches using Booking.com"""
     
     def __init__(self):
         self.api_key = os.getenv("RAPIDAPI_KEY")
@@ -19,8 +21,9 @@ class RapidAPIHotels:
             "X-RapidAPI-Key": self.api_key,
             "X-RapidAPI-Host": "booking-com.p.rapidapi.com"
         }
+        self.http = get_async_http_transport()
     
-    def search_hotels(
+    async def search_hotels(
         self,
         city: str,
         check_in: str,
@@ -55,7 +58,7 @@ class RapidAPIHotels:
             return {"error": "RapidAPI key not configured"}
         
         # First, get destination ID for the city
-        dest_id = self._get_destination_id(city)
+        dest_id = await self._get_destination_id(city)
         if not dest_id:
             return {
                 "error": "City not found",
@@ -83,7 +86,7 @@ class RapidAPIHotels:
             params["categories_filter_ids"] = ",".join([f"class::{star}" for star in filter_by_star])
         
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = await self.http.get(url, headers=self.headers, params=params, timeout=30)
             response.raise_for_status()
             data = response.json()
             
@@ -106,7 +109,7 @@ class RapidAPIHotels:
                 "city": city
             }
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return {
                 "error": "API request failed",
                 "message": str(e)
@@ -117,7 +120,7 @@ class RapidAPIHotels:
                 "message": str(e)
             }
     
-    def _get_destination_id(self, city: str) -> Optional[str]:
+    async def _get_destination_id(self, city: str) -> Optional[str]:
         """Get Booking.com destination ID for a city"""
         # Known destination IDs for Umrah cities
         destinations = {
@@ -143,7 +146,7 @@ class RapidAPIHotels:
                 "locale": "en-us"
             }
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
+            response = await self.http.get(url, headers=self.headers, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             
@@ -217,7 +220,7 @@ class RapidAPIHotels:
                 "raw_data": hotel
             }
     
-    def get_hotel_details(self, hotel_id: str) -> Dict[str, Any]:
+    async def get_hotel_details(self, hotel_id: str) -> Dict[str, Any]:
         """Get detailed information about a specific hotel"""
         url = f"{self.base_url}/hotels/data"
         
@@ -227,7 +230,7 @@ class RapidAPIHotels:
         }
         
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = await self.http.get(url, headers=self.headers, params=params, timeout=30)
             response.raise_for_status()
             data = response.json()
             
@@ -242,8 +245,31 @@ class RapidAPIHotels:
             }
 
 
-# Create singleton instance
+class RapidAPIHotels:
+    """RapidAPI client for hotel searches using Booking.com (blocking wrapper around AsyncRapidAPIHotels)"""
+    
+    def __init__(self, client: Optional[AsyncRapidAPIHotels] = None):
+        self.client = client or get_async_rapidapi_hotels()
+    
+    def search_hotels(self, *args, **kwargs) -> Dict[str, Any]:
+        """Search for hotels in a city (see AsyncRapidAPIHotels.search_hotels)"""
+        return self.client.http.run(self.client.search_hotels(*args, **kwargs))
+    
+    def get_hotel_details(self, hotel_id: str) -> Dict[str, Any]:
+        """Get detailed information about a specific hotel"""
+        return self.client.http.run(self.client.get_hotel_details(hotel_id))
+
+
+# Create singleton instances
 _rapidapi_hotels = None
+_async_rapidapi_hotels = None
+
+def get_async_rapidapi_hotels() -> AsyncRapidAPIHotels:
+    """Get or create Async RapidAPI Hotels instance"""
+    global _async_rapidapi_hotels
+    if _async_rapidapi_hotels is None:
+        _async_rapidapi_hotels = AsyncRapidAPIHotels()
+    return _async_rapidapi_hotels
 
 def get_rapidapi_hotels() -> RapidAPIHotels:
     """Get or create RapidAPI Hotels instance"""
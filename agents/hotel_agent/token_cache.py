@@ -0,0 +1,158 @@
+"""
+OAuth Token Cache
+Thread-safe, single-flight token cache with background refresh before expiry
+
+Kept identical in agents/flight_agent and agents/hotel_agent, because each
+runtime is deployed from its own directory.
+"""
+
+import time
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+# A fetch function returns (access_token, expires_in_seconds)
+TokenFetcher = Callable[[], Tuple[str, int]]
+
+
+class _TokenEntry:
+    """Cached token state for one key"""
+
+    def __init__(self):
+        self.token: Optional[str] = None
+        self.expires_at = 0.0
+        self.fetched_at = 0.0
+        self.last_used = 0.0
+        self.lock = threading.Lock()  # Held while fetching: makes refreshes single-flight
+        self.timer: Optional[threading.Timer] = None
+        self.hits = 0
+        self.fetches = 0
+        self.background_refreshes = 0
+        self.fetch_errors = 0
+
+
+class TokenCache:
+    """Caches OAuth access tokens per key (e.g. client_id/scope) until shortly before they expire"""
+
+    def __init__(self, expiry_margin: int = 60, refresh_ahead: int = 300):
+        """
+        Initialize the cache
+
+        Args:
+            expiry_margin: Treat tokens as expired this many seconds before their real expiry
+            refresh_ahead: Refresh tokens in the background this many seconds before expiry
+        """
+        self.expiry_margin = expiry_margin
+        self.refresh_ahead = refresh_ahead
+        self._entries: Dict[Hashable, _TokenEntry] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, key: Hashable) -> _TokenEntry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _TokenEntry()
+            return entry
+
+    def _is_valid(self, entry: _TokenEntry) -> bool:
+        return entry.token is not None and time.monotonic() < entry.expires_at - self.expiry_margin
+
+    def get_token(self, key: Hashable, fetch: TokenFetcher) -> str:
+        """
+        Get a valid token for key, fetching it at most once across concurrent callers
+
+        Args:
+            key: Cache key, e.g. (client_id, scope)
+            fetch: Function returning (access_token, expires_in_seconds)
+
+        Returns:
+            Access token
+        """
+        token = self.get_cached_token(key)
+        if token is not None:
+            return token
+
+        entry = self._entry(key)
+        with entry.lock:
+            # Another caller may have refreshed the token while we waited for the lock
+            if self._is_valid(entry):
+                entry.hits += 1
+            else:
+                self._fetch(key, entry, fetch)
+            return entry.token
+
+    def get_cached_token(self, key: Hashable) -> Optional[str]:
+        """Get the cached token for key without blocking, or None if it must be fetched"""
+        entry = self._entry(key)
+        entry.last_used = time.monotonic()
+        if self._is_valid(entry):
+            entry.hits += 1
+            return entry.token
+        return None
+
+    def _fetch(self, key: Hashable, entry: _TokenEntry, fetch: TokenFetcher):
+        """Fetch a new token and schedule its background refresh (entry.lock must be held)"""
+        try:
+            token, expires_in = fetch()
+        except Exception:
+            entry.fetch_errors += 1
+            raise
+        entry.fetches += 1
+        now = time.monotonic()
+        entry.token = token
+        entry.expires_at = now + expires_in
+        entry.fetched_at = now
+
+        if entry.timer is not None:
+            entry.timer.cancel()
+        delay = max(expires_in - self.refresh_ahead, expires_in / 2)
+        entry.timer = threading.Timer(delay, self._refresh_in_background, args=(key, entry, fetch))
+        entry.timer.daemon = True
+        entry.timer.start()
+
+    def _refresh_in_background(self, key: Hashable, entry: _TokenEntry, fetch: TokenFetcher):
+        """Renew a token before it expires, but only if it was used since it was fetched"""
+        if entry.last_used <= entry.fetched_at:
+            return
+
+        with entry.lock:
+            try:
+                self._fetch(key, entry, fetch)
+                entry.background_refreshes += 1
+            except Exception as e:
+                # The current token is still valid; the next caller retries after expiry
+                print(f"Error refreshing token in background: {e}")
+
+    def invalidate(self, key: Hashable, token: Optional[str] = None):
+        """
+        Drop a cached token, e.g. after the server rejected it
+
+        Args:
+            key: Cache key
+            token: The rejected token; if another caller already replaced it, the new one is kept
+        """
+        entry = self._entry(key)
+        with entry.lock:
+            if token is not None and entry.token != token:
+                return
+            entry.token = None
+            entry.expires_at = 0.0
+            if entry.timer is not None:
+                entry.timer.cancel()
+                entry.timer = None
+
+    def get_stats(self) -> Dict[Hashable, Dict[str, Any]]:
+        """Get the remaining lifetime (seconds) and fetch/hit counts of every cached token"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                key: {
+                    "valid": self._is_valid(entry),
+                    "expires_in": max(0, round(entry.expires_at - now)),
+                    "hits": entry.hits,
+                    "fetches": entry.fetches,
+                    "background_refreshes": entry.background_refreshes,
+                    "fetch_errors": entry.fetch_errors
+                }
+                for key, entry in self._entries.items()
+            }
@@ -0,0 +1,155 @@
+"""
+Agent Pool
+Bounded, thread-safe pool of pre-built Strands agents
+
+A Strands Agent holds its conversation in memory and rejects concurrent calls,
+so a runtime must not share one agent between requests. Building a new agent
+per request works but pays for the system prompt and tool registry every time.
+The pool hands each request its own pre-built agent and resets its
+conversation when it is returned.
+
+    AGENT_POOL_SIZE     Maximum agents per pool (default 8)
+    AGENT_POOL_PREBUILD Agents built when the pool is created (default 1)
+    AGENT_POOL_TIMEOUT  Seconds to wait for a free agent (default 300)
+
+Kept identical in every agent directory, because each runtime is deployed
+from its own directory.
+"""
+
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from strands import Agent
+from strands.agent.state import AgentState
+from strands.telemetry.metrics import EventLoopMetrics
+
+
+class AgentPoolTimeout(RuntimeError):
+    """No agent became free within the checkout timeout"""
+
+
+def reset_agent(agent: Agent):
+    """Clear everything one request left behind: conversation, state and usage metrics"""
+    agent.messages = []
+    agent.state = AgentState()
+    agent.event_loop_metrics = EventLoopMetrics()
+    if hasattr(agent.conversation_manager, "removed_message_count"):
+        agent.conversation_manager.removed_message_count = 0
+
+
+class AgentPool:
+    """Hands out agents one request at a time; grows on demand up to max_size"""
+
+    def __init__(
+        self,
+        factory: Callable[[], Agent],
+        name: str = "agent",
+        max_size: Optional[int] = None,
+        prebuild: Optional[int] = None,
+        timeout: Optional[float] = None
+    ):
+        """
+        Initialize the pool
+
+        Args:
+            factory: Builds a new agent
+            name: Pool name used in stats and errors
+            max_size: Maximum agents alive at once (defaults to AGENT_POOL_SIZE or 8)
+            prebuild: Agents built up front (defaults to AGENT_POOL_PREBUILD or 1)
+            timeout: Seconds checkout waits for a free agent (defaults to AGENT_POOL_TIMEOUT or 300)
+        """
+        self.factory = factory
+        self.name = name
+        self.max_size = max(max_size or int(os.getenv("AGENT_POOL_SIZE", "8")), 1)
+        self.timeout = timeout if timeout is not None else float(os.getenv("AGENT_POOL_TIMEOUT", "300"))
+
+        self._idle: deque = deque()
+        self._size = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._condition = threading.Condition()
+
+        prebuild = int(os.getenv("AGENT_POOL_PREBUILD", "1")) if prebuild is None else prebuild
+        for _ in range(min(prebuild, self.max_size)):
+            self._idle.append(self.factory())
+            self._size += 1
+
+    def checkout(self, timeout: Optional[float] = None) -> Agent:
+        """
+        Take an agent for one request
+
+        Args:
+            timeout: Seconds to wait when every agent is busy (defaults to the pool timeout)
+
+        Returns:
+            An agent with an empty conversation
+
+        Raises:
+            AgentPoolTimeout: If no agent became free in time
+        """
+        timeout = self.timeout if timeout is None else timeout
+        with self._condition:
+            if not self._idle and self._size >= self.max_size:
+                self._waits += 1
+                if not self._condition.wait_for(lambda: self._idle or self._size < self.max_size, timeout):
+                    raise AgentPoolTimeout(f"No {self.name} became free within {timeout:.0f}s")
+            self._checkouts += 1
+            self._in_use += 1
+            if self._idle:
+                return self._idle.pop()
+            # Reserve the slot, then build outside the lock so other checkouts are not held up
+            self._size += 1
+
+        try:
+            return self.factory()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+    def checkin(self, agent: Agent):
+        """Reset an agent and return it to the pool (an agent that cannot be reset is dropped)"""
+        try:
+            reset_agent(agent)
+        except Exception as e:
+            print(f"Dropping {self.name} that failed to reset: {e}")
+            agent = None
+        with self._condition:
+            self._in_use -= 1
+            if agent is None:
+                self._size -= 1
+            else:
+                self._idle.append(agent)
+            self._condition.notify()
+
+    @contextmanager
+    def agent(self, timeout: Optional[float] = None) -> Iterator[Agent]:
+        """Check an agent out for the duration of a with block"""
+        agent = self.checkout(timeout)
+        try:
+            yield agent
+        finally:
+            self.checkin(agent)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics
+
+        Returns:
+            Dict with size, idle, in_use, max_size, checkouts and waits (checkouts that found every agent busy)
+        """
+        with self._condition:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "max_size": self.max_size,
+                "checkouts": self._checkouts,
+                "waits": self._waits
+            }
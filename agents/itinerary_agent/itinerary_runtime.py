@@ -3,17 +3,29 @@ Itinerary Agent for AgentCore Runtime
 Simplified version for reliable deployment
 """
 
-import os
+import json
+from typing import List, Optional
+
+from pydantic import BaseModel
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
-from strands import Agent
+from strands import Agent, tool
+
+from agent_pool import AgentPool
+from model_provider import create_model, token_usage
+from prayer_times import CITIES, format_timetable, next_prayer, prayer_timetable, resolve_city
+from trip_contract import ItineraryDay, TripData
+
+
+class ItineraryPlan(BaseModel):
+    """The agent's answer: an optional short overview plus the itinerary days"""
+    summary: Optional[str] = None
+    itinerary: List[ItineraryDay]
+
 
 # Initialize AgentCore app
 app = BedrockAgentCoreApp()
 
-# Create itinerary agent
-itinerary_agent = Agent(
-    model=os.getenv("ITINERARY_AGENT_MODEL", "anthropic.claude-3-5-sonnet-20241022-v2:0"),
-    system_prompt="""You are an Umrah Itinerary Planning Specialist.
+ITINERARY_AGENT_PROMPT = """You are an Umrah Itinerary Planning Specialist.
 
 Your expertise:
 1. Create detailed day-by-day Umrah itineraries
@@ -37,8 +49,80 @@ When creating itineraries, consider:
 - Family with children or elderly
 - Ramadan vs. non-Ramadan timing
 
-Provide spiritually meaningful and practically feasible itineraries."""
-)
+Provide spiritually meaningful and practically feasible itineraries.
+
+Answer by calling the ItineraryPlan tool once, with every day of the trip and an optional short
+summary (overview and practical tips). It is shown to the traveler as your answer, so do not write
+the itinerary out as text first.
+
+Prayer times: schedule activities around the exact PRAYER TIMES given in the request, or call
+get_prayer_times() for the dates and city. Never estimate prayer times yourself."""
+
+
+@tool
+def get_prayer_times(city: str, start_date: str, end_date: str = None, arrival_time: str = None) -> str:
+    """
+    Get exact daily prayer times (Umm al-Qura method) for Makkah or Madinah, computed locally.
+    
+    Args:
+        city: Makkah or Madinah (or the arrival airport code: JED, TIF, MED)
+        start_date: First date in YYYY-MM-DD format
+        end_date: Last date in YYYY-MM-DD format, inclusive (optional; default: start_date)
+        arrival_time: Local arrival date-time, e.g. 2026-03-15T14:20 (optional; adds the first prayer after arrival)
+    
+    Returns:
+        JSON with the timetable (fajr, sunrise, dhuhr, asr, maghrib, isha as HH:MM per date)
+    """
+    try:
+        timetable = prayer_timetable(city, start_date, end_date)  # Raises ValueError for other cities
+        result = {
+            "city": CITIES[resolve_city(city)]["name"],
+            "method": "Umm al-Qura",
+            "timezone": "UTC+3",
+            "timetable": timetable
+        }
+        if arrival_time:
+            result["next_prayer_after_arrival"] = next_prayer(city, arrival_time)
+        return json.dumps(result)
+    except Exception as e:
+        return json.dumps({"error": str(e)})
+
+
+def prayer_times_section(travel_dates: dict) -> str:
+    """Prayer timetables for both cities over the trip dates, to include in the agent's request"""
+    try:
+        start, end = travel_dates["departure"], travel_dates.get("return") or travel_dates["departure"]
+        return "\n\n".join(
+            format_timetable(city, prayer_timetable(city, start, end)) for city in CITIES
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"No prayer times for travel dates {travel_dates}: {e}")
+        return ""
+
+
+def create_itinerary_agent() -> Agent:
+    """Create a itinerary agent; requests take one from itinerary_agents below"""
+    return Agent(
+        model=create_model("itinerary_agent", "ITINERARY_AGENT_MODEL", "anthropic.claude-3-5-sonnet-20241022-v2:0"),
+        tools=[get_prayer_times],
+        system_prompt=ITINERARY_AGENT_PROMPT
+    )
+
+
+# Each request checks out its own agent, so concurrent requests never share a conversation
+itinerary_agents = AgentPool(create_itinerary_agent, name="itinerary agent")
+
+
+def format_itinerary(plan: ItineraryPlan) -> str:
+    """Render the structured plan as the markdown answer"""
+    sections = [plan.summary] if plan.summary else []
+    for day in sorted(plan.itinerary, key=lambda day: day.day):
+        heading = f"## Day {day.day}: {day.title} ({day.location}" + (f", {day.date})" if day.date else ")")
+        lines = [heading] + [f"- **{activity.time}:** {activity.description}" for activity in day.activities]
+        if day.notes:
+            lines.append(f"\n_{day.notes}_")
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections)
 
 
 @app.entrypoint
@@ -47,17 +131,23 @@ def invoke(payload, context):
     
     user_message = payload.get("prompt", "Hello")
     
+    # With the trip dates known up front, the timetable goes into the request and saves a tool turn
+    prayer_times = prayer_times_section(payload["travel_dates"]) if payload.get("travel_dates") else ""
+    if prayer_times:
+        user_message = f"{user_message}\n\nPRAYER TIMES:\n{prayer_times}"
+    
     try:
-        response = itinerary_agent(user_message)
-        
-        if hasattr(response, 'message') and 'content' in response.message:
-            result_text = response.message['content'][0]['text']
-        else:
-            result_text = str(response)
+        # One model turn produces the days; the prose answer is rendered from them
+        with itinerary_agents.agent() as itinerary_agent:
+            response = itinerary_agent(user_message, structured_output_model=ItineraryPlan)
+            usage = token_usage(itinerary_agent)
+        plan = response.structured_output
         
         return {
-            "result": result_text,
-            "status": "success"
+            "result": format_itinerary(plan),
+            "status": "success",
+            "data": TripData(itinerary=plan.itinerary).model_dump(),
+            "usage": usage
         }
     except Exception as e:
         print(f"Error processing request: {e}")
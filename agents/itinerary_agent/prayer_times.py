@@ -0,0 +1,240 @@
+"""
+Prayer Times
+Offline Umm al-Qura prayer times for Makkah and Madinah, computed with NumPy
+
+Follows the Umm al-Qura method used by the Saudi timetables: Fajr at a solar
+depression of 18.5 degrees, Asr at a shadow ratio of 1 (Shafi'i), Maghrib at
+sunset and Isha 90 minutes after Maghrib (120 minutes in Ramadan). Times are
+Arabia Standard Time (UTC+3, no daylight saving) and agree with the published
+timetables to within a minute or two.
+
+The solar position is evaluated for every day of a range at once, so a 90-day
+trip takes one pass of array arithmetic rather than a loop of date maths.
+
+Ramadan is found with the tabular Islamic calendar, which can be a day off the
+official Umm al-Qura calendar at the start and end of the month.
+
+Kept identical in every agent directory that uses it, because each runtime is
+deployed from its own directory.
+"""
+
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+
+# Coordinates of the LANDMARKS in agents/hotel_agent/amadeus_hotel_tools.py
+CITIES = {
+    "makkah": {"name": "Makkah", "latitude": 21.4225, "longitude": 39.8262},
+    "madinah": {"name": "Madinah", "latitude": 24.4672, "longitude": 39.6111}
+}
+
+CITY_ALIASES = {
+    "makkah": "makkah", "mecca": "makkah", "makka": "makkah",
+    "madinah": "madinah", "medina": "madinah", "madina": "madinah"
+}
+
+# Arrival airports and the city whose prayer times apply after landing
+AIRPORT_CITIES = {"JED": "makkah", "TIF": "makkah", "MED": "madinah"}
+
+PRAYERS = ("fajr", "sunrise", "dhuhr", "asr", "maghrib", "isha")
+
+UTC_OFFSET_HOURS = 3.0
+FAJR_ANGLE = 18.5
+SUNRISE_ANGLE = 0.833  # Refraction plus the sun's semi-diameter
+ASR_SHADOW_FACTOR = 1.0
+ISHA_MINUTES = 90
+ISHA_MINUTES_RAMADAN = 120
+
+# First guesses (hours) at which the sun position is evaluated for each event
+_APPROXIMATE_HOURS = np.array([5.0, 6.0, 12.0, 13.0, 18.0])
+
+HIJRI_MONTHS = (
+    "Muharram", "Safar", "Rabi al-Awwal", "Rabi al-Thani", "Jumada al-Ula", "Jumada al-Akhirah",
+    "Rajab", "Shaban", "Ramadan", "Shawwal", "Dhu al-Qadah", "Dhu al-Hijjah"
+)
+
+
+def resolve_city(city: str) -> Optional[str]:
+    """
+    Key in CITIES for a city name, alias or arrival airport code (None if not covered)
+
+    Accepts the wizard's labels too, e.g. 'Jeddah (JED)' or 'Madinah (MED)'.
+    """
+    if (city or "").strip().upper() in AIRPORT_CITIES:
+        return AIRPORT_CITIES[city.strip().upper()]
+    for word in re.findall(r"[A-Za-z]+", city or ""):
+        # Inside a label only an upper-case code counts, so 'med' in prose is not Madinah
+        if word in AIRPORT_CITIES:
+            return AIRPORT_CITIES[word]
+        if word.lower() in CITY_ALIASES:
+            return CITY_ALIASES[word.lower()]
+    return None
+
+
+def _sun_position(jd: np.ndarray):
+    """Declination (radians) and equation of time (hours) for Julian days"""
+    d = jd - 2451545.0
+    g = np.radians(357.529 + 0.98560028 * d)
+    q = 280.459 + 0.98564736 * d
+    ecliptic_longitude = np.radians(q + 1.915 * np.sin(g) + 0.020 * np.sin(2 * g))
+    obliquity = np.radians(23.439 - 0.00000036 * d)
+    right_ascension = np.degrees(np.arctan2(
+        np.cos(obliquity) * np.sin(ecliptic_longitude), np.cos(ecliptic_longitude)
+    )) / 15
+    equation_of_time = (q / 15 - right_ascension + 12) % 24 - 12
+    declination = np.arcsin(np.sin(obliquity) * np.sin(ecliptic_longitude))
+    return declination, equation_of_time
+
+
+def hijri_dates(days: np.ndarray) -> np.ndarray:
+    """
+    Tabular Islamic calendar dates for proleptic Gregorian ordinals
+
+    Args:
+        days: Integer array of date.toordinal() values
+
+    Returns:
+        Array of shape (n, 3) with year, month and day
+    """
+    days_left = days.astype(np.int64) + 1721425 - 1948440 + 10632
+    n = (days_left - 1) // 10631
+    days_left = days_left - 10631 * n + 354
+    j = (
+        ((10985 - days_left) // 5316) * ((50 * days_left) // 17719)
+        + (days_left // 5670) * ((43 * days_left) // 15238)
+    )
+    days_left = days_left - ((30 - j) // 15) * ((17719 * j) // 50) - (j // 16) * ((15238 * j) // 43) + 29
+    month = (24 * days_left) // 709
+    day = days_left - (709 * month) // 24
+    year = 30 * n + j - 30
+    return np.stack([year, month, day], axis=1)
+
+
+def prayer_minutes(city: str, start: date, days: int) -> np.ndarray:
+    """
+    Prayer times for consecutive days, in minutes after local midnight
+
+    Args:
+        city: Makkah or Madinah (any name in CITY_ALIASES or AIRPORT_CITIES)
+        start: First date
+        days: Number of days
+
+    Returns:
+        Float array of shape (days, 6), columns in PRAYERS order, rounded to the minute
+
+    Raises:
+        ValueError: If the city is not covered
+    """
+    key = resolve_city(city)
+    if key is None:
+        raise ValueError(f"No prayer times for '{city}'; choose from {', '.join(c['name'] for c in CITIES.values())}")
+    latitude = np.radians(CITIES[key]["latitude"])
+    longitude = CITIES[key]["longitude"]
+
+    ordinals = start.toordinal() + np.arange(days)
+    # Julian day at local solar midnight, then at each event's first guess: shape (days, 5)
+    jd = (ordinals + 1721424.5 - longitude / 360)[:, None] + _APPROXIMATE_HOURS / 24
+    declination, equation_of_time = _sun_position(jd)
+    noon = 12 - equation_of_time
+
+    def hour_angle(depression: np.ndarray) -> np.ndarray:
+        """Hours between noon and the sun reaching a depression (negative: altitude) below the horizon"""
+        cos_angle = (-np.sin(depression) - np.sin(declination) * np.sin(latitude)) / (
+            np.cos(declination) * np.cos(latitude)
+        )
+        return np.degrees(np.arccos(np.clip(cos_angle, -1, 1))) / 15
+
+    asr_altitude = np.arctan(1 / (ASR_SHADOW_FACTOR + np.tan(np.abs(latitude - declination))))
+    solar = np.stack([
+        noon[:, 0] - hour_angle(np.radians(FAJR_ANGLE))[:, 0],
+        noon[:, 1] - hour_angle(np.radians(SUNRISE_ANGLE))[:, 1],
+        noon[:, 2],
+        noon[:, 3] + hour_angle(-asr_altitude)[:, 3],
+        noon[:, 4] + hour_angle(np.radians(SUNRISE_ANGLE))[:, 4]
+    ], axis=1)
+
+    minutes = np.round((solar + UTC_OFFSET_HOURS - longitude / 15) * 60)
+    ramadan = hijri_dates(ordinals)[:, 1] == 9
+    isha = minutes[:, 4] + np.where(ramadan, ISHA_MINUTES_RAMADAN, ISHA_MINUTES)
+    return np.column_stack([minutes, isha])
+
+
+def _clock(minutes: float) -> str:
+    minutes = int(minutes) % (24 * 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _as_date(value: Union[str, date]) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def prayer_timetable(city: str, start_date: Union[str, date], end_date: Union[str, date, None] = None) -> List[Dict[str, Any]]:
+    """
+    Daily prayer times for a date range
+
+    Args:
+        city: Makkah or Madinah
+        start_date: First date (ISO string or date)
+        end_date: Last date, inclusive (defaults to start_date)
+
+    Returns:
+        One dict per day with date, hijri and an HH:MM time per prayer
+    """
+    start = _as_date(start_date)
+    end = _as_date(end_date) if end_date else start
+    days = max((end - start).days + 1, 1)
+    minutes = prayer_minutes(city, start, days)
+    hijri = hijri_dates(start.toordinal() + np.arange(days))
+
+    timetable = []
+    for i in range(days):
+        year, month, day = hijri[i]
+        timetable.append({
+            "date": (start + timedelta(days=i)).isoformat(),
+            "hijri": f"{day} {HIJRI_MONTHS[month - 1]} {year}",
+            **{prayer: _clock(minutes[i, p]) for p, prayer in enumerate(PRAYERS)}
+        })
+    return timetable
+
+
+def next_prayer(city: str, when: Union[str, datetime]) -> Dict[str, Any]:
+    """
+    The first prayer after a local time, e.g. a flight's arrival
+
+    Args:
+        city: Makkah or Madinah (or the arrival airport code)
+        when: Local ISO 8601 date-time or datetime
+
+    Returns:
+        Dict with prayer, time (ISO date-time) and minutes_until
+    """
+    when = when if isinstance(when, datetime) else datetime.fromisoformat(str(when))
+    minutes = prayer_minutes(city, when.date(), 2)
+    now = when.hour * 60 + when.minute + when.second / 60
+    # Sunrise is not a prayer
+    candidates = [
+        (day * 24 * 60 + minutes[day, p], prayer)
+        for day in range(2) for p, prayer in enumerate(PRAYERS) if prayer != "sunrise"
+    ]
+    at, prayer = next((at, prayer) for at, prayer in candidates if at >= now)
+    return {
+        "prayer": prayer,
+        "time": (datetime.combine(when.date(), datetime.min.time()) + timedelta(minutes=float(at))).isoformat(timespec="minutes"),
+        "minutes_until": int(round(at - now))
+    }
+
+
+def format_timetable(city: str, timetable: List[Dict[str, Any]]) -> str:
+    """Markdown table of a timetable from prayer_timetable()"""
+    name = CITIES[resolve_city(city)]["name"]
+    lines = [
+        f"Prayer times for {name} (Umm al-Qura, local time UTC+3):",
+        "| Date | Hijri | " + " | ".join(prayer.capitalize() for prayer in PRAYERS) + " |",
+        "|" + "---|" * (len(PRAYERS) + 2)
+    ]
+    for day in timetable:
+        lines.append(f"| {day['date']} | {day['hijri']} | " + " | ".join(day[prayer] for prayer in PRAYERS) + " |")
+    return "\n".join(lines)
@@ -5,23 +5,52 @@ With Agent-to-Agent communication for real API data
 
 import os
 import json
-import boto3
-import uuid
+import time
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
 from strands import Agent, tool
+from subagent_invoker import SubAgentInvoker
+from agent_pool import AgentPool
+from model_provider import create_model, token_usage
+from trip_contract import TripData, collect_trip_data, start_collecting
+from package_optimizer import hotels_by_city, plan_packages
+from prayer_times import AIRPORT_CITIES, CITIES, next_prayer, prayer_timetable, resolve_city
 
 # Initialize AgentCore app
 app = BedrockAgentCoreApp()
 
-# Initialize boto3 client for calling other agents
-bedrock_client = boto3.client('bedrock-agentcore', region_name=os.getenv('AWS_REGION', 'us-west-2'))
-
 # Agent ARNs from environment
 FLIGHT_AGENT_ARN = "arn:aws:bedrock-agentcore:us-west-2:985444479029:runtime/umrah_flight_agent-ufM0XiC3fw"
 HOTEL_AGENT_ARN = "arn:aws:bedrock-agentcore:us-west-2:985444479029:runtime/umrah_hotel_agent-P3Am0WF25G"
 VISA_AGENT_ARN = "arn:aws:bedrock-agentcore:us-west-2:985444479029:runtime/umrah_visa_agent-KR3L9yDFDl"
 ITINERARY_AGENT_ARN = "arn:aws:bedrock-agentcore:us-west-2:985444479029:runtime/umrah_itinerary_agent-1XwH666geK"
 
+# Shared invoker for calling other agents: one pooled, keep-alive client reused by every request
+sub_agents = SubAgentInvoker(
+    agent_arns={
+        "flight": FLIGHT_AGENT_ARN,
+        "hotel": HOTEL_AGENT_ARN,
+        "visa": VISA_AGENT_ARN,
+        "itinerary": ITINERARY_AGENT_ARN
+    },
+    max_pool_connections=int(os.getenv("SUBAGENT_MAX_POOL_CONNECTIONS", "50")),
+    timeouts={
+        "flight": int(os.getenv("FLIGHT_AGENT_TIMEOUT", "120")),
+        "hotel": int(os.getenv("HOTEL_AGENT_TIMEOUT", "120")),
+        "visa": int(os.getenv("VISA_AGENT_TIMEOUT", "60")),
+        "itinerary": int(os.getenv("ITINERARY_AGENT_TIMEOUT", "120"))
+    }
+)
+
+# Fan-out sends the wizard's flight fields to the flight runtime as-is instead of as a prose request
+STRUCTURED_FLIGHT_SEARCH = os.getenv("STRUCTURED_FLIGHT_SEARCH", "true").lower() == "true"
+
+# Fan-out answers the wizard's visa question from the visa runtime's rules table instead of its model
+VISA_RULES_LOOKUP = os.getenv("VISA_RULES_LOOKUP", "true").lower() == "true"
+
 
 @tool
 def search_flights(request: str) -> str:
@@ -34,42 +63,17 @@ def search_flights(request: str) -> str:
     Returns:
         Flight search results with real prices and availability
     """
-    try:
-        # Prepare payload as JSON bytes
-        payload = json.dumps({"prompt": request}).encode()
-        
-        # Invoke the flight agent with proper session ID (must be 33+ chars)
-        response = bedrock_client.invoke_agent_runtime(
-            agentRuntimeArn=FLIGHT_AGENT_ARN,
-            runtimeSessionId=str(uuid.uuid4()),  # 36 characters
-            payload=payload
-        )
-        
-        # Handle streaming response
-        content_type = response.get("contentType", "")
-        if "text/event-stream" in content_type:
-            # Handle streaming response
-            content = []
-            for line in response["response"].iter_lines(chunk_size=10):
-                if line:
-                    line = line.decode("utf-8")
-                    if line.startswith("data: "):
-                        line = line[6:]
-                        content.append(line)
-            return "\n".join(content)
-        elif content_type == "application/json":
-            # Handle standard JSON response
-            content = []
-            for chunk in response.get("response", []):
-                content.append(chunk.decode('utf-8'))
-            return ''.join(content)
-        else:
-            return str(response)
-    except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Error searching flights: {error_details}")
-        return f"Error searching flights: {str(e)}"
+    return sub_agents.invoke("flight", request, action="searching flights")
+
+
+def search_flights_structured(requirements: dict) -> str:
+    """Search flights for the structured trip requirements directly, without the flight agent's model"""
+    return sub_agents.invoke(
+        "flight",
+        "Structured flight search",
+        action="searching flights",
+        extra_payload={"mode": "structured_search", "requirements": requirements}
+    )
 
 
 @tool
@@ -83,42 +87,7 @@ def search_hotels(request: str) -> str:
     Returns:
         Hotel search results with real prices and availability
     """
-    try:
-        # Prepare payload as JSON bytes
-        payload = json.dumps({"prompt": request}).encode()
-        
-        # Invoke the hotel agent with proper session ID (must be 33+ chars)
-        response = bedrock_client.invoke_agent_runtime(
-            agentRuntimeArn=HOTEL_AGENT_ARN,
-            runtimeSessionId=str(uuid.uuid4()),  # 36 characters
-            payload=payload
-        )
-        
-        # Handle streaming response
-        content_type = response.get("contentType", "")
-        if "text/event-stream" in content_type:
-            # Handle streaming response
-            content = []
-            for line in response["response"].iter_lines(chunk_size=10):
-                if line:
-                    line = line.decode("utf-8")
-                    if line.startswith("data: "):
-                        line = line[6:]
-                        content.append(line)
-            return "\n".join(content)
-        elif content_type == "application/json":
-            # Handle standard JSON response
-            content = []
-            for chunk in response.get("response", []):
-                content.append(chunk.decode('utf-8'))
-            return ''.join(content)
-        else:
-            return str(response)
-    except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Error searching hotels: {error_details}")
-        return f"Error searching hotels: {str(e)}"
+    return sub_agents.invoke("hotel", request, action="searching hotels")
 
 
 @tool
@@ -132,42 +101,67 @@ def get_visa_info(request: str) -> str:
     Returns:
         Visa requirements and application process information
     """
+    return sub_agents.invoke("visa", request, action="getting visa info")
+
+
+@tool
+def check_group_visas(travelers: list) -> str:
+    """
+    Get visa requirements for every traveler in a group in one call, evaluated once per
+    nationality and age band from the Visa Agent's rules table (no per-traveler prose).
+    
+    Args:
+        travelers: List of travelers, each a dict with 'nationality' and optionally 'name' and 'age'
+                   (e.g. [{"name": "Aisha", "nationality": "United Kingdom", "age": 34}]);
+                   a plain string is taken as the nationality
+    
+    Returns:
+        Visa requirements per nationality and age band, listing the travelers each applies to
+    """
+    travelers = [
+        traveler if isinstance(traveler, dict) else {"nationality": str(traveler)}
+        for traveler in travelers
+    ]
+    return sub_agents.invoke(
+        "visa",
+        f"Umrah visa requirements for a group of {len(travelers)} travelers",
+        action="getting visa info",
+        extra_payload={
+            "mode": "rules_lookup",
+            "travelers": [
+                {key: traveler.get(key) for key in ("name", "nationality", "age")} for traveler in travelers
+            ]
+        }
+    )
+
+
+@tool
+def get_prayer_times(city: str, start_date: str, end_date: str = None, arrival_time: str = None) -> str:
+    """
+    Get exact daily prayer times (Umm al-Qura method) for Makkah or Madinah, computed locally.
+    
+    Args:
+        city: Makkah or Madinah (or the arrival airport code: JED, TIF, MED)
+        start_date: First date in YYYY-MM-DD format
+        end_date: Last date in YYYY-MM-DD format, inclusive (optional; default: start_date)
+        arrival_time: Local arrival date-time, e.g. 2026-03-15T14:20 (optional; adds the first prayer after arrival)
+    
+    Returns:
+        JSON with the timetable (fajr, sunrise, dhuhr, asr, maghrib, isha as HH:MM per date)
+    """
     try:
-        # Prepare payload as JSON bytes
-        payload = json.dumps({"prompt": request}).encode()
-        
-        # Invoke the visa agent with proper session ID (must be 33+ chars)
-        response = bedrock_client.invoke_agent_runtime(
-            agentRuntimeArn=VISA_AGENT_ARN,
-            runtimeSessionId=str(uuid.uuid4()),  # 36 characters
-            payload=payload
-        )
-        
-        # Handle streaming response
-        content_type = response.get("contentType", "")
-        if "text/event-stream" in content_type:
-            # Handle streaming response
-            content = []
-            for line in response["response"].iter_lines(chunk_size=10):
-                if line:
-                    line = line.decode("utf-8")
-                    if line.startswith("data: "):
-                        line = line[6:]
-                        content.append(line)
-            return "\n".join(content)
-        elif content_type == "application/json":
-            # Handle standard JSON response
-            content = []
-            for chunk in response.get("response", []):
-                content.append(chunk.decode('utf-8'))
-            return ''.join(content)
-        else:
-            return str(response)
+        timetable = prayer_timetable(city, start_date, end_date)  # Raises ValueError for other cities
+        result = {
+            "city": CITIES[resolve_city(city)]["name"],
+            "method": "Umm al-Qura",
+            "timezone": "UTC+3",
+            "timetable": timetable
+        }
+        if arrival_time:
+            result["next_prayer_after_arrival"] = next_prayer(city, arrival_time)
+        return json.dumps(result)
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Error getting visa info: {error_details}")
-        return f"Error getting visa info: {str(e)}"
+        return json.dumps({"error": str(e)})
 
 
 @tool
@@ -181,62 +175,28 @@ def create_itinerary(request: str) -> str:
     Returns:
         Detailed day-by-day itinerary with Umrah rituals and recommendations
     """
-    try:
-        # Prepare payload as JSON bytes
-        payload = json.dumps({"prompt": request}).encode()
-        
-        # Invoke the itinerary agent with proper session ID (must be 33+ chars)
-        response = bedrock_client.invoke_agent_runtime(
-            agentRuntimeArn=ITINERARY_AGENT_ARN,
-            runtimeSessionId=str(uuid.uuid4()),  # 36 characters
-            payload=payload
-        )
-        
-        # Handle streaming response
-        content_type = response.get("contentType", "")
-        if "text/event-stream" in content_type:
-            # Handle streaming response
-            content = []
-            for line in response["response"].iter_lines(chunk_size=10):
-                if line:
-                    line = line.decode("utf-8")
-                    if line.startswith("data: "):
-                        line = line[6:]
-                        content.append(line)
-            return "\n".join(content)
-        elif content_type == "application/json":
-            # Handle standard JSON response
-            content = []
-            for chunk in response.get("response", []):
-                content.append(chunk.decode('utf-8'))
-            return ''.join(content)
-        else:
-            return str(response)
-    except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Error creating itinerary: {error_details}")
-        return f"Error creating itinerary: {str(e)}"
+    return sub_agents.invoke("itinerary", request, action="creating itinerary")
 
 
-@app.entrypoint
-def invoke(payload, context):
-    """Main entry point for orchestrator agent"""
-    
-    user_message = payload.get("prompt", "Hello")
-    
-    try:
-        # Create a NEW agent instance for each request to avoid concurrency issues
-        orchestrator = Agent(
-            model=os.getenv("ORCHESTRATOR_MODEL", "anthropic.claude-3-5-sonnet-20241022-v2:0"),
-            tools=[search_flights, search_hotels, get_visa_info, create_itinerary],
-            system_prompt="""You are the main Umrah Trip Coordinator with access to specialized agents for real-time data.
+def create_itinerary_structured(itinerary: dict) -> str:
+    """Create an itinerary with the trip dates attached, so the Itinerary Agent gets exact prayer times without a tool turn"""
+    return sub_agents.invoke(
+        "itinerary",
+        itinerary["request"],
+        action="creating itinerary",
+        extra_payload={"travel_dates": itinerary["travel_dates"]}
+    )
+
+
+ORCHESTRATOR_PROMPT = """You are the main Umrah Trip Coordinator with access to specialized agents for real-time data.
 
 CRITICAL: You have access to tools that call specialized agents with REAL APIs:
 1. search_flights() - Calls Flight Agent with Amadeus API for REAL flight data
 2. search_hotels() - Calls Hotel Agent with Amadeus Hotel API for REAL hotel data
 3. get_visa_info() - Calls Visa Agent for visa requirements
+   check_group_visas() - Visa requirements for a whole traveler list in one call
 4. create_itinerary() - Calls Itinerary Agent for detailed Umrah plans
+5. get_prayer_times() - Exact prayer times for Makkah and Madinah, computed locally (no agent call)
 
 ALWAYS use these tools when users ask about flights, hotels, visas, or itineraries!
 
@@ -246,7 +206,7 @@ Your workflow:
    - Travel dates
    - Number of travelers (adults, children)
    - Departure city
-   - Destination preference (Jeddah or Medina arrival)
+   - Destination preference (Jeddah or Medina arrival, or no preference)
    - Budget range
    - Hotel preferences (star rating, proximity to Haram)
    - Nationality (for visa requirements)
@@ -257,6 +217,7 @@ Your workflow:
    For FLIGHTS - Request AT LEAST 2-3 OPTIONS:
    - Call search_flights() and explicitly ask for "multiple flight options with different airlines and price points"
    - Example: "Find 2-3 flight options from New York to Jeddah departing March 15, 2026 returning March 25, 2026 for 2 adults. Include different airlines and price ranges."
+   - If the user has no arrival airport preference, make ONE search_flights() call asking to "compare all Saudi arrival airports" (the flight agent ranks JED/MED/TIF/RUH by price and transfer time to the Haram) instead of separate Jeddah and Medina searches
    
    For HOTELS - Request AT LEAST 2-3 OPTIONS PER CITY:
    - If user has custom itinerary (e.g., "Madinah first, then Makkah"), follow it exactly
@@ -268,7 +229,8 @@ Your workflow:
    - If no custom itinerary, use standard split (e.g., half in Makkah, half in Madinah)
    
    For VISAS:
-   - Call get_visa_info() with nationality
+   - When you know each traveler's nationality and age, call check_group_visas() ONCE with all travelers
+   - Use get_visa_info() only for other visa questions
    
    For ITINERARY:
    - Call create_itinerary() with trip details and custom requirements if provided
@@ -297,14 +259,423 @@ IMPORTANT NOTES:
 - If user has custom itinerary requirements, follow them precisely when booking hotels
 - If user mentions Medina/Madinah as arrival city, make sure to specify that in flight search
 - Always emphasize hotel proximity to Haram (very important for pilgrims)
-- Consider prayer times when suggesting flight schedules
+- Check flight arrival times against get_prayer_times() (pass arrival_time) instead of estimating prayer times
 - Be patient and helpful throughout the planning process
 
 Remember: You are coordinating specialized agents - use them to provide accurate, real-time information with MULTIPLE OPTIONS!"""
+
+
+SYNTHESIS_PROMPT = """You are the main Umrah Trip Coordinator.
+
+The specialist agents (flights, hotels, visa, itinerary) have ALREADY been called in parallel for this request.
+Their complete results are included in the user message, one section per agent.
+
+Your job is to turn those results into one clear trip plan:
+- Show ALL flight options (2-3) with prices, airlines, times
+- Show ALL hotel options (2-3 per city) with prices, star ratings, distances to Haram
+- Summarize the visa requirements for each nationality
+- Include the day-by-day itinerary
+- Recommend packages from the BEST VALUE PACKAGES section: it was computed from every combination
+  of the flight and hotel offers, so use its totals instead of calculating them yourself
+- If the user has a custom itinerary, make sure the plan follows it exactly
+- Use the ARRIVAL PRAYER TIMES section when comparing flight arrival times; never estimate prayer times
+
+Only use prices and availability that appear in the agent results. If an agent returned an error,
+say so briefly and continue with the information you have."""
+
+
+def build_sub_agent_requests(requirements: dict) -> dict:
+    """
+    Build one natural language request per specialist agent from the structured
+    trip requirements collected by the frontend wizard.
+    
+    Args:
+        requirements: Trip requirements (travel_dates, travelers, budget, hotel_preferences,
+                      flight_preferences, special_requirements)
+    
+    Returns:
+        Dict mapping a result name to a (tool, request) tuple
+    """
+    travel_dates = requirements.get('travel_dates', {})
+    travelers = requirements.get('travelers', [])
+    hotel_prefs = requirements.get('hotel_preferences', {})
+    flight_prefs = requirements.get('flight_preferences', {})
+    special_reqs = requirements.get('special_requirements', {})
+    
+    departure = travel_dates.get('departure', 'N/A')
+    return_date = travel_dates.get('return', 'N/A')
+    duration = travel_dates.get('duration', 'N/A')
+    arrival_city = travel_dates.get('arrival_city', 'Jeddah (JED)')
+    num_adults = len(travelers) or requirements.get('num_travelers', 1)
+    custom_itinerary = special_reqs.get('custom_itinerary')
+    
+    requests = {}
+    
+    if STRUCTURED_FLIGHT_SEARCH:
+        # The form fields map straight onto search arguments; no model turn is needed
+        requests['flights'] = (search_flights_structured, requirements)
+    else:
+        requests['flights'] = (search_flights, (
+            f"Find 2-3 flight options from {travel_dates.get('departure_airport', 'N/A')} to {arrival_city} "
+            f"departing {departure} returning {return_date} for {num_adults} adults. "
+            f"Cabin class: {flight_prefs.get('cabin_class', 'Economy')}. "
+            f"Direct flights preferred: {flight_prefs.get('direct_flights', True)}. "
+            "Include different airlines and price ranges."
+        ))
+    
+    if custom_itinerary:
+        requests['hotels'] = (search_hotels, (
+            f"Find 2-3 hotel options near Haram for each leg of this custom itinerary for {num_adults} adults. "
+            f"Trip dates: {departure} to {return_date}.\n"
+            f"Custom itinerary: {custom_itinerary}\n"
+            f"Preferred star ratings: Makkah {hotel_prefs.get('makkah', {}).get('star_rating', 4)} stars, "
+            f"Madinah {hotel_prefs.get('madinah', {}).get('star_rating', 4)} stars."
+        ))
+    else:
+        # Standard split: half the stay in each city, starting in the arrival city
+        try:
+            start = date.fromisoformat(departure)
+            end = date.fromisoformat(return_date)
+            middle = start + timedelta(days=max(1, (end - start).days // 2))
+            cities = ['Makkah', 'Madinah']
+            if 'MED' in arrival_city.upper() or 'MADINAH' in arrival_city.upper():
+                cities.reverse()
+            legs = [(cities[0], start, middle), (cities[1], middle, end)]
+        except (TypeError, ValueError):
+            legs = [('Makkah', departure, return_date), ('Madinah', departure, return_date)]
+        
+        for city, check_in, check_out in legs:
+            stars = hotel_prefs.get(city.lower(), {}).get('star_rating', 4)
+            requests[f'hotels_{city.lower()}'] = (search_hotels, (
+                f"Find 2-3 hotel options in {city} near Haram for {check_in} to {check_out} "
+                f"for {num_adults} adults, {stars} star or similar."
+            ))
+    
+    nationalities = sorted({t.get('nationality', 'N/A') for t in travelers}) or ['N/A']
+    if VISA_RULES_LOOKUP and travelers:
+        # Evaluated once per nationality and age band, however large the group
+        requests['visa'] = (check_group_visas, travelers)
+    else:
+        requests['visa'] = (get_visa_info, (
+            f"What are the Umrah visa requirements for citizens of {', '.join(nationalities)}? "
+            f"Travel dates: {departure} to {return_date}."
+        ))
+    
+    itinerary_request = (
+        f"Create a {duration}-day Umrah itinerary from {departure} to {return_date}, arriving in {arrival_city}."
+    )
+    if custom_itinerary:
+        itinerary_request += f" Follow this custom itinerary exactly: {custom_itinerary}"
+    if special_reqs.get('elderly_travelers'):
+        itinerary_request += " The group includes elderly travelers who need extra rest."
+    if special_reqs.get('first_time_umrah'):
+        itinerary_request += " This is the first Umrah for the group."
+    if travel_dates.get('departure'):
+        requests['itinerary'] = (
+            create_itinerary_structured, {"request": itinerary_request, "travel_dates": travel_dates}
         )
+    else:
+        requests['itinerary'] = (create_itinerary, itinerary_request)
+    
+    return requests
+
+
+def run_timed(tool_fn, request: str) -> tuple:
+    """Call a specialist agent tool and return (result, seconds)"""
+    started = time.perf_counter()
+    result = tool_fn(request)
+    return result, round(time.perf_counter() - started, 2)
+
+
+def fan_out(requests: dict) -> tuple:
+    """
+    Call all specialist agents at the same time
+    
+    Args:
+        requests: Dict mapping a result name to a (tool, request) tuple
+    
+    Returns:
+        Tuple of (results dict, timings dict in seconds)
+    """
+    results = {}
+    timings = {}
+    
+    with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+        # Each call runs in a copy of this context, so it records into the caller's trip data collector
+        futures = {
+            name: executor.submit(contextvars.copy_context().run, run_timed, tool_fn, request)
+            for name, (tool_fn, request) in requests.items()
+        }
+        for name, future in futures.items():
+            results[name], timings[name] = future.result()
+    
+    return results, timings
+
+
+def format_fan_out_results(user_message: str, results: dict) -> str:
+    """Merge the specialist agent results into a single synthesis prompt"""
+    sections = [user_message, "", "Results from the specialist agents:"]
+    for name, result in results.items():
+        sections.append(f"\n### {name.replace('_', ' ').upper()}\n{result}")
+    return "\n".join(sections)
+
+
+def format_packages(trip_data: TripData, packages: dict) -> str:
+    """Describe the optimized packages for the synthesis prompt"""
+    excluded = (
+        f"{packages['excluded_offers']} offers priced in other currencies were left out."
+        if packages.get("excluded_offers") else ""
+    )
+    if not packages["packages"]:
+        return packages.get("message") or " ".join(filter(None, ["No packages could be built from the offers found.", excluded]))
+    
+    makkah, madinah = hotels_by_city(trip_data.hotels)
+    currency = packages.get("currency") or "USD"
+    lines = [f"{packages['combinations']} combinations compared; Pareto-optimal packages, best first:"]
+    for i, package in enumerate(packages["packages"], 1):
+        parts = []
+        if package["flight"] is not None:
+            parts.append(f"flight {trip_data.flights[package['flight']].airline}")
+        if package["makkah_hotel"] is not None:
+            parts.append(f"Makkah {makkah[package['makkah_hotel']].name}")
+        if package["madinah_hotel"] is not None:
+            parts.append(f"Madinah {madinah[package['madinah_hotel']].name}")
+        label = "total" if package["hotels_priced"] else "total excl. hotels (not priced yet)"
+        line = f"{i}. {' + '.join(parts)}: {label} {currency} {package['total_cost']:,.2f}"
+        if package["distance_to_haram_m"] is not None:
+            line += f", {package['distance_to_haram_m']}m to Haram (both hotels)"
+        if package["within_budget"] is None:
+            line += ", budget not checked"
+        elif not package["within_budget"]:
+            line += ", OVER BUDGET"
+        lines.append(line)
+    if excluded:
+        lines.append(excluded)
+    return "\n".join(lines)
+
+
+def format_arrival_prayers(trip_data: TripData) -> str:
+    """Describe the first prayer after each flight offer lands in Makkah or Madinah, for the synthesis prompt"""
+    lines = []
+    for i, offer in enumerate(trip_data.flights, 1):
+        leg = offer.outbound
+        if leg.arrival_airport not in AIRPORT_CITIES or not leg.arrival_time:
+            continue
+        try:
+            prayer = next_prayer(leg.arrival_airport, leg.arrival_time)
+        except ValueError:
+            continue
+        city = CITIES[AIRPORT_CITIES[leg.arrival_airport]]["name"]
+        lines.append(
+            f"{i}. {offer.airline} lands at {leg.arrival_airport} {leg.arrival_time}: next prayer in {city} is "
+            f"{prayer['prayer'].capitalize()} at {prayer['time'].replace('T', ' ')} ({prayer['minutes_until']} min after landing)"
+        )
+    return "\n".join(lines) if lines else "No arrival times in Makkah or Madinah to check."
+
+
+def create_orchestrator_agent() -> Agent:
+    """Create an orchestrator agent that calls the specialist agents through tools"""
+    return Agent(
+        model=create_model("orchestrator", "ORCHESTRATOR_MODEL", "anthropic.claude-3-5-sonnet-20241022-v2:0", prompt_cache=True),
+        tools=[search_flights, search_hotels, get_visa_info, check_group_visas, create_itinerary, get_prayer_times],
+        system_prompt=ORCHESTRATOR_PROMPT
+    )
+
+
+def create_synthesis_agent() -> Agent:
+    """Create a tool-less agent that writes the plan from fanned-out results"""
+    return Agent(
+        model=create_model(
+            "orchestrator_synthesis", "ORCHESTRATOR_MODEL", "anthropic.claude-3-5-sonnet-20241022-v2:0", prompt_cache=True
+        ),
+        system_prompt=SYNTHESIS_PROMPT
+    )
+
+
+# Pre-built agents; each request checks out its own, so concurrent requests never share a conversation
+orchestrator_agents = AgentPool(create_orchestrator_agent, name="orchestrator agent")
+synthesis_agents = AgentPool(create_synthesis_agent, name="synthesis agent")
+
+
+def invoke_fan_out(user_message: str, requirements: dict) -> dict:
+    """Plan a trip by calling all specialist agents in parallel, then synthesizing once"""
+    started = time.perf_counter()
+    with collect_trip_data() as collector:
+        results, timings = fan_out(build_sub_agent_requests(requirements))
+    packages = plan_packages(collector.data, requirements)
+    results['best_value_packages'] = format_packages(collector.data, packages)
+    results['arrival_prayer_times'] = format_arrival_prayers(collector.data)
+    
+    with synthesis_agents.agent() as synthesis_agent:
+        response = synthesis_agent(format_fan_out_results(user_message, results))
+        usage = token_usage(synthesis_agent)
+    
+    timings['total'] = round(time.perf_counter() - started, 2)
+    
+    return {
+        "result": response.message,
+        "data": collector.dump(),
+        "packages": packages,
+        "timings": timings,
+        "usage": usage,
+        "sub_agent_metrics": sub_agents.get_metrics()
+    }
+
+
+# Progress labels for tool calls made by the orchestrator agent
+TOOL_AGENTS = {
+    "search_flights": "flights",
+    "search_hotels": "hotels",
+    "get_visa_info": "visa",
+    "check_group_visas": "visa",
+    "create_itinerary": "itinerary",
+    "get_prayer_times": "prayer times"
+}
+
+
+async def stream_fan_out(user_message: str, requirements: dict):
+    """
+    Stream a fan-out plan: sub-agent progress events as each agent finishes,
+    then the synthesized plan token by token
+    
+    Yields:
+        Event dicts with a 'type' of 'status', 'text' or 'result'
+    """
+    started = time.perf_counter()
+    requests = build_sub_agent_requests(requirements)
+    results = {}
+    timings = {}
+    collector = start_collecting()
+    
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=len(requests))
+    try:
+        futures = {}
+        for name, (tool_fn, request) in requests.items():
+            futures[loop.run_in_executor(executor, collector.run, run_timed, tool_fn, request)] = name
+            yield {"type": "status", "agent": name, "state": "started"}
+        
+        pending = set(futures)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                results[name], timings[name] = future.result()
+                yield {"type": "status", "agent": name, "state": "completed", "seconds": timings[name]}
+    finally:
+        # Never wait here: if the client disconnects, the generator is closed on the event
+        # loop and waiting would block it until every sub-agent call had returned
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    packages = plan_packages(collector.data, requirements)
+    results['best_value_packages'] = format_packages(collector.data, packages)
+    results['arrival_prayer_times'] = format_arrival_prayers(collector.data)
+    
+    yield {"type": "status", "agent": "synthesis", "state": "started"}
+    # Checkout may wait for a free agent; keep that off the event loop
+    synthesis_agent = await asyncio.to_thread(synthesis_agents.checkout)
+    try:
+        async for event in synthesis_agent.stream_async(format_fan_out_results(user_message, results)):
+            if "data" in event:
+                yield {"type": "text", "data": event["data"]}
+            elif "result" in event:
+                timings['total'] = round(time.perf_counter() - started, 2)
+                yield {"type": "status", "agent": "synthesis", "state": "completed"}
+                yield {
+                    "type": "result",
+                    "result": event["result"].message,
+                    "data": collector.dump(),
+                    "packages": packages,
+                    "timings": timings,
+                    "usage": token_usage(synthesis_agent),
+                    "sub_agent_metrics": sub_agents.get_metrics()
+                }
+    finally:
+        synthesis_agents.checkin(synthesis_agent)
+
+
+async def stream_agent_loop(user_message: str):
+    """
+    Stream the tool-loop orchestrator: text as it is generated and a status
+    event whenever a specialist agent tool starts or returns
+    
+    Yields:
+        Event dicts with a 'type' of 'status', 'text' or 'result'
+    """
+    tool_names = {}
+    collector = start_collecting()
+    
+    orchestrator = await asyncio.to_thread(orchestrator_agents.checkout)
+    try:
+        async for event in orchestrator.stream_async(user_message):
+            if "data" in event:
+                yield {"type": "text", "data": event["data"]}
+            elif "current_tool_use" in event:
+                tool_use = event["current_tool_use"]
+                tool_use_id = tool_use.get("toolUseId")
+                if tool_use_id and tool_use_id not in tool_names:
+                    tool_names[tool_use_id] = TOOL_AGENTS.get(tool_use.get("name"), tool_use.get("name"))
+                    yield {"type": "status", "agent": tool_names[tool_use_id], "state": "started"}
+            elif "message" in event:
+                for content in event["message"].get("content", []):
+                    tool_result = content.get("toolResult")
+                    if tool_result and tool_result.get("toolUseId") in tool_names:
+                        yield {"type": "status", "agent": tool_names[tool_result["toolUseId"]], "state": "completed"}
+            elif "result" in event:
+                yield {
+                    "type": "result",
+                    "result": event["result"].message,
+                    "data": collector.dump(),
+                    "usage": token_usage(orchestrator)
+                }
+    finally:
+        orchestrator_agents.checkin(orchestrator)
+
+
+async def stream_plan(user_message: str, requirements: dict, mode: str):
+    """Stream a plan in the requested mode, turning failures into an error event"""
+    try:
+        if mode == "fanout" and requirements:
+            stream = stream_fan_out(user_message, requirements)
+        else:
+            stream = stream_agent_loop(user_message)
+        async for event in stream:
+            yield event
+    except Exception as e:
+        print(f"Error streaming request: {e}")
+        import traceback
+        traceback.print_exc()
+        yield {
+            "type": "result",
+            "result": {"content": [{"text": f"I apologize, but I encountered an error: {str(e)}"}]},
+            "status": "error"
+        }
+
+
+@app.entrypoint
+def invoke(payload, context):
+    """Main entry point for orchestrator agent"""
+    
+    user_message = payload.get("prompt", "Hello")
+    requirements = payload.get("requirements")
+    
+    # Structured requirements from the frontend can be fanned out directly;
+    # free-form chat goes through the tool loop
+    mode = payload.get("mode", "fanout" if requirements else "agent")
+    
+    # Streaming callers get progress and text events over SSE as they happen
+    if payload.get("stream"):
+        return stream_plan(user_message, requirements, mode)
+    
+    try:
+        if mode == "fanout" and requirements:
+            return invoke_fan_out(user_message, requirements)
         
-        response = orchestrator(user_message)
-        return {"result": response.message}
+        # Each request gets its own pooled agent, so concurrent requests never share a conversation
+        with collect_trip_data() as collector, orchestrator_agents.agent() as orchestrator:
+            response = orchestrator(user_message)
+            usage = token_usage(orchestrator)
+        return {"result": response.message, "data": collector.dump(), "usage": usage}
     except Exception as e:
         print(f"Error processing request: {e}")
         import traceback
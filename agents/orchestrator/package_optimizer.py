@@ -0,0 +1,320 @@
+"""
+Trip Package Optimizer
+Scores every flight x Makkah hotel x Madinah hotel combination with NumPy and
+returns the Pareto-optimal packages (cost, journey time, distance to Haram, stars)
+
+Each objective is a sum of per-leg values, so an offer that is dominated within
+its own leg can never be part of an optimal package. Legs are pruned to their own
+Pareto fronts first; only the survivors are combined, which keeps the search in
+the millisecond range even with hundreds of offers per leg.
+
+Totals are only meaningful in one currency. Offers are converted into the
+budget currency where a fixed rate exists (SAR and AED are pegged to USD); offers
+in any other currency are left out and counted, rather than added into a mixed total.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from trip_contract import FlightOffer, HotelOffer, TripData
+except ImportError:  # Imported by the frontend as agents.orchestrator.package_optimizer
+    from .trip_contract import FlightOffer, HotelOffer, TripData
+
+
+# Share of the budget a package may exceed for each flexibility setting of the wizard
+BUDGET_TOLERANCE = {
+    "strict": 0.0,
+    "moderate": 0.10,
+    "flexible": 0.25
+}
+
+# Fixed exchange rates: units of the second currency per unit of the first
+PEGGED_RATES = {
+    ("USD", "SAR"): 3.75,
+    ("USD", "AED"): 3.6725
+}
+
+# Weights for the single score used to order the Pareto set (objectives are min-max normalized)
+SCORE_WEIGHTS = {
+    "cost": 0.5,
+    "journey": 0.1,
+    "distance": 0.2,
+    "stars": 0.2
+}
+
+
+def pareto_mask(objectives: np.ndarray) -> np.ndarray:
+    """
+    Find the non-dominated rows of an objective matrix (all objectives minimized)
+
+    Args:
+        objectives: Array of shape (n, k)
+
+    Returns:
+        Boolean mask of length n; of several identical rows only one is kept
+    """
+    n = objectives.shape[0]
+    # Visiting rows in lexicographic order means each kept row is never dominated by a later one
+    order = np.lexsort(objectives.T[::-1])
+    candidates = order
+    points = objectives[order]
+
+    i = 0
+    while i < len(points):
+        # Keep rows that beat the current row in at least one objective, plus the row itself
+        keep = np.any(points < points[i], axis=1)
+        keep[i] = True
+        candidates = candidates[keep]
+        points = points[keep]
+        i = int(np.count_nonzero(keep[:i])) + 1
+
+    mask = np.zeros(n, dtype=bool)
+    mask[candidates] = True
+    return mask
+
+
+def exchange_rate(from_currency: str, to_currency: str) -> Optional[float]:
+    """Factor converting an amount between two currencies, or None without a fixed rate"""
+    from_currency, to_currency = from_currency.upper(), to_currency.upper()
+    if from_currency == to_currency:
+        return 1.0
+    if (from_currency, to_currency) in PEGGED_RATES:
+        return PEGGED_RATES[(from_currency, to_currency)]
+    if (to_currency, from_currency) in PEGGED_RATES:
+        return 1 / PEGGED_RATES[(to_currency, from_currency)]
+    # Two currencies pegged to the same one (e.g. SAR and AED via USD)
+    for (base, pegged), rate in PEGGED_RATES.items():
+        if pegged == from_currency and (base, to_currency) in PEGGED_RATES:
+            return PEGGED_RATES[(base, to_currency)] / rate
+    return None
+
+
+def _convertible(offers: Sequence, currency: Optional[str]):
+    """
+    Indices and conversion rates of the offers that can be priced in a currency
+
+    Unpriced hotels carry no amount, so they are kept whatever their currency.
+    """
+    index, rates = [], []
+    for i, offer in enumerate(offers):
+        rate = 1.0 if currency is None or getattr(offer, "price_total", 0) is None else exchange_rate(offer.currency, currency)
+        if rate is not None:
+            index.append(i)
+            rates.append(rate)
+    return index, np.array(rates, dtype=float)
+
+
+def _minutes(offer: FlightOffer) -> float:
+    legs = [leg for leg in (offer.outbound, offer.inbound) if leg is not None]
+    if any(leg.duration_minutes is None for leg in legs):
+        return np.inf
+    return float(sum(leg.duration_minutes for leg in legs))
+
+
+def _hotel_arrays(hotels: Sequence[HotelOffer], rates: np.ndarray):
+    """Cost (converted with rates), distance and stars arrays for one city (NaN cost for unpriced hotels)"""
+    cost = np.array([np.nan if hotel.price_total is None else hotel.price_total for hotel in hotels], dtype=float) * rates
+    distance = np.array(
+        [np.inf if hotel.distance_to_haram_m is None else hotel.distance_to_haram_m for hotel in hotels],
+        dtype=float
+    )
+    stars = np.array([hotel.stars or 0 for hotel in hotels], dtype=float)
+    return cost, distance, stars
+
+
+def _normalize(values: np.ndarray) -> np.ndarray:
+    """Min-max scale to [0, 1]; infinite values (unknown) count as the worst"""
+    finite = np.isfinite(values)
+    if not finite.any():
+        return np.ones_like(values)
+    low, high = values[finite].min(), values[finite].max()
+    if high == low:
+        return np.where(finite, 0.0, 1.0)
+    return np.where(finite, (values - low) / (high - low), 1.0)
+
+
+def optimize_packages(
+    flights: Sequence[FlightOffer],
+    makkah_hotels: Sequence[HotelOffer],
+    madinah_hotels: Sequence[HotelOffer],
+    travelers: int = 1,
+    budget_total: Optional[float] = None,
+    flexibility: str = "Moderate",
+    max_results: int = 10,
+    currency: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Find the Pareto-optimal trip packages
+
+    A package is one flight offer plus one hotel in each city. Its total cost is the
+    flight price per person times travelers plus both hotel stays. Hotels without a
+    price are only considered in a city where no hotel is priced; their stay is then
+    missing from the total, so the packages are flagged hotels_priced=False and the
+    budget is not applied (within_budget is None).
+
+    Args:
+        flights: Flight offers (an empty list plans hotels only)
+        makkah_hotels: Hotel offers in Makkah (may be empty)
+        madinah_hotels: Hotel offers in Madinah (may be empty)
+        travelers: Number of travelers
+        budget_total: Total trip budget; packages over budget plus tolerance are dropped when any fit
+                      (ignored when the totals leave out unpriced hotels)
+        flexibility: 'Strict', 'Moderate' or 'Flexible' (see BUDGET_TOLERANCE)
+        max_results: Maximum packages to return
+        currency: Currency of the budget and of the totals; offers that cannot be
+                  converted into it are left out (None: assume every offer is in one currency)
+
+    Returns:
+        Dict with the packages (indices into the inputs, totals and score, best first),
+        whether the totals include every hotel stay (hotels_priced), the number of
+        combinations considered, the budget limit applied, the currency,
+        the number of offers left out for their currency and a message explaining an
+        empty package list caused by those offers (None otherwise)
+    """
+    travelers = max(int(travelers or 1), 1)
+
+    # Keep only the offers that can be priced in the target currency; indices map back to the inputs
+    flight_ids, flight_rates = _convertible(flights, currency)
+    makkah_ids, makkah_rates = _convertible(makkah_hotels, currency)
+    madinah_ids, madinah_rates = _convertible(madinah_hotels, currency)
+    excluded = len(flights) + len(makkah_hotels) + len(madinah_hotels) - len(flight_ids) - len(makkah_ids) - len(madinah_ids)
+    flights = [flights[i] for i in flight_ids]
+    makkah_hotels = [makkah_hotels[i] for i in makkah_ids]
+    madinah_hotels = [madinah_hotels[i] for i in madinah_ids]
+
+    result = {
+        "packages": [], "hotels_priced": True, "combinations": 0, "budget_limit": None, "currency": currency,
+        "excluded_offers": excluded, "message": None
+    }
+    if not (flights or makkah_hotels or madinah_hotels):
+        if excluded:
+            result["message"] = (
+                f"No offers in your currency: the {excluded} offers found are priced in currencies "
+                f"without a fixed rate to {currency}, so no packages could be priced."
+            )
+        return result
+
+    # Per-leg objective arrays; a missing leg is represented by a single zero-valued placeholder
+    if flights:
+        flight_cost = np.array([offer.price_per_person for offer in flights], dtype=float) * flight_rates * travelers
+        flight_minutes = np.array([_minutes(offer) for offer in flights], dtype=float)
+    else:
+        flight_cost, flight_minutes = np.zeros(1), np.zeros(1)
+
+    legs = []
+    hotels_priced = True
+    for hotels, rates in ((makkah_hotels, makkah_rates), (madinah_hotels, madinah_rates)):
+        if hotels:
+            cost, distance, stars = _hotel_arrays(hotels, rates)
+            priced = ~np.isnan(cost)
+            hotels_priced = hotels_priced and bool(priced.any())
+            index = np.flatnonzero(priced) if priced.any() else np.arange(len(hotels))
+            cost = np.nan_to_num(cost[index])
+            legs.append((index, cost, distance[index], stars[index]))
+        else:
+            legs.append((np.array([-1]), np.zeros(1), np.zeros(1), np.zeros(1)))
+
+    # Prune every leg to its own Pareto front
+    flight_index = np.arange(len(flight_cost))
+    keep = pareto_mask(np.column_stack([flight_cost, flight_minutes]))
+    flight_index, flight_cost, flight_minutes = flight_index[keep], flight_cost[keep], flight_minutes[keep]
+
+    pruned = []
+    for index, cost, distance, stars in legs:
+        keep = pareto_mask(np.column_stack([cost, distance, -stars]))
+        pruned.append((index[keep], cost[keep], distance[keep], stars[keep]))
+    (makkah_index, makkah_cost, makkah_distance, makkah_stars), \
+        (madinah_index, madinah_cost, madinah_distance, madinah_stars) = pruned
+
+    # Broadcast (flights, makkah, madinah) into one grid of packages
+    total_cost = flight_cost[:, None, None] + makkah_cost[None, :, None] + madinah_cost[None, None, :]
+    shape = total_cost.shape
+    journey = np.broadcast_to(flight_minutes[:, None, None], shape)
+    distance = np.broadcast_to(makkah_distance[None, :, None] + madinah_distance[None, None, :], shape)
+    stars = np.broadcast_to(makkah_stars[None, :, None] + madinah_stars[None, None, :], shape)
+
+    objectives = np.column_stack([
+        total_cost.ravel(), journey.ravel(), distance.ravel(), -stars.ravel()
+    ])
+
+    # A total without the hotel stays says nothing about the budget
+    budget_limit = None
+    within_budget = np.ones(len(objectives), dtype=bool)
+    if budget_total and hotels_priced:
+        budget_limit = float(budget_total) * (1 + BUDGET_TOLERANCE.get(str(flexibility).lower(), 0.10))
+        within_budget = objectives[:, 0] <= budget_limit
+    candidates = np.flatnonzero(within_budget) if within_budget.any() else np.arange(len(objectives))
+
+    front = candidates[pareto_mask(objectives[candidates])]
+
+    # Order the front by a weighted score (lower is better)
+    front_objectives = objectives[front]
+    score = (
+        SCORE_WEIGHTS["cost"] * _normalize(front_objectives[:, 0])
+        + SCORE_WEIGHTS["journey"] * _normalize(front_objectives[:, 1])
+        + SCORE_WEIGHTS["distance"] * _normalize(front_objectives[:, 2])
+        + SCORE_WEIGHTS["stars"] * _normalize(front_objectives[:, 3])
+    )
+    ranked = front[np.argsort(score, kind="stable")][:max_results]
+    score_by_package = dict(zip(front.tolist(), score.tolist()))
+
+    # The distance is the sum over both hotels, so it is unknown unless both cities have one
+    both_cities = bool(makkah_hotels) and bool(madinah_hotels)
+    packages: List[Dict[str, Any]] = []
+    for package in ranked:
+        f, m, d = np.unravel_index(package, shape)
+        packages.append({
+            "flight": flight_ids[int(flight_index[f])] if flights else None,
+            "makkah_hotel": makkah_ids[int(makkah_index[m])] if makkah_hotels else None,
+            "madinah_hotel": madinah_ids[int(madinah_index[d])] if madinah_hotels else None,
+            "total_cost": round(float(total_cost[f, m, d]), 2),
+            "journey_minutes": None if not np.isfinite(journey[f, m, d]) or not flights else int(journey[f, m, d]),
+            "distance_to_haram_m": (
+                int(distance[f, m, d]) if both_cities and np.isfinite(distance[f, m, d]) else None
+            ),
+            "stars": int(stars[f, m, d]),
+            "hotels_priced": hotels_priced,
+            "within_budget": None if budget_total and not hotels_priced else bool(within_budget[package]),
+            "score": round(score_by_package[int(package)], 3)
+        })
+
+    result.update({
+        "packages": packages,
+        "hotels_priced": hotels_priced,
+        "combinations": len(flights or [None]) * len(makkah_hotels or [None]) * len(madinah_hotels or [None]),
+        "budget_limit": budget_limit
+    })
+    return result
+
+
+def hotels_by_city(hotels: Sequence[HotelOffer]):
+    """Split hotel offers into (Makkah, Madinah) lists, keeping their order"""
+    makkah = [hotel for hotel in hotels if hotel.city.lower() in ("makkah", "mecca")]
+    madinah = [hotel for hotel in hotels if hotel.city.lower() in ("madinah", "medina")]
+    return makkah, madinah
+
+
+def plan_packages(trip_data: TripData, requirements: Dict[str, Any], max_results: int = 10) -> Dict[str, Any]:
+    """
+    Optimize packages for the offers in a trip data payload and the wizard's requirements
+
+    Totals are in the budget currency (USD when the requirements name none).
+
+    Returns:
+        optimize_packages() result; indices refer to trip_data.flights and to the
+        hotels_by_city(trip_data.hotels) lists
+    """
+    budget = requirements.get("budget", {})
+    makkah, madinah = hotels_by_city(trip_data.hotels)
+    return optimize_packages(
+        trip_data.flights,
+        makkah,
+        madinah,
+        travelers=len(requirements.get("travelers", [])) or requirements.get("num_travelers", 1),
+        budget_total=budget.get("total"),
+        flexibility=budget.get("flexibility", "Moderate"),
+        max_results=max_results,
+        currency=budget.get("currency") or "USD"
+    )
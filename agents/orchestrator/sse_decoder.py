@@ -0,0 +1,108 @@
+"""
+Incremental Server-Sent Events decoder
+Reads AgentCore streaming responses in large chunks and yields parsed events
+"""
+
+from typing import Iterator, NamedTuple, Optional
+
+
+# Read in large chunks instead of the 10-byte reads used by iter_lines(chunk_size=10)
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class SSEEvent(NamedTuple):
+    """A single decoded Server-Sent Event"""
+    data: str
+    event: str = "message"
+    id: Optional[str] = None
+
+
+def _iter_chunks(stream, chunk_size: int) -> Iterator[bytes]:
+    """Yield raw byte chunks from a botocore StreamingBody, file-like object or iterable"""
+    if hasattr(stream, "iter_chunks"):
+        yield from stream.iter_chunks(chunk_size=chunk_size)
+    elif hasattr(stream, "read"):
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    else:
+        yield from stream
+
+
+def iter_sse_events(stream, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[SSEEvent]:
+    """
+    Decode a Server-Sent Events stream incrementally
+
+    Handles multi-line data fields, event/id fields, comments and CRLF line endings.
+    Events are yielded as soon as their terminating blank line has been read.
+
+    Args:
+        stream: botocore StreamingBody, file-like object or iterable of bytes
+        chunk_size: Number of bytes to read per chunk
+
+    Yields:
+        SSEEvent for every dispatched event
+    """
+    data_lines = []
+    event_type = None
+    event_id = None
+    pending = b""
+
+    def process(line: bytes):
+        nonlocal event_type, event_id
+        if line.endswith(b"\r"):
+            line = line[:-1]
+
+        if not line:
+            if not data_lines:
+                event_type = None
+                return None
+            event = SSEEvent(
+                data="\n".join(data_lines),
+                event=event_type or "message",
+                id=event_id
+            )
+            data_lines.clear()
+            event_type = None
+            return event
+
+        if line.startswith(b":"):
+            return None  # Comment / keep-alive
+
+        field, _, value = line.partition(b":")
+        if value.startswith(b" "):
+            value = value[1:]
+
+        if field == b"data":
+            data_lines.append(value.decode("utf-8"))
+        elif field == b"event":
+            event_type = value.decode("utf-8")
+        elif field == b"id":
+            event_id = value.decode("utf-8")
+        return None
+
+    for chunk in _iter_chunks(stream, chunk_size):
+        pending += chunk
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            event = process(line)
+            if event is not None:
+                yield event
+
+    # Flush a final event that was not terminated by a blank line
+    if pending:
+        # A lone '\r' (CRLF stream missing its last '\n') is itself the blank line
+        event = process(pending)
+        if event is not None:
+            yield event
+    event = process(b"")
+    if event is not None:
+        yield event
+
+
+def read_sse_data(stream, chunk_size: int = DEFAULT_CHUNK_SIZE) -> list:
+    """Read a whole SSE stream and return the data payload of every event"""
+    return [event.data for event in iter_sse_events(stream, chunk_size)]
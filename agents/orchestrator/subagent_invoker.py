@@ -0,0 +1,191 @@
+"""
+Sub-Agent Invoker for the Orchestrator
+Shared, pooled AgentCore client used by every specialist agent tool
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+import traceback
+from typing import Dict, Any, Optional
+
+import boto3
+from botocore.config import Config
+
+from sse_decoder import read_sse_data
+from trip_contract import record_trip_payload
+
+
+class SubAgentInvoker:
+    """Invokes specialist AgentCore runtimes over a shared, tuned boto3 connection pool"""
+
+    def __init__(
+        self,
+        agent_arns: Dict[str, str],
+        region_name: Optional[str] = None,
+        max_pool_connections: int = 50,
+        connect_timeout: int = 10,
+        default_timeout: int = 120,
+        timeouts: Optional[Dict[str, int]] = None
+    ):
+        """
+        Initialize the invoker
+
+        Args:
+            agent_arns: Mapping of agent name (e.g. 'flight') to AgentCore runtime ARN
+            region_name: AWS region (defaults to AWS_REGION or us-west-2)
+            max_pool_connections: Size of the HTTP connection pool shared by concurrent calls
+            connect_timeout: TCP/TLS connect timeout in seconds
+            default_timeout: Read timeout in seconds for agents without an explicit timeout
+            timeouts: Optional per-agent read timeouts in seconds
+        """
+        self.agent_arns = dict(agent_arns)
+        self.region_name = region_name or os.getenv('AWS_REGION', 'us-west-2')
+        self.max_pool_connections = max_pool_connections
+        self.connect_timeout = connect_timeout
+        self.default_timeout = default_timeout
+        self.timeouts = dict(timeouts or {})
+
+        # One client per distinct read timeout; in practice this is one or two clients
+        self._clients = {}
+        self._metrics = {}
+        self._usage = {}
+        self._lock = threading.Lock()
+
+    def _get_client(self, read_timeout: int):
+        """Get or create the pooled client for a read timeout"""
+        with self._lock:
+            client = self._clients.get(read_timeout)
+            if client is None:
+                config = Config(
+                    max_pool_connections=self.max_pool_connections,
+                    tcp_keepalive=True,
+                    connect_timeout=self.connect_timeout,
+                    read_timeout=read_timeout,
+                    retries={'max_attempts': 0}  # Sub-agent calls are slow; don't silently repeat them
+                )
+                client = boto3.client(
+                    'bedrock-agentcore',
+                    region_name=self.region_name,
+                    config=config,
+                    endpoint_url=os.getenv('AGENTCORE_ENDPOINT_URL')  # e.g. the local mock in mock_services.py
+                )
+                self._clients[read_timeout] = client
+            return client
+
+    def _record(self, agent_name: str, elapsed: float, success: bool):
+        """Record latency for one call"""
+        with self._lock:
+            stats = self._metrics.setdefault(agent_name, {
+                "calls": 0,
+                "errors": 0,
+                "total_seconds": 0.0,
+                "max_seconds": 0.0,
+                "last_seconds": 0.0
+            })
+            stats["calls"] += 1
+            if not success:
+                stats["errors"] += 1
+            stats["total_seconds"] += elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+            stats["last_seconds"] = elapsed
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-agent latency and token metrics
+
+        Returns:
+            Dict mapping agent name to calls, errors, average/max/last latency in seconds
+            and, once the agent has reported any, its total token usage
+        """
+        with self._lock:
+            metrics = {}
+            for agent_name, stats in self._metrics.items():
+                metrics[agent_name] = {
+                    "calls": stats["calls"],
+                    "errors": stats["errors"],
+                    "avg_seconds": round(stats["total_seconds"] / stats["calls"], 3),
+                    "max_seconds": round(stats["max_seconds"], 3),
+                    "last_seconds": round(stats["last_seconds"], 3)
+                }
+                if agent_name in self._usage:
+                    metrics[agent_name]["usage"] = dict(self._usage[agent_name])
+            return metrics
+
+    def invoke(
+        self,
+        agent_name: str,
+        request: str,
+        action: str = "calling agent",
+        extra_payload: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Invoke a specialist agent and return its response text
+
+        Args:
+            agent_name: Name of the agent in agent_arns (e.g. 'flight', 'hotel')
+            request: Natural language request for the agent
+            action: Short description used in error messages (e.g. 'searching flights')
+            extra_payload: Optional extra fields sent alongside the prompt (e.g. a structured search)
+
+        Returns:
+            The agent's response, or an error message if the call failed
+        """
+        started = time.perf_counter()
+        try:
+            response = self._get_client(self.timeouts.get(agent_name, self.default_timeout)).invoke_agent_runtime(
+                agentRuntimeArn=self.agent_arns[agent_name],
+                runtimeSessionId=str(uuid.uuid4()),  # Session ID must be 33+ chars
+                payload=json.dumps({"prompt": request, **(extra_payload or {})}).encode()
+            )
+            result = self._take_trip_data(agent_name, self._read_response(response))
+            self._record(agent_name, time.perf_counter() - started, True)
+            return result
+        except Exception as e:
+            self._record(agent_name, time.perf_counter() - started, False)
+            print(f"Error {action}: {traceback.format_exc()}")
+            return f"Error {action}: {str(e)}"
+
+    def _read_response(self, response: Dict[str, Any]) -> str:
+        """Read a streaming or JSON AgentCore response into a string"""
+        content_type = response.get("contentType", "")
+        if "text/event-stream" in content_type:
+            return "\n".join(read_sse_data(response["response"]))
+        elif content_type == "application/json":
+            content = []
+            for chunk in response.get("response", []):
+                content.append(chunk.decode('utf-8'))
+            return ''.join(content)
+        else:
+            return str(response)
+
+    def _take_trip_data(self, agent_name: str, result: str) -> str:
+        """
+        Record the structured 'data' payload and token 'usage' of a JSON agent response
+        and drop them from the text
+
+        The orchestrator model only needs the prose; the payload goes to the
+        current trip data collector (if any) and on to the frontend, the usage
+        into the per-agent metrics.
+        """
+        try:
+            body = json.loads(result)
+        except ValueError:
+            return result
+        if not isinstance(body, dict) or not ("data" in body or "usage" in body):
+            return result
+        if "data" in body:
+            record_trip_payload(body.pop("data"))
+        if isinstance(body.get("usage"), dict):
+            self._record_usage(agent_name, body.pop("usage"))
+        return json.dumps(body)
+
+    def _record_usage(self, agent_name: str, usage: Dict[str, Any]):
+        """Add a sub-agent's reported token usage (including prompt cache reads/writes) to its metrics"""
+        with self._lock:
+            totals = self._usage.setdefault(agent_name, {})
+            for key, value in usage.items():
+                if isinstance(value, (int, float)):
+                    totals[key] = totals.get(key, 0) + value
@@ -0,0 +1,314 @@
+"""
+Trip Data Contract
+Versioned pydantic models that specialist agents return next to their prose,
+and the per-request collector the runtimes use to gather them
+
+Kept identical in every agent directory, because each runtime is deployed
+from its own directory. The frontend imports the orchestrator copy.
+"""
+
+import re
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+
+# Bump the minor version for additive changes; consumers ignore payloads with another major version
+CONTRACT_VERSION = "1.2"
+
+
+class FlightLeg(BaseModel):
+    """One direction of a flight offer"""
+    departure_airport: str
+    arrival_airport: str
+    departure_time: Optional[str] = None  # Local ISO 8601 date-time
+    arrival_time: Optional[str] = None
+    duration_minutes: Optional[int] = None
+    stops: int = 0
+    stop_airports: List[str] = Field(default_factory=list)
+    flight_numbers: List[str] = Field(default_factory=list)
+
+
+class FlightOffer(BaseModel):
+    """A priced flight offer"""
+    offer_id: Optional[str] = None
+    airline: str
+    price_total: float  # For all adults
+    currency: str = "USD"
+    adults: int = 1
+    cabin_class: str = "ECONOMY"
+    seats_available: Optional[int] = None
+    outbound: FlightLeg
+    inbound: Optional[FlightLeg] = None
+
+    @property
+    def price_per_person(self) -> float:
+        return round(self.price_total / max(self.adults, 1), 2)
+
+
+class HotelOffer(BaseModel):
+    """A hotel, priced when the search included dates"""
+    hotel_id: Optional[str] = None
+    name: str
+    city: str
+    stars: Optional[int] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    distance_to_haram_m: Optional[int] = None
+    check_in: Optional[str] = None
+    check_out: Optional[str] = None
+    nights: Optional[int] = None
+    price_total: Optional[float] = None
+    price_per_night: Optional[float] = None
+    currency: str = "USD"
+    room_type: Optional[str] = None
+    amenities: List[str] = Field(default_factory=list)
+
+
+class VisaFacts(BaseModel):
+    """Umrah visa facts for one nationality (and age band, for a group evaluation)"""
+    nationality: str
+    visa_type: str
+    visa_required: bool = True
+    processing_time: Optional[str] = None
+    validity: Optional[str] = None
+    fee: Optional[float] = None
+    currency: str = "USD"
+    required_documents: List[str] = Field(default_factory=list)
+    vaccinations: List[str] = Field(default_factory=list)  # Added in 1.1
+    application_steps: List[str] = Field(default_factory=list)
+    notes: Optional[str] = None
+    age_band: Optional[str] = None  # Added in 1.2
+    travelers: List[str] = Field(default_factory=list)  # Added in 1.2: names of the travelers these facts apply to
+
+
+class ItineraryActivity(BaseModel):
+    """A timed activity within an itinerary day"""
+    time: str
+    description: str
+
+
+class ItineraryDay(BaseModel):
+    """One day of the trip itinerary"""
+    day: int
+    date: Optional[str] = None
+    location: str
+    title: str
+    activities: List[ItineraryActivity] = Field(default_factory=list)
+    notes: Optional[str] = None
+
+
+class TripData(BaseModel):
+    """Structured results of one agent call (or of several merged together)"""
+    version: str = CONTRACT_VERSION
+    flights: List[FlightOffer] = Field(default_factory=list)
+    hotels: List[HotelOffer] = Field(default_factory=list)
+    visa: List[VisaFacts] = Field(default_factory=list)
+    itinerary: List[ItineraryDay] = Field(default_factory=list)
+
+
+def parse_trip_data(payload: Any) -> Optional[TripData]:
+    """
+    Validate a 'data' payload from an agent response
+
+    Returns:
+        TripData, or None if the payload is missing, invalid or from another major version
+    """
+    if not isinstance(payload, dict):
+        return None
+    version = str(payload.get("version", ""))
+    if version.split(".")[0] != CONTRACT_VERSION.split(".")[0]:
+        print(f"Ignoring trip data with unsupported contract version: {version or 'missing'}")
+        return None
+    try:
+        return TripData.model_validate(payload)
+    except ValidationError as e:
+        print(f"Ignoring invalid trip data: {e}")
+        return None
+
+
+class TripDataCollector:
+    """Thread-safe accumulator for the structured results produced while handling one request"""
+
+    def __init__(self):
+        self.data = TripData()
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        flights: Iterable[FlightOffer] = (),
+        hotels: Iterable[HotelOffer] = (),
+        visa: Iterable[VisaFacts] = (),
+        itinerary: Iterable[ItineraryDay] = ()
+    ):
+        with self._lock:
+            self.data.flights.extend(flights)
+            self.data.hotels.extend(hotels)
+            self.data.visa.extend(visa)
+            self.data.itinerary.extend(itinerary)
+
+    def add_payload(self, payload: Any):
+        """Merge a 'data' payload returned by another agent"""
+        data = parse_trip_data(payload)
+        if data is not None:
+            self.add(data.flights, data.hotels, data.visa, data.itinerary)
+
+    def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Call fn with this collector as the current one (e.g. in a worker thread)"""
+        def run_with_collector():
+            _current_collector.set(self)
+            return fn(*args, **kwargs)
+        return contextvars.copy_context().run(run_with_collector)
+
+    def dump(self) -> Dict[str, Any]:
+        with self._lock:
+            return self.data.model_dump()
+
+
+_current_collector: contextvars.ContextVar[Optional[TripDataCollector]] = contextvars.ContextVar(
+    "trip_data_collector", default=None
+)
+
+
+@contextmanager
+def collect_trip_data() -> Iterator[TripDataCollector]:
+    """Collect the trip data recorded by tools called inside the with block"""
+    collector = TripDataCollector()
+    token = _current_collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _current_collector.reset(token)
+
+
+def start_collecting() -> TripDataCollector:
+    """Make a new collector current for the rest of this context (for async generators)"""
+    collector = TripDataCollector()
+    _current_collector.set(collector)
+    return collector
+
+
+def record_trip_data(**items: Iterable[BaseModel]):
+    """Record structured results from a tool; a no-op outside collect_trip_data()"""
+    collector = _current_collector.get()
+    if collector is not None:
+        collector.add(**items)
+
+
+def record_trip_payload(payload: Any):
+    """Record a 'data' payload returned by another agent; a no-op outside collect_trip_data()"""
+    collector = _current_collector.get()
+    if collector is not None:
+        collector.add_payload(payload)
+
+
+def parse_iso_duration(duration: Optional[str]) -> Optional[int]:
+    """Convert an ISO 8601 duration such as 'PT13H25M' to minutes"""
+    match = re.fullmatch(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?)?", duration or "")
+    if not match or not any(match.groups()):
+        return None
+    days, hours, minutes = (int(value or 0) for value in match.groups())
+    return days * 1440 + hours * 60 + minutes
+
+
+def _flight_leg(itinerary: Dict[str, Any]) -> Optional[FlightLeg]:
+    segments = itinerary.get("segments", [])
+    if not segments:
+        return None
+    return FlightLeg(
+        departure_airport=segments[0].get("departure", {}).get("iataCode", ""),
+        arrival_airport=segments[-1].get("arrival", {}).get("iataCode", ""),
+        departure_time=segments[0].get("departure", {}).get("at"),
+        arrival_time=segments[-1].get("arrival", {}).get("at"),
+        duration_minutes=parse_iso_duration(itinerary.get("duration")),
+        stops=len(segments) - 1,
+        stop_airports=[segment.get("arrival", {}).get("iataCode", "") for segment in segments[:-1]],
+        flight_numbers=[f"{segment.get('carrierCode', '')}{segment.get('number', '')}" for segment in segments]
+    )
+
+
+def flight_offers_from_amadeus(response: Any, adults: int = 1) -> List[FlightOffer]:
+    """Convert an Amadeus flight-offers response ({"data": [...], "dictionaries": {...}}) to FlightOffers"""
+    if not isinstance(response, dict):
+        return []
+
+    carriers = response.get("dictionaries", {}).get("carriers", {})
+    offers = []
+    for offer in response.get("data") or []:
+        try:
+            itineraries = offer.get("itineraries", [])
+            outbound = _flight_leg(itineraries[0]) if itineraries else None
+            price = offer.get("price", {})
+            if outbound is None:
+                continue
+            carrier = (offer.get("validatingAirlineCodes") or [None])[0] or outbound.flight_numbers[0][:2]
+            fare_details = (offer.get("travelerPricings") or [{}])[0].get("fareDetailsBySegment") or [{}]
+            offers.append(FlightOffer(
+                offer_id=offer.get("id"),
+                airline=carriers[carrier].title() if carrier in carriers else carrier,
+                price_total=float(price.get("grandTotal") or price.get("total")),
+                currency=price.get("currency", "USD"),
+                adults=adults,
+                cabin_class=fare_details[0].get("cabin", "ECONOMY"),
+                seats_available=offer.get("numberOfBookableSeats"),
+                outbound=outbound,
+                inbound=_flight_leg(itineraries[1]) if len(itineraries) > 1 else None
+            ))
+        except (TypeError, ValueError, ValidationError) as e:
+            print(f"Skipping unparseable flight offer: {e}")
+    return offers
+
+
+def hotel_offers_from_amadeus(
+    response: Any,
+    city: str,
+    limit: Optional[int] = None,
+    distance_from_haram: bool = True
+) -> List[HotelOffer]:
+    """
+    Convert an Amadeus hotel list ({"data": [{"hotelId", "name", "distance", ...}]}) or
+    hotel-offers response ({"data": [{"hotel": {...}, "offers": [...]}]}) to HotelOffers
+
+    Amadeus measures "distance" from the point searched around. Pass
+    distance_from_haram=False for a search that was not centred on the Haram
+    (e.g. by city code), so distance_to_haram_m stays unknown.
+    """
+    if not isinstance(response, dict):
+        return []
+
+    hotels = []
+    for item in (response.get("data") or [])[:limit]:
+        try:
+            hotel = item.get("hotel", item)
+            offer = (item.get("offers") or [None])[0]
+            distance = item.get("distance") or hotel.get("distance") or {}
+            distance_m = None
+            if distance_from_haram and distance.get("value") is not None:
+                factor = {"KM": 1000, "MILE": 1609, "M": 1}.get(str(distance.get("unit", "KM")).upper(), 1000)
+                distance_m = int(float(distance["value"]) * factor)
+            geo = hotel.get("geoCode", {})
+
+            hotel_offer = HotelOffer(
+                hotel_id=hotel.get("hotelId"),
+                name=str(hotel.get("name", "Unknown Hotel")).title(),
+                city=city,
+                stars=int(hotel["rating"]) if str(hotel.get("rating", "")).isdigit() else None,
+                latitude=hotel.get("latitude", geo.get("latitude")),
+                longitude=hotel.get("longitude", geo.get("longitude")),
+                distance_to_haram_m=distance_m,
+                amenities=hotel.get("amenities", [])
+            )
+            if offer:
+                price = offer.get("price", {})
+                hotel_offer.check_in = offer.get("checkInDate")
+                hotel_offer.check_out = offer.get("checkOutDate")
+                hotel_offer.price_total = float(price["total"]) if price.get("total") else None
+                hotel_offer.currency = price.get("currency", "USD")
+                hotel_offer.room_type = offer.get("room", {}).get("typeEstimated", {}).get("category")
+            hotels.append(hotel_offer)
+        except (TypeError, ValueError, ValidationError) as e:
+            print(f"Skipping unparseable hotel: {e}")
+    return hotels
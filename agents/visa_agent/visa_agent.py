@@ -6,6 +6,8 @@ from strands_agents import Agent, Task, Crew
 from typing import Dict, List, Any
 import os
 
+from visa_rules import get_visa_rules
+
 
 class VisaAgent:
     """Specialized agent for visa requirements and processing"""
@@ -39,40 +41,28 @@ class VisaAgent:
             List of visa requirements for each traveler
         """
         
-        task = Task(
-            description=f"""
-            Check visa requirements for these travelers:
-            {travelers}
-            
-            For each traveler, determine:
-            1. Visa type required (Umrah visa, eVisa, visa on arrival, etc.)
-            2. Processing time and validity period
-            3. Required documents
-            4. Application procedure (online, embassy, etc.)
-            5. Visa fees
-            6. Special requirements based on nationality
-            7. Vaccination requirements (Meningitis, COVID-19, etc.)
-            
-            Provide detailed, accurate information for each traveler.
-            
-            Return as structured JSON array with complete visa information.
-            """,
-            agent=self.agent,
-            expected_output="JSON array of visa requirements for each traveler"
-        )
-        
-        crew = Crew(agents=[self.agent], tasks=[task])
-        result = crew.kickoff()
-        
-        return result
+        # One evaluation per nationality and age band, fanned back out to the travelers
+        groups, assignment = get_visa_rules().evaluate_travelers(travelers)
+        return [
+            {"name": traveler.get("name"), **groups[group].model_dump(exclude={"travelers"})}
+            for traveler, group in zip(travelers, assignment)
+        ]
     
     def create_application_guide(self, visa_requirements: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Create step-by-step visa application guide"""
         
+        # Travelers with the same nationality and age band share requirements; describe each set once
+        unique_requirements = list({
+            (requirement.get("nationality"), requirement.get("age_band")): {
+                key: value for key, value in requirement.items() if key != "name"
+            }
+            for requirement in visa_requirements
+        }.values())
+        
         task = Task(
             description=f"""
             Create a comprehensive visa application guide based on these requirements:
-            {visa_requirements}
+            {unique_requirements}
             
             Provide:
             1. Step-by-step application process
@@ -0,0 +1,272 @@
+"""
+Visa Rules
+Versioned, data-driven Umrah visa requirements by nationality
+
+The table lives in visa_rules.json (or VISA_RULES_PATH). Each country entry
+names a profile (citizen, gcc, evisa, umrah_agent) and may override any of its
+fields or add extra vaccinations. Rules are resolved once at load time, so a
+lookup by ISO 3166-1 alpha-2 code or by name is a dict access.
+
+Age bands (infant, child, adult, senior) adjust documents and vaccinations.
+evaluate_travelers() groups a traveler list by nationality and age band and
+evaluates each group once, so a 20-person group of one nationality costs one
+lookup per band, not twenty.
+
+The frontend imports this module as agents.visa_agent.visa_rules to price the
+visa part of a plan from the same table.
+"""
+
+import os
+import re
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+try:
+    from trip_contract import VisaFacts
+except ImportError:  # Imported by the frontend as agents.visa_agent.visa_rules
+    from .trip_contract import VisaFacts
+
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "visa_rules.json")
+
+
+class VisaRule(BaseModel):
+    """Resolved visa requirements for one nationality"""
+    country_code: Optional[str] = None  # None for the default rule
+    country_name: str
+    profile: str
+    visa_type: str
+    visa_required: bool = True
+    fee: Optional[float] = None
+    currency: str = "SAR"
+    processing_time: Optional[str] = None
+    validity: Optional[str] = None
+    max_stay: Optional[str] = None
+    required_documents: List[str] = Field(default_factory=list)
+    vaccinations: List[str] = Field(default_factory=list)
+    recommended_vaccinations: List[str] = Field(default_factory=list)
+    application_steps: List[str] = Field(default_factory=list)
+    notes: Optional[str] = None
+
+    age_band: Optional[str] = None  # None for a rule not adjusted to an age band
+
+    def to_facts(self, nationality: Optional[str] = None, travelers: Optional[List[str]] = None) -> VisaFacts:
+        """Convert to the trip data contract, labelled with the traveler's nationality as given"""
+        return VisaFacts(
+            nationality=nationality or self.country_name,
+            visa_type=self.visa_type,
+            visa_required=self.visa_required,
+            processing_time=self.processing_time,
+            validity=self.validity,
+            fee=self.fee,
+            currency=self.currency,
+            required_documents=self.required_documents,
+            vaccinations=self.vaccinations,
+            application_steps=self.application_steps,
+            notes=self.notes,
+            age_band=self.age_band,
+            travelers=travelers or []
+        )
+
+
+class VisaRulesTable:
+    """Visa rules indexed by country code and by lower-cased name or alias"""
+
+    def __init__(self, table: Dict[str, Any]):
+        """
+        Args:
+            table: Parsed visa_rules.json
+        """
+        self.version = str(table["version"])
+        self.effective_date = table.get("effective_date")
+        self.sar_per_usd = float(table.get("sar_per_usd", 3.75))
+
+        common = table.get("common", {})
+        profiles = table["profiles"]
+
+        def resolve(code: Optional[str], entry: Dict[str, Any]) -> VisaRule:
+            fields = {**profiles[entry["profile"]]}
+            fields.update({key: value for key, value in entry.items() if key in VisaRule.model_fields and key != "profile"})
+            fields["vaccinations"] = (
+                fields.get("vaccinations", common.get("vaccinations", [])) + entry.get("extra_vaccinations", [])
+            )
+            fields.setdefault("recommended_vaccinations", common.get("recommended_vaccinations", []))
+            fields["application_steps"] = fields.get("application_steps", []) + common.get("final_steps", [])
+            return VisaRule(country_code=code, country_name=entry["name"], profile=entry["profile"], **fields)
+
+        self.rules: Dict[str, VisaRule] = {}
+        self._by_name: Dict[str, str] = {}
+        text_aliases: List[Tuple[str, str]] = []
+        for code, entry in table["countries"].items():
+            code = code.upper()
+            self.rules[code] = resolve(code, entry)
+            for name in [entry["name"], *entry.get("aliases", [])]:
+                self._by_name[name.lower()] = code
+            text_aliases += [(alias, code) for alias in entry.get("text_aliases", [entry["name"], *entry.get("aliases", [])])]
+        self.default_rule = resolve(None, table["default"])
+
+        # Ordered by upper bound; the last band has none
+        self.age_bands: List[Dict[str, Any]] = table.get("age_bands", [{"name": "adult", "under": None}])
+        self._banded: Dict[Tuple[Optional[str], str], VisaRule] = {}
+        self._banded_lock = threading.Lock()
+
+        # Longest aliases first, so 'United States of America' wins over 'America'.
+        # Short aliases (US, UK, UAE, KSA) only match in upper case, never the word 'us'.
+        text_aliases.sort(key=lambda item: len(item[0]), reverse=True)
+        self._text_codes = {alias.lower(): code for alias, code in text_aliases}
+        long_aliases = [re.escape(alias) for alias, _ in text_aliases if len(alias) > 3]
+        short_aliases = [re.escape(alias) for alias, _ in text_aliases if len(alias) <= 3]
+        self._text_pattern = re.compile(
+            rf"\b(?:(?i:{'|'.join(long_aliases)})|{'|'.join(short_aliases)})\b"
+        )
+
+    def get(self, nationality: str) -> Optional[VisaRule]:
+        """
+        Find the rule for a nationality
+
+        Args:
+            nationality: ISO alpha-2 code, country name or alias (e.g. 'GB', 'United Kingdom', 'British')
+
+        Returns:
+            The rule, or None for an unknown nationality
+        """
+        key = (nationality or "").strip()
+        return self.rules.get(key.upper()) or self.rules.get(self._by_name.get(key.lower(), ""))
+
+    def lookup(self, nationality: str) -> VisaRule:
+        """Find the rule for a nationality, falling back to the default rule (e.g. for 'Other')"""
+        return self.get(nationality) or self.default_rule
+
+    def find_in_text(self, text: str) -> List[VisaRule]:
+        """Rules for every nationality mentioned in free text, in order of first mention"""
+        codes = []
+        for match in self._text_pattern.finditer(text or ""):
+            code = self._text_codes[match.group(0).lower()]
+            if code not in codes:
+                codes.append(code)
+        return [self.rules[code] for code in codes]
+
+    def age_band(self, age: Any) -> str:
+        """Name of the age band for an age in years (travelers without a usable age count as adults)"""
+        try:
+            age = float(age)
+        except (TypeError, ValueError):
+            return "adult"
+        for band in self.age_bands:
+            if band.get("under") is None or age < band["under"]:
+                return band["name"]
+        return self.age_bands[-1]["name"]
+
+    def rule_for(self, nationality: str, age_band: str) -> VisaRule:
+        """
+        The rule for a nationality adjusted to an age band
+
+        Args:
+            nationality: ISO alpha-2 code, country name or alias (unknown ones get the default rule)
+            age_band: Band name from age_band()
+
+        Returns:
+            The adjusted rule, built once per (country, band) and reused
+        """
+        rule = self.lookup(nationality)
+        key = (rule.country_code, age_band)
+        with self._banded_lock:
+            if key not in self._banded:
+                band = next((band for band in self.age_bands if band["name"] == age_band), {})
+                exempt = tuple(band.get("exempt_vaccinations", []))
+                self._banded[key] = rule.model_copy(update={
+                    "age_band": age_band,
+                    "required_documents": list(dict.fromkeys(rule.required_documents + band.get("extra_documents", []))),
+                    "vaccinations": [v for v in rule.vaccinations if not v.startswith(exempt)] if exempt else rule.vaccinations,
+                    "recommended_vaccinations": rule.recommended_vaccinations + band.get("extra_recommended_vaccinations", [])
+                })
+            return self._banded[key]
+
+    def evaluate_travelers(self, travelers: List[Dict[str, Any]]) -> Tuple[List[VisaFacts], List[int]]:
+        """
+        Evaluate visa requirements for a traveler list, once per nationality and age band
+
+        Args:
+            travelers: Dicts with 'nationality', and optionally 'name' and 'age'
+
+        Returns:
+            (groups, assignment): one VisaFacts per distinct group, naming its travelers,
+            and for each traveler the index of its group
+        """
+        groups: List[VisaFacts] = []
+        group_index: Dict[Tuple[str, str], int] = {}
+        assignment: List[int] = []
+        for i, traveler in enumerate(travelers, 1):
+            nationality = str(traveler.get("nationality") or "Other")
+            rule = self.lookup(nationality)
+            band = self.age_band(traveler.get("age"))
+            # Unknown nationalities share the default rule but keep their own label
+            key = (rule.country_code or f"?{nationality.strip().lower()}", band)
+            if key not in group_index:
+                label = rule.country_name if rule.country_code else nationality
+                group_index[key] = len(groups)
+                groups.append(self.rule_for(nationality, band).to_facts(label))
+            group = group_index[key]
+            groups[group].travelers.append(traveler.get("name") or f"Traveler {i}")
+            assignment.append(group)
+        return groups, assignment
+
+    def fee_in(self, rule: VisaRule, currency: str) -> Tuple[float, str]:
+        """
+        A rule's fee in the requested currency
+
+        SAR is pegged to USD, so only those two are converted; any other currency
+        gets the fee in USD.
+
+        Returns:
+            (amount, currency)
+        """
+        fee = rule.fee or 0.0
+        currency = (currency or "USD").upper()
+        if currency == rule.currency:
+            return fee, currency
+        usd = fee / self.sar_per_usd if rule.currency == "SAR" else fee
+        if currency == "SAR":
+            return round(usd * self.sar_per_usd, 2), "SAR"
+        return round(usd, 2), "USD"
+
+
+def describe_rule(rule: VisaRule, nationality: Optional[str] = None, travelers: Optional[List[str]] = None) -> str:
+    """Markdown summary of one rule, as the visa agent would write it"""
+    band = f" ({rule.age_band})" if rule.age_band else ""
+    lines = [f"## {nationality or rule.country_name}{band}: {rule.visa_type}"]
+    if travelers:
+        lines.append(f"- **Applies to:** {', '.join(travelers)}")
+    if rule.visa_required:
+        lines.append(f"- **Fee:** {rule.currency} {rule.fee:,.0f}" if rule.fee is not None else "- **Fee:** See notes")
+        lines.append(f"- **Processing time:** {rule.processing_time}")
+        lines.append(f"- **Validity:** {rule.validity}" + (f" (stay up to {rule.max_stay})" if rule.max_stay else ""))
+    if rule.required_documents:
+        lines.append("- **Required documents:** " + "; ".join(rule.required_documents))
+    if rule.vaccinations:
+        lines.append("- **Required vaccinations:** " + "; ".join(rule.vaccinations))
+    if rule.recommended_vaccinations:
+        lines.append("- **Recommended vaccinations:** " + "; ".join(rule.recommended_vaccinations))
+    if rule.application_steps:
+        lines.append("- **How to apply:**")
+        lines += [f"  {i}. {step}" for i, step in enumerate(rule.application_steps, 1)]
+    if rule.notes:
+        lines.append(f"- **Note:** {rule.notes}")
+    return "\n".join(lines)
+
+
+_visa_rules: Optional[VisaRulesTable] = None
+_visa_rules_lock = threading.Lock()
+
+
+def get_visa_rules() -> VisaRulesTable:
+    """Get the shared visa rules table, loading VISA_RULES_PATH (or visa_rules.json) once"""
+    global _visa_rules
+    with _visa_rules_lock:
+        if _visa_rules is None:
+            with open(os.getenv("VISA_RULES_PATH", DEFAULT_RULES_PATH), encoding="utf-8") as f:
+                _visa_rules = VisaRulesTable(json.load(f))
+        return _visa_rules
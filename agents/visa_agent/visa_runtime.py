@@ -3,17 +3,21 @@ Visa Agent for AgentCore Runtime
 Simplified version for reliable deployment
 """
 
-import os
+from typing import List
+
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
 from strands import Agent
 
+from agent_pool import AgentPool
+from model_provider import create_model, token_usage
+from trip_contract import TripData
+from visa_rules import VisaRule, describe_rule, get_visa_rules
+
+
 # Initialize AgentCore app
 app = BedrockAgentCoreApp()
 
-# Create visa agent
-visa_agent = Agent(
-    model=os.getenv("VISA_AGENT_MODEL", "anthropic.claude-3-5-haiku-20241022-v1:0"),
-    system_prompt="""You are a Visa Requirements Specialist for Umrah trips.
+VISA_AGENT_PROMPT = """You are a Visa Requirements Specialist for Umrah trips.
 
 Your expertise:
 1. Provide visa requirements for Saudi Arabia Umrah visa
@@ -33,6 +37,8 @@ When users ask about visas, gather:
 - Age of travelers
 
 Provide accurate, up-to-date visa information and helpful guidance.
+When a request includes VISA RULES, they come from the maintained visa rules table:
+use their fees, documents, processing times and vaccinations exactly as given.
 
 Note: Umrah visa is typically:
 - Valid for 90 days
@@ -41,7 +47,77 @@ Note: Umrah visa is typically:
 - Requires valid passport (6+ months validity)
 - Requires travel insurance
 - Requires proof of accommodation"""
-)
+
+
+def create_visa_agent() -> Agent:
+    """Create a visa agent; requests take one from visa_agents below"""
+    return Agent(
+        model=create_model("visa_agent", "VISA_AGENT_MODEL", "anthropic.claude-3-5-haiku-20241022-v1:0"),
+        system_prompt=VISA_AGENT_PROMPT
+    )
+
+
+# Each request checks out its own agent, so concurrent requests never share a conversation
+visa_agents = AgentPool(create_visa_agent, name="visa agent")
+
+
+def rules_lookup(nationalities: List[str]) -> dict:
+    """
+    Answer a visa question for known nationalities from the rules table, without an LLM turn
+    
+    Args:
+        nationalities: Country codes, names or aliases (e.g. ['GB', 'Pakistan']); unknown ones get the default rule
+    
+    Returns:
+        Dict with the markdown answer in 'result', the status and the contract data
+    """
+    rules = get_visa_rules()
+    matched = [(nationality, rules.lookup(nationality)) for nationality in dict.fromkeys(nationalities)]
+    if not matched:
+        return {"result": "Cannot look up visa rules: no nationality given.", "status": "error"}
+    
+    return {
+        "result": "\n\n".join(describe_rule(rule, nationality) for nationality, rule in matched),
+        "status": "success",
+        "data": TripData(visa=[rule.to_facts(nationality) for nationality, rule in matched]).model_dump(),
+        "rules_version": rules.version
+    }
+
+
+def group_rules_lookup(travelers: List[dict]) -> dict:
+    """
+    Answer a group's visa question from the rules table, once per nationality and age band
+    
+    Args:
+        travelers: Dicts with 'nationality', and optionally 'name' and 'age' (e.g. the wizard's travelers)
+    
+    Returns:
+        Dict with one markdown section per group in 'result', the status, the contract data
+        (one VisaFacts per group, naming its travelers) and each traveler's group index
+    """
+    if not travelers:
+        return {"result": "Cannot look up visa rules: no travelers given.", "status": "error"}
+    
+    rules = get_visa_rules()
+    groups, assignment = rules.evaluate_travelers(travelers)
+    return {
+        "result": "\n\n".join(
+            describe_rule(rules.rule_for(facts.nationality, facts.age_band), facts.nationality, facts.travelers)
+            for facts in groups
+        ),
+        "status": "success",
+        "data": TripData(visa=groups).model_dump(),
+        "traveler_groups": assignment,
+        "rules_version": rules.version
+    }
+
+
+def grounded_prompt(user_message: str, matched: List[VisaRule]) -> str:
+    """Prepend the table rules for the nationalities a free-form question mentions"""
+    if not matched:
+        return user_message
+    rules = "\n\n".join(describe_rule(rule) for rule in matched)
+    return f"VISA RULES (table version {get_visa_rules().version}):\n{rules}\n\nQUESTION:\n{user_message}"
 
 
 @app.entrypoint
@@ -51,7 +127,17 @@ def invoke(payload, context):
     user_message = payload.get("prompt", "Hello")
     
     try:
-        response = visa_agent(user_message)
+        # Known nationalities are answered from the rules table; the model is never called
+        if payload.get("mode") == "rules_lookup":
+            if payload.get("travelers"):
+                return group_rules_lookup(payload["travelers"])
+            return rules_lookup(payload.get("nationalities") or [])
+        
+        # Free-form questions go to the model, grounded in the table rules for any nationality they name
+        matched = get_visa_rules().find_in_text(user_message)
+        with visa_agents.agent() as visa_agent:
+            response = visa_agent(grounded_prompt(user_message, matched))
+            usage = token_usage(visa_agent)
         
         if hasattr(response, 'message') and 'content' in response.message:
             result_text = response.message['content'][0]['text']
@@ -60,7 +146,9 @@ def invoke(payload, context):
         
         return {
             "result": result_text,
-            "status": "success"
+            "status": "success",
+            "data": TripData(visa=[rule.to_facts() for rule in matched]).model_dump(),
+            "usage": usage
         }
     except Exception as e:
         print(f"Error processing request: {e}")
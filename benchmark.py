@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Load Test Benchmark
+Measures throughput and p50/p95/p99 latency of the flight and hotel tool paths,
+of AgentCoreClient and of the orchestrator -> sub-agent -> gateway pipeline
+against the local mock services (mock_services.py)
+
+Agents run in-process on the scripted model (model_provider.py), replaying
+benchmark_script.json, so the orchestrator scenarios measure framework
+overhead, serialization and concurrency rather than model latency.
+
+Usage:
+    python benchmark.py                                   # All scenarios, caches disabled
+    python benchmark.py --scenario gateway_flights --requests 500 --concurrency 50
+    python benchmark.py --latency-ms 200 --error-rate 0.05 --warm-cache --json
+    python benchmark.py --scenario orchestrator_fanout --model-latency-ms 300 --model-token-ms 10
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import contextlib
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from mock_services import MockServices, add_config_arguments, config_from_arguments
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+AGENT_DIRS = [
+    "agents/flight_agent", "agents/hotel_agent", "agents/visa_agent", "agents/itinerary_agent", "agents/orchestrator"
+]
+
+ORIGINS = ["JFK", "LHR", "CDG", "FRA", "IST", "KUL", "CGK", "KHI", "LAX", "ORD"]
+CACHE_PREFIXES = ["FLIGHT_CACHE", "HOTEL_LIST_CACHE", "HOTEL_OFFER_CACHE"]
+
+
+TRIP_REQUIREMENTS = {
+    "travel_dates": {
+        "departure": "2026-12-01",
+        "return": "2026-12-11",
+        "duration": 10,
+        "departure_airport": "London (LHR)",
+        "arrival_city": "Jeddah (JED)"
+    },
+    "travelers": [
+        {"name": "Traveler 1", "nationality": "United Kingdom", "age": 40},
+        {"name": "Traveler 2", "nationality": "United Kingdom", "age": 38}
+    ],
+    "budget": {"total": 8000, "currency": "USD", "flexibility": "Moderate"},
+    "hotel_preferences": {"makkah": {"star_rating": 4}, "madinah": {"star_rating": 4}},
+    "flight_preferences": {"cabin_class": "Economy", "direct_flights": False},
+    "special_requirements": {}
+}
+
+
+def configure_environment(services: MockServices, args: argparse.Namespace):
+    """Point every client at the mock; must run before the agent modules are imported"""
+    os.environ.update(services.environment())
+    os.environ.setdefault("MODEL_PROVIDER", "scripted")
+    os.environ.setdefault("SCRIPTED_MODEL_SCRIPT", os.path.join(ROOT, "benchmark_script.json"))
+    os.environ["SCRIPTED_MODEL_LATENCY_MS"] = str(args.model_latency_ms)
+    os.environ["SCRIPTED_MODEL_TOKEN_MS"] = str(args.model_token_ms)
+    # boto3 needs credentials to sign requests, even for the mock
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "mock")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "mock")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-west-2")
+    if not args.warm_cache:
+        # A zero TTL expires entries as soon as they are written, so every request reaches the mock
+        for prefix in CACHE_PREFIXES:
+            os.environ[f"{prefix}_TTL"] = "0"
+    for agent_dir in AGENT_DIRS:
+        sys.path.insert(0, os.path.join(ROOT, agent_dir))
+    sys.path.insert(0, os.path.join(ROOT, "frontend"))
+
+
+def request_dates(i: int, repeat_args: bool):
+    """Departure and return dates for request i (the same dates for every request with repeat_args)"""
+    offset = 0 if repeat_args else i
+    departure = date.today() + timedelta(days=30 + offset % 300)
+    return departure.isoformat(), (departure + timedelta(days=10)).isoformat()
+
+
+def build_scenarios(services: MockServices, repeat_args: bool) -> Dict[str, Callable[[int], Any]]:
+    """Scenario name -> function running request i (raises or returns an error dict on failure)"""
+    import flight_runtime
+    import hotel_runtime
+    import visa_runtime
+    import itinerary_runtime
+    import orchestrator_runtime
+    from amadeus_tools import get_amadeus_api
+    from amadeus_hotel_tools import get_amadeus_hotel_api
+    from agentcore_client import AgentCoreClient
+
+    flight_api = get_amadeus_api()
+    hotel_api = get_amadeus_hotel_api()
+    client = AgentCoreClient()
+
+    # Sub-agent invocations reach the mock over boto3 and are answered by the real runtimes
+    for name, runtime in [
+        ("flight_agent", flight_runtime),
+        ("hotel_agent", hotel_runtime),
+        ("visa_agent", visa_runtime),
+        ("itinerary_agent", itinerary_runtime)
+    ]:
+        services.register_runtime(name, runtime.invoke)
+
+    def gateway_flights(i: int):
+        departure, return_date = request_dates(i, repeat_args)
+        return json.loads(flight_runtime.search_flights(ORIGINS[i % len(ORIGINS)], "JED", departure, return_date))
+
+    def gateway_hotels(i: int):
+        check_in, check_out = request_dates(i, repeat_args)
+        return json.loads(hotel_runtime.search_hotels("Makkah" if i % 2 == 0 else "Medina", check_in, check_out))
+
+    def direct_flights(i: int):
+        departure, return_date = request_dates(i, repeat_args)
+        return flight_api.search_flights(ORIGINS[i % len(ORIGINS)], "JED", departure, return_date)
+
+    def direct_hotels(i: int):
+        check_in, check_out = request_dates(i, repeat_args)
+        return hotel_api.search_hotels_near_landmark(21.4225, 39.8262, check_in, check_out)
+
+    def agentcore(i: int):
+        return client.invoke_agent("flight", f"Benchmark request {i}")
+
+    def orchestrator_fanout(i: int):
+        return orchestrator_runtime.invoke({"prompt": f"Plan my Umrah trip ({i})", "requirements": TRIP_REQUIREMENTS}, None)
+
+    def orchestrator_agent(i: int):
+        return orchestrator_runtime.invoke({"prompt": f"Plan a 10-day Umrah trip from London ({i})"}, None)
+
+    return {
+        "gateway_flights": gateway_flights,
+        "gateway_hotels": gateway_hotels,
+        "direct_flights": direct_flights,
+        "direct_hotels": direct_hotels,
+        "agentcore": agentcore,
+        "orchestrator_fanout": orchestrator_fanout,
+        "orchestrator_agent": orchestrator_agent
+    }
+
+
+def is_error(result: Any) -> bool:
+    if not isinstance(result, dict):
+        return False
+    return "error" in result or result.get("status") == "error"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+    if not samples:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(samples) + 0.5)) - 1, 0)
+    return samples[min(rank, len(samples) - 1)]
+
+
+def run_scenario(fn: Callable[[int], Any], requests: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    """
+    Run fn for request indices 0..requests-1 on a thread pool
+
+    Returns:
+        Dict with throughput, latency percentiles (ms) and the error count
+    """
+    def timed(i: int):
+        start = time.perf_counter()
+        try:
+            failed = is_error(fn(i))
+        except Exception:
+            failed = True
+        return (time.perf_counter() - start) * 1000, failed
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        # Warm-up requests open connections and fetch tokens; they use indices past the measured range
+        list(pool.map(timed, range(requests, requests + warmup)))
+
+        start = time.perf_counter()
+        results = list(pool.map(timed, range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": sum(1 for _, failed in results if failed),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies), 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_ms": round(latencies[-1], 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tool paths and AgentCoreClient against the mock services")
+    parser.add_argument("--scenario", action="append", help="Scenario to run (repeatable; default: all)")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent requests")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before each scenario")
+    parser.add_argument("--repeat-args", action="store_true", help="Send identical searches (with --warm-cache, measures cache hits)")
+    parser.add_argument("--warm-cache", action="store_true", help="Keep the offer caches enabled")
+    parser.add_argument("--model-latency-ms", type=float, default=0, help="Scripted model delay before the first token")
+    parser.add_argument("--model-token-ms", type=float, default=0, help="Scripted model delay per output token")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    services = MockServices(config=config_from_arguments(args)).start()
+    try:
+        configure_environment(services, args)
+        scenarios = build_scenarios(services, args.repeat_args)
+        selected = args.scenario or list(scenarios)
+        unknown = [name for name in selected if name not in scenarios]
+        if unknown:
+            parser.error(f"Unknown scenario(s): {', '.join(unknown)}. Choose from {', '.join(scenarios)}")
+
+        results = {}
+        for name in selected:
+            # Agents stream their output and the runtimes log to stdout; keep the report readable
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                results[name] = run_scenario(scenarios[name], args.requests, args.concurrency, args.warmup)
+            if not args.json:
+                r = results[name]
+                print(
+                    f"{name:16} {r['throughput_rps']:8.1f} req/s  p50 {r['p50_ms']:7.1f} ms  "
+                    f"p95 {r['p95_ms']:7.1f} ms  p99 {r['p99_ms']:7.1f} ms  errors {r['errors']}/{r['requests']}"
+                )
+
+        if args.json:
+            print(json.dumps({"mock": services.get_stats(), "scenarios": results}, indent=2))
+        else:
+            print(f"\nMock requests served: {services.get_stats()}")
+    finally:
+        services.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,14 @@ AWS Bedrock AgentCore Client
 Handles communication with deployed agents via AWS SDK
 """
 
+import os
 import boto3
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
 import uuid
 
+from agents.orchestrator.sse_decoder import iter_sse_events, read_sse_data
+
 
 class AgentCoreClient:
     """Client for invoking AgentCore agents via AWS SDK"""
@@ -33,9 +36,20 @@ class AgentCoreClient:
             connect_timeout=10,
             retries={'max_attempts': 0}  # Don't retry, let the agent finish
         )
-        self.client = boto3.client('bedrock-agentcore', region_name=region_name, config=config)
+        self.client = boto3.client(
+            'bedrock-agentcore',
+            region_name=region_name,
+            config=config,
+            endpoint_url=os.getenv('AGENTCORE_ENDPOINT_URL')  # e.g. the local mock in mock_services.py
+        )
     
-    def invoke_agent(self, agent_type: str, prompt: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+    def invoke_agent(
+        self,
+        agent_type: str,
+        prompt: str,
+        session_id: Optional[str] = None,
+        extra_payload: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         Invoke an AgentCore agent via AWS SDK
         
@@ -43,6 +57,7 @@ class AgentCoreClient:
             agent_type: Type of agent ('orchestrator', 'flight', 'hotel', 'visa', 'itinerary')
             prompt: User prompt/query
             session_id: Optional session ID for conversation continuity
+            extra_payload: Optional extra fields sent alongside the prompt (e.g. structured requirements)
             
         Returns:
             Dict containing the agent's response
@@ -55,7 +70,7 @@ class AgentCoreClient:
         
         try:
             # Prepare the payload
-            payload = json.dumps({"prompt": prompt}).encode()
+            payload = json.dumps({"prompt": prompt, **(extra_payload or {})}).encode()
             
             # Invoke the agent
             response = self.client.invoke_agent_runtime(
@@ -67,17 +82,11 @@ class AgentCoreClient:
             # Process the response
             if "text/event-stream" in response.get("contentType", ""):
                 # Handle streaming response
-                content = []
-                for line in response["response"].iter_lines(chunk_size=10):
-                    if line:
-                        line = line.decode("utf-8")
-                        if line.startswith("data: "):
-                            line = line[6:]
-                            content.append(line)
+                content = read_sse_data(response["response"])
                 
                 # Parse the complete response
                 if content:
-                    return json.loads(content[-1])  # Return the last chunk which should be complete
+                    return self._merge_stream_chunks([json.loads(chunk) for chunk in content])
                 else:
                     return {'error': 'No content in streaming response'}
                     
@@ -97,6 +106,101 @@ class AgentCoreClient:
                 'agent_arn': agent_arn
             }
     
+    def _merge_stream_chunks(self, chunks: list) -> Dict[str, Any]:
+        """Combine every chunk of a streamed response into one response dict"""
+        # Streaming agents finish with a 'result' event that holds the complete message
+        for chunk in reversed(chunks):
+            if isinstance(chunk, dict) and chunk.get('type') == 'result':
+                return chunk
+        
+        # Plain text chunks are parts of one answer
+        if all(isinstance(chunk, str) for chunk in chunks):
+            return {'result': ''.join(chunks)}
+        
+        text = ''.join(
+            chunk['data'] for chunk in chunks
+            if isinstance(chunk, dict) and chunk.get('type') == 'text'
+        )
+        if text:
+            return {'result': text}
+        
+        return chunks[-1]
+    
+    def stream_agent(
+        self,
+        agent_type: str,
+        prompt: str,
+        session_id: Optional[str] = None,
+        extra_payload: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Invoke an AgentCore agent in streaming mode
+        
+        Args:
+            agent_type: Type of agent ('orchestrator', 'flight', 'hotel', 'visa', 'itinerary')
+            prompt: User prompt/query
+            session_id: Optional session ID for conversation continuity
+            extra_payload: Optional extra fields sent alongside the prompt
+            
+        Yields:
+            Event dicts as they arrive: {'type': 'status'|'text'|'result'|'error', ...}
+        """
+        if agent_type not in self.AGENT_ARNS:
+            raise ValueError(f"Unknown agent type: {agent_type}. Must be one of {list(self.AGENT_ARNS.keys())}")
+        
+        agent_arn = self.AGENT_ARNS[agent_type]
+        
+        try:
+            payload = json.dumps({"prompt": prompt, "stream": True, **(extra_payload or {})}).encode()
+            
+            response = self.client.invoke_agent_runtime(
+                agentRuntimeArn=agent_arn,
+                runtimeSessionId=session_id or self.session_id,
+                payload=payload
+            )
+            
+            if "text/event-stream" in response.get("contentType", ""):
+                for event in iter_sse_events(response["response"]):
+                    chunk = json.loads(event.data)
+                    if isinstance(chunk, dict) and 'type' in chunk:
+                        yield chunk
+                    elif isinstance(chunk, dict) and 'error' in chunk:
+                        yield {'type': 'error', 'error': chunk['error']}
+                    else:
+                        yield {'type': 'text', 'data': chunk if isinstance(chunk, str) else json.dumps(chunk)}
+            
+            elif response.get("contentType") == "application/json":
+                # Agents without streaming support answer in one piece
+                content = []
+                for chunk in response.get("response", []):
+                    content.append(chunk.decode('utf-8'))
+                yield {'type': 'result', **json.loads(''.join(content))}
+            else:
+                yield {'type': 'error', 'error': 'Unexpected content type', 'response': str(response)}
+                
+        except Exception as e:
+            yield {
+                'type': 'error',
+                'error': str(e),
+                'agent_type': agent_type,
+                'agent_arn': agent_arn
+            }
+    
+    def stream_orchestrator(self, user_requirements: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the orchestrator's trip plan for the given user requirements
+        
+        Yields sub-agent status events and text chunks as they arrive, followed
+        by a final 'result' event (see stream_agent)
+        """
+        prompt = self._format_requirements_prompt(user_requirements)
+        return self.stream_agent(
+            'orchestrator',
+            prompt,
+            session_id=str(uuid.uuid4()),
+            extra_payload={"requirements": user_requirements}
+        )
+    
     def invoke_orchestrator(self, user_requirements: Dict[str, Any]) -> Dict[str, Any]:
         """
         Invoke the orchestrator agent with user requirements
@@ -111,13 +215,37 @@ class AgentCoreClient:
         prompt = self._format_requirements_prompt(user_requirements)
         # Use a new unique session ID for each request to avoid conflicts
         new_session_id = str(uuid.uuid4())
-        return self.invoke_agent('orchestrator', prompt, session_id=new_session_id)
+        # Send the structured requirements too so the orchestrator can call all agents in parallel
+        return self.invoke_agent(
+            'orchestrator',
+            prompt,
+            session_id=new_session_id,
+            extra_payload={"requirements": user_requirements}
+        )
     
     def invoke_flight_agent(self, flight_query: str) -> Dict[str, Any]:
         """Invoke the flight search agent"""
         new_session_id = str(uuid.uuid4())
         return self.invoke_agent('flight', flight_query, session_id=new_session_id)
     
+    def search_flights_structured(self, user_requirements: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Search flights for the wizard's structured requirements without an LLM turn
+        
+        Args:
+            user_requirements: Dictionary containing travel_dates, travelers and flight_preferences
+            
+        Returns:
+            Flight agent response with a short summary and the flight offers in 'data'
+        """
+        new_session_id = str(uuid.uuid4())
+        return self.invoke_agent(
+            'flight',
+            'Structured flight search',
+            session_id=new_session_id,
+            extra_payload={"mode": "structured_search", "requirements": user_requirements}
+        )
+    
     def invoke_hotel_agent(self, hotel_query: str) -> Dict[str, Any]:
         """Invoke the hotel search agent"""
         new_session_id = str(uuid.uuid4())
@@ -19,6 +19,9 @@ from frontend.auth import require_authentication, show_user_menu
 
 # Import AgentCore client for deployed agents
 from frontend.agentcore_client import get_agentcore_client
+from agents.orchestrator.trip_contract import FlightLeg, FlightOffer, HotelOffer, TripData, parse_trip_data
+from agents.orchestrator.package_optimizer import exchange_rate, hotels_by_city, plan_packages
+from agents.visa_agent.visa_rules import get_visa_rules
 
 # Configuration
 USE_AGENTCORE = True  # Set to True to use deployed AgentCore agents, False for demo mode
@@ -542,6 +545,32 @@ def step_budget_requirements():
             st.rerun()
 
 
+# Display names for the agents reported by the orchestrator's progress events
+AGENT_STATUS_LABELS = {
+    'flights': '✈️ Flights',
+    'hotels': '🏨 Hotels',
+    'hotels_makkah': '🕋 Makkah hotels',
+    'hotels_madinah': '🕌 Madinah hotels',
+    'visa': '🛂 Visa',
+    'itinerary': '📅 Itinerary',
+    'synthesis': '🎯 Trip plan'
+}
+
+
+def format_agent_status(agent_states: Dict[str, Dict]) -> str:
+    """Format the latest status event of each agent as a markdown list"""
+    lines = []
+    for name, state in agent_states.items():
+        label = AGENT_STATUS_LABELS.get(name, name)
+        if state['state'] != 'completed':
+            lines.append(f"- {label}: ⏳ working...")
+        elif 'seconds' in state:
+            lines.append(f"- {label}: ✅ done in {state['seconds']}s")
+        else:
+            lines.append(f"- {label}: ✅ done")
+    return '\n'.join(lines)
+
+
 def step_review_generate():
     """Step 5: Review and generate trip plan"""
     st.markdown('<h2 class="step-header">📋 Step 5: Review & Generate Plan</h2>', unsafe_allow_html=True)
@@ -601,29 +630,34 @@ def step_review_generate():
                 try:
                     progress_bar = st.progress(0)
                     status_text = st.empty()
+                    agent_status = st.empty()
+                    plan_preview = st.empty()
                     
                     # Get AgentCore client
                     client = get_agentcore_client()
                     
-                    # Only invoke orchestrator - it will coordinate all other agents
+                    # Stream from the orchestrator - it coordinates all other agents and
+                    # reports each one's progress as it happens
                     status_text.text("🎯 Orchestrator Agent: Coordinating your complete Umrah trip plan...")
-                    status_text.text("⏳ This may take 2-3 minutes as we search real-time flight and hotel data...")
-                    progress_bar.progress(20)
+                    agent_states = {}
+                    streamed_text = ""
+                    orchestrator_response = None
                     
-                    status_text.text("🤖 AI Agents working: Checking visa requirements...")
-                    progress_bar.progress(30)
+                    for event in client.stream_orchestrator(st.session_state.user_data):
+                        if event['type'] == 'status':
+                            agent_states[event['agent']] = event
+                            agent_status.markdown(format_agent_status(agent_states))
+                            completed = sum(1 for state in agent_states.values() if state['state'] == 'completed')
+                            progress_bar.progress(min(95, int(100 * completed / (len(agent_states) + 1))))
+                        elif event['type'] == 'text':
+                            streamed_text += event['data']
+                            status_text.text("✍️ Writing your trip plan...")
+                            plan_preview.markdown(streamed_text)
+                        elif event['type'] in ('result', 'error'):
+                            orchestrator_response = event
                     
-                    status_text.text("✈️ Searching real flights with Amadeus API...")
-                    progress_bar.progress(45)
-                    
-                    status_text.text("🏨 Finding hotels near Haram with Amadeus API...")
-                    progress_bar.progress(60)
-                    
-                    status_text.text("📅 Creating detailed Umrah itinerary...")
-                    progress_bar.progress(75)
-                    
-                    # Single call to orchestrator - it handles everything
-                    orchestrator_response = client.invoke_orchestrator(st.session_state.user_data)
+                    if orchestrator_response is None:
+                        orchestrator_response = {'result': streamed_text}
                     
                     progress_bar.progress(100)
                     status_text.text("✅ Complete trip plan generated successfully!")
@@ -634,7 +668,10 @@ def step_review_generate():
                     }
                     
                     # Generate structured trip plan from AI responses
-                    st.session_state.trip_plan = generate_trip_plan_from_ai(st.session_state.ai_responses)
+                    st.session_state.trip_plan = generate_trip_plan_from_ai(
+                        st.session_state.ai_responses,
+                        orchestrator_response.get('data')
+                    )
                     
                 except Exception as e:
                     st.error(f"❌ Error generating trip plan: {str(e)}")
@@ -707,14 +744,14 @@ def step_trip_options():
     
     # Debug section - show raw AI response and parsed data
     if USE_AGENTCORE and 'ai_insights' in plan and plan['ai_insights'].get('orchestrator_summary'):
-        with st.expander("🔍 Debug: View Raw AI Response & Parsed Data", expanded=False):
+        with st.expander("🔍 Debug: View Raw AI Response & Structured Data", expanded=False):
             st.markdown("### Raw AI Response")
             st.text_area("Orchestrator response:", plan['ai_insights']['orchestrator_summary'], height=300, key="debug_raw")
             
-            st.markdown("### Parsed Flights")
+            st.markdown("### Flights")
             st.json(plan.get('flights', []))
             
-            st.markdown("### Parsed Hotels")
+            st.markdown("### Hotels")
             st.json(plan.get('hotels', {}))
     
     # Show AI-generated comprehensive plan
@@ -767,6 +804,13 @@ def step_trip_options():
             st.metric("Status", "⏳ Select options")
     st.markdown('</div>', unsafe_allow_html=True)
     
+    if plan.get('packages'):
+        with st.expander("💡 Best-Value Packages (listed first in each tab)", expanded=False):
+            st.caption("Every flight and hotel combination compared on total cost, journey time, distance to the Haram and stars")
+            st.table(plan['packages'])
+    elif plan.get('packages_message'):
+        st.info(f"💡 {plan['packages_message']}")
+    
     # Tabs for different sections
     tab1, tab2, tab3, tab4, tab5 = st.tabs(["✈️ Flights", "🏨 Hotels", "🛂 Visa", "📅 Itinerary", "💳 Booking"])
     
@@ -786,6 +830,13 @@ def step_trip_options():
         display_booking_section(plan)
 
 
+def format_price(currency: str, amount) -> str:
+    """Format an amount for display; hotels found without dates have no price yet"""
+    if amount is None:
+        return "Price on request"
+    return f"{currency} {amount:,}"
+
+
 def display_flight_options(flights):
     """Display flight options with interactive selection and beautiful styling"""
     st.markdown("### ✈️ Select Your Preferred Flight")
@@ -1023,7 +1074,7 @@ def display_hotel_options(hotels):
                 
                 with col_content:
                     card_class = "hotel-card-selected" if is_selected else "hotel-card"
-                    stars = "⭐" * hotel['stars']
+                    stars = "⭐" * (hotel['stars'] or 0)
                     
                     st.markdown(f"""
                     <div class="{card_class}">
@@ -1031,11 +1082,11 @@ def display_hotel_options(hotels):
                         <div class="hotel-stars">{stars}</div>
                         <div class="hotel-distance">📍 {hotel['distance']}</div>
                         <div style="margin: 10px 0;">
-                            <span class="hotel-rating">⭐ {hotel['rating']}/10</span>
+                            <span class="hotel-rating">⭐ {hotel['rating'] or '-'}/10</span>
                         </div>
-                        <div class="hotel-price">{hotel['currency']} {hotel['price_per_night']}/night</div>
+                        <div class="hotel-price">{format_price(hotel['currency'], hotel['price_per_night'])}/night</div>
                         <div style="font-size: 14px; color: #666; margin-top: 5px;">
-                            Total: {hotel['currency']} {hotel['total_price']:,}
+                            Total: {format_price(hotel['currency'], hotel['total_price'])}
                         </div>
                     </div>
                     """, unsafe_allow_html=True)
@@ -1043,8 +1094,8 @@ def display_hotel_options(hotels):
                     # Amenities in expander
                     with st.expander("🎯 Amenities & Details", expanded=False):
                         st.markdown(f"**✨ Amenities:** {', '.join(hotel['amenities'])}")
-                        st.markdown(f"**💰 Price per night:** {hotel['currency']} {hotel['price_per_night']}")
-                        st.markdown(f"**💵 Total cost:** {hotel['currency']} {hotel['total_price']:,}")
+                        st.markdown(f"**💰 Price per night:** {format_price(hotel['currency'], hotel['price_per_night'])}")
+                        st.markdown(f"**💵 Total cost:** {format_price(hotel['currency'], hotel['total_price'])}")
                 
                 if is_selected:
                     st.success(f"✅ {hotel['name']} selected!")
@@ -1075,7 +1126,7 @@ def display_hotel_options(hotels):
                 
                 with col_content:
                     card_class = "hotel-card-selected" if is_selected else "hotel-card"
-                    stars = "⭐" * hotel['stars']
+                    stars = "⭐" * (hotel['stars'] or 0)
                     
                     st.markdown(f"""
                     <div class="{card_class}">
@@ -1083,11 +1134,11 @@ def display_hotel_options(hotels):
                         <div class="hotel-stars">{stars}</div>
                         <div class="hotel-distance">📍 {hotel['distance']}</div>
                         <div style="margin: 10px 0;">
-                            <span class="hotel-rating">⭐ {hotel['rating']}/10</span>
+                            <span class="hotel-rating">⭐ {hotel['rating'] or '-'}/10</span>
                         </div>
-                        <div class="hotel-price">{hotel['currency']} {hotel['price_per_night']}/night</div>
+                        <div class="hotel-price">{format_price(hotel['currency'], hotel['price_per_night'])}/night</div>
                         <div style="font-size: 14px; color: #666; margin-top: 5px;">
-                            Total: {hotel['currency']} {hotel['total_price']:,}
+                            Total: {format_price(hotel['currency'], hotel['total_price'])}
                         </div>
                     </div>
                     """, unsafe_allow_html=True)
@@ -1095,8 +1146,8 @@ def display_hotel_options(hotels):
                     # Amenities in expander
                     with st.expander("🎯 Amenities & Details", expanded=False):
                         st.markdown(f"**✨ Amenities:** {', '.join(hotel['amenities'])}")
-                        st.markdown(f"**💰 Price per night:** {hotel['currency']} {hotel['price_per_night']}")
-                        st.markdown(f"**💵 Total cost:** {hotel['currency']} {hotel['total_price']:,}")
+                        st.markdown(f"**💰 Price per night:** {format_price(hotel['currency'], hotel['price_per_night'])}")
+                        st.markdown(f"**💵 Total cost:** {format_price(hotel['currency'], hotel['total_price'])}")
                 
                 if is_selected:
                     st.success(f"✅ {hotel['name']} selected!")
@@ -1109,9 +1160,9 @@ def display_hotel_options(hotels):
         
         col1, col2 = st.columns(2)
         with col1:
-            st.info(f"🕋 **Makkah:** {makkah_hotel['name']} - {makkah_hotel['currency']} {makkah_hotel['total_price']:,}")
+            st.info(f"🕋 **Makkah:** {makkah_hotel['name']} - {format_price(makkah_hotel['currency'], makkah_hotel['total_price'])}")
         with col2:
-            st.info(f"🕌 **Madinah:** {madinah_hotel['name']} - {madinah_hotel['currency']} {madinah_hotel['total_price']:,}")
+            st.info(f"🕌 **Madinah:** {madinah_hotel['name']} - {format_price(madinah_hotel['currency'], madinah_hotel['total_price'])}")
 
 
 def display_visa_info(visa):
@@ -1129,11 +1180,17 @@ def display_visa_info(visa):
             for doc in traveler_visa['required_documents']:
                 st.write(f"- {doc}")
             
+            if traveler_visa.get('vaccinations'):
+                st.markdown("**Required Vaccinations:**")
+                for vaccination in traveler_visa['vaccinations']:
+                    st.write(f"- {vaccination}")
+            
             st.markdown("**Application Steps:**")
             for step in traveler_visa['application_steps']:
                 st.write(f"{step}")
     
-    st.info(f"💰 **Total Visa Cost:** {visa['currency']} {visa['total_cost']:,}")
+    total = " + ".join(format_price(currency, amount) for currency, amount in visa['fees'].items())
+    st.info(f"💰 **Total Visa Cost:** {total or 'None'}")
 
 
 def display_itinerary(itinerary):
@@ -1177,8 +1234,8 @@ def display_booking_section(plan):
         if st.session_state.selected_makkah_hotel is not None:
             hotel = plan['hotels']['makkah'][st.session_state.selected_makkah_hotel]
             st.write(f"**{hotel['name']}**")
-            st.write(f"{hotel['stars']}⭐ - {hotel['distance']}")
-            st.write(f"Total: {hotel['currency']} {hotel['total_price']:,}")
+            st.write(f"{'⭐' * (hotel['stars'] or 0) or '-'} - {hotel['distance']}")
+            st.write(f"Total: {format_price(hotel['currency'], hotel['total_price'])}")
         else:
             st.warning("No Makkah hotel selected")
     
@@ -1187,63 +1244,64 @@ def display_booking_section(plan):
         if st.session_state.selected_madinah_hotel is not None:
             hotel = plan['hotels']['madinah'][st.session_state.selected_madinah_hotel]
             st.write(f"**{hotel['name']}**")
-            st.write(f"{hotel['stars']}⭐ - {hotel['distance']}")
-            st.write(f"Total: {hotel['currency']} {hotel['total_price']:,}")
+            st.write(f"{'⭐' * (hotel['stars'] or 0) or '-'} - {hotel['distance']}")
+            st.write(f"Total: {format_price(hotel['currency'], hotel['total_price'])}")
         else:
             st.warning("No Madinah hotel selected")
     
     st.markdown("---")
     st.markdown("#### 📊 Cost Breakdown")
     
-    # Calculate actual costs based on selections
-    flight_cost = 0
-    if st.session_state.selected_flight is not None:
-        flight_cost = plan['flights'][st.session_state.selected_flight]['price'] * plan['num_travelers']
-    
-    makkah_hotel_cost = 0
-    if st.session_state.selected_makkah_hotel is not None:
-        makkah_hotel_cost = plan['hotels']['makkah'][st.session_state.selected_makkah_hotel]['total_price']
-    
-    madinah_hotel_cost = 0
-    if st.session_state.selected_madinah_hotel is not None:
-        madinah_hotel_cost = plan['hotels']['madinah'][st.session_state.selected_madinah_hotel]['total_price']
-    
-    total_hotel_cost = makkah_hotel_cost + madinah_hotel_cost
-    visa_cost = plan['visa']['total_cost']
+    # Calculate actual costs based on selections, in the plan currency where a fixed rate exists
+    selected_hotels = [
+        plan['hotels'][city][selected] if selected is not None else None
+        for city, selected in (
+            ('makkah', st.session_state.selected_makkah_hotel),
+            ('madinah', st.session_state.selected_madinah_hotel)
+        )
+    ]
+    breakdown = cost_lines(
+        plan['currency'],
+        plan['flights'][st.session_state.selected_flight] if st.session_state.selected_flight is not None else None,
+        selected_hotels,
+        plan['visa']['fees'],
+        plan['num_travelers']
+    )
     service_fee = 100
-    subtotal = flight_cost + total_hotel_cost + visa_cost + service_fee
+    subtotal = round(breakdown['flights'] + breakdown['hotels'] + breakdown['visa'] + service_fee, 2)
     discount = 200 if subtotal > 2000 else 0
-    total = subtotal - discount
-    
-    breakdown = {
-        'currency': plan['currency'],
-        'flights': flight_cost,
-        'hotels': total_hotel_cost,
-        'visa': visa_cost,
+    breakdown.update({
         'service_fee': service_fee,
         'subtotal': subtotal,
         'discount': discount,
-        'total': total
-    }
+        'total': round(subtotal - discount, 2)
+    })
+    lines = [
+        ('flights', f"Flights ({plan['num_travelers']} travelers)", "Flights"),
+        ('hotels', "Hotels (Makkah + Madinah)", "Hotels"),
+        ('visa', f"Visa Fees ({plan['num_travelers']} travelers)", "Visa Fees")
+    ]
     
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        st.write(f"Flights ({plan['num_travelers']} travelers)")
-        st.write(f"Hotels (Makkah + Madinah)")
-        st.write(f"Visa Fees ({plan['num_travelers']} travelers)")
-        st.write(f"Service Fee")
+        for line, label, short_label in lines:
+            st.write(label)
+            for _ in breakdown[f'{line}_separate']:
+                st.write(f"{short_label} (paid separately, not in total)")
+        st.write("Service Fee")
         st.write("---")
-        st.write(f"**Subtotal**")
+        st.write("**Subtotal**")
         if discount > 0:
-            st.write(f"**Discount**")
+            st.write("**Discount**")
         st.write("---")
-        st.markdown(f"### **Total**")
+        st.markdown("### **Total**")
     
     with col2:
-        st.write(f"{breakdown['currency']} {breakdown['flights']:,}")
-        st.write(f"{breakdown['currency']} {breakdown['hotels']:,}")
-        st.write(f"{breakdown['currency']} {breakdown['visa']:,}")
+        for line, _, _ in lines:
+            st.write(f"{breakdown['currency']} {breakdown[line]:,}")
+            for currency, amount in breakdown[f'{line}_separate'].items():
+                st.write(f"{currency} {amount:,}")
         st.write(f"{breakdown['currency']} {breakdown['service_fee']:,}")
         st.write("---")
         st.write(f"{breakdown['currency']} {breakdown['subtotal']:,}")
@@ -1325,236 +1383,191 @@ def display_booking_section(plan):
                 st.download_button("📧 Download Visa Documents", "visa_docs.zip", "application/zip")
 
 
-def parse_flights_from_text(text: str, user_data: Dict) -> List[Dict]:
-    """Parse flight options from AI text response"""
-    import re
-    
-    flights = []
-    
-    # The AI formats flights like:
-    # Option 1 (Morning) - $748.26
-    # - Outbound: MAN 10:50 → JED 00:05 (next day)
-    # - Return: JED 06:40 → MAN 13:05
-    
-    # Find all flight options
-    option_pattern = r'Option\s+(\d+)\s*\(([^)]+)\)\s*-\s*\$?([\d,]+\.?\d*)'
-    options = list(re.finditer(option_pattern, text, re.IGNORECASE))
-    
-    # Also look for airline name (usually mentioned before options)
-    airline_match = re.search(r'through\s+([A-Z][a-zA-Z\s]+(?:Airlines?|Airways?))', text, re.IGNORECASE)
-    base_airline = airline_match.group(1).strip() if airline_match else "Turkish Airlines"
+def format_flight_leg(leg: FlightLeg) -> Dict[str, str]:
+    """Format a contract flight leg for the flight cards"""
+    def at(airport: str, timestamp: Optional[str]) -> str:
+        try:
+            return f"{airport} {datetime.fromisoformat(timestamp).strftime('%d %b %H:%M')}"
+        except (TypeError, ValueError):
+            return airport
+    
+    if leg.duration_minutes is not None:
+        duration = f"{leg.duration_minutes // 60}h {leg.duration_minutes % 60}m"
+    else:
+        duration = "N/A"
     
-    for match in options:
-        option_num = int(match.group(1))
-        time_desc = match.group(2).strip()  # e.g., "Morning", "Evening"
-        price = float(match.group(3).replace(',', ''))
-        
-        # Find the outbound and return info for this option
-        # Look in the text after this match
-        start_pos = match.end()
-        # Find next option or end of section
-        next_match = options[options.index(match) + 1] if options.index(match) + 1 < len(options) else None
-        end_pos = next_match.start() if next_match else start_pos + 500
-        
-        section = text[start_pos:end_pos]
-        
-        # Extract outbound flight
-        outbound_match = re.search(r'Outbound:\s*([A-Z]{3})\s+([\d:]+)\s*→\s*([A-Z]{3})\s+([\d:]+)', section)
-        if outbound_match:
-            dep_airport = outbound_match.group(1)
-            dep_time = outbound_match.group(2)
-            arr_airport = outbound_match.group(3)
-            arr_time = outbound_match.group(4)
-            outbound_str = f"{dep_airport} {dep_time} → {arr_airport} {arr_time}"
-            
-            # Check for "next day" indicator
-            if 'next day' in section[outbound_match.start():outbound_match.end()+20].lower():
-                outbound_str += " +1"
-        else:
-            outbound_str = f"{user_data['travel_dates'].get('departure_airport', 'MAN')} → JED"
-        
-        # Extract return flight
-        return_match = re.search(r'Return:\s*([A-Z]{3})\s+([\d:]+)\s*→\s*([A-Z]{3})\s+([\d:]+)', section)
-        if return_match:
-            dep_airport = return_match.group(1)
-            dep_time = return_match.group(2)
-            arr_airport = return_match.group(3)
-            arr_time = return_match.group(4)
-            return_str = f"{dep_airport} {dep_time} → {arr_airport} {arr_time}"
-        else:
-            return_str = f"JED → {user_data['travel_dates'].get('departure_airport', 'MAN')}"
-        
-        # Calculate duration (rough estimate)
-        duration = "13h 15m"
-        
-        # Determine stops (Turkish Airlines typically has 1 stop)
-        stops = "1 stop (IST)"
-        
-        flight = {
-            'airline': f"{base_airline} ({time_desc})",
-            'price': int(price),
-            'currency': user_data['budget']['currency'],
-            'cabin_class': user_data['flight_preferences']['cabin_class'],
-            'baggage': '2 x 23kg checked bags',
-            'outbound': {
-                'departure': outbound_str,
-                'arrival': '',
-                'duration': duration,
-                'stops': stops
-            },
-            'return': {
-                'departure': return_str,
-                'arrival': '',
-                'duration': duration,
-                'stops': stops
-            }
-        }
-        flights.append(flight)
+    if leg.stops == 0:
+        stops = "Direct"
+    else:
+        stops = f"{leg.stops} stop{'s' if leg.stops > 1 else ''} ({', '.join(leg.stop_airports)})"
     
-    # If no flights parsed, return at least one default
-    if not flights:
+    return {
+        'departure': at(leg.departure_airport, leg.departure_time),
+        'arrival': at(leg.arrival_airport, leg.arrival_time),
+        'duration': duration,
+        'stops': stops
+    }
+
+
+def recommended_first(offers: List, index: Optional[int], key) -> List:
+    """Sort offers by key, with the offer from the recommended package (if any) first"""
+    ordered = sorted(offers, key=key)
+    if index is not None:
+        ordered.remove(offers[index])
+        ordered.insert(0, offers[index])
+    return ordered
+
+
+def flight_cards(offers: List[FlightOffer]) -> List[Dict]:
+    """Build flight cards from contract flight offers"""
+    flights = []
+    for offer in offers[:5]:
         flights.append({
-            'airline': 'Available Flight Option',
-            'price': 850,
-            'currency': user_data['budget']['currency'],
-            'cabin_class': user_data['flight_preferences']['cabin_class'],
-            'baggage': '2 x 23kg checked bags',
-            'outbound': {
-                'departure': f"{user_data['travel_dates'].get('departure_airport', 'Origin')} 10:30 AM",
-                'arrival': f"{user_data['travel_dates']['arrival_city']} 6:45 AM +1",
-                'duration': '12h 30m',
-                'stops': 'Direct'
-            },
-            'return': {
-                'departure': f"{user_data['travel_dates'].get('departure_city', user_data['travel_dates']['arrival_city'])} 11:30 PM",
-                'arrival': f"{user_data['travel_dates'].get('departure_airport', 'Origin')} 6:15 AM +1",
-                'duration': '13h 45m',
-                'stops': 'Direct'
+            'airline': offer.airline,
+            'price': offer.price_per_person,
+            'currency': offer.currency,
+            'cabin_class': offer.cabin_class.replace('_', ' ').title(),
+            'baggage': 'As per fare conditions',
+            'outbound': format_flight_leg(offer.outbound),
+            'return': format_flight_leg(offer.inbound) if offer.inbound else {
+                'departure': 'One-way', 'arrival': '', 'duration': '', 'stops': ''
             }
         })
-    
-    return flights[:5]  # Limit to 5 options
+    return flights
 
 
-def parse_hotels_from_text(text: str, city: str, user_data: Dict) -> List[Dict]:
-    """Parse hotel options from AI text response for a specific city"""
-    import re
-    
+def hotel_distance_key(offer: HotelOffer) -> tuple:
+    """Sort key: closest to the Haram first, hotels without a known distance last"""
+    return (offer.distance_to_haram_m is None, offer.distance_to_haram_m or 0)
+
+
+def hotel_cards(offers: List[HotelOffer]) -> List[Dict]:
+    """Build hotel cards from contract hotel offers"""
     hotels = []
-    city_lower = city.lower()
-    
-    # The AI formats hotels like:
-    # Makkah (March 6-10):
-    # 1. Le Meridien Makkah (380m from Haram)
-    # 2. Pullman Zamzam Makkah (380m from Haram)
-    
-    # Find the city section
-    if 'makkah' in city_lower or 'mecca' in city_lower:
-        section_match = re.search(r'Makkah[^:]*:(.*?)(?:Madinah|DETAILED|RECOMMENDATIONS|$)', text, re.DOTALL | re.IGNORECASE)
-    else:
-        section_match = re.search(r'Madinah[^:]*:(.*?)(?:DETAILED|RECOMMENDATIONS|$)', text, re.DOTALL | re.IGNORECASE)
-    
-    if section_match:
-        section = section_match.group(1)
-        
-        # Find hotel entries: "1. Hotel Name (distance from Haram)"
-        hotel_pattern = r'(\d+)\.\s+([^(]+)\s*\((\d+)m\s+from\s+Haram\)'
-        matches = re.finditer(hotel_pattern, section, re.IGNORECASE)
-        
-        for match in matches:
-            hotel_num = match.group(1)
-            hotel_name = match.group(2).strip()
-            distance_m = int(match.group(3))
-            
-            # Determine star rating based on hotel name
-            stars = 5
-            if 'hilton' in hotel_name.lower() or 'meridien' in hotel_name.lower() or 'pullman' in hotel_name.lower():
-                stars = 5
-            elif 'mövenpick' in hotel_name.lower() or 'moevenpick' in hotel_name.lower():
-                stars = 4
-            elif 'shaza' in hotel_name.lower():
-                stars = 4
-            
-            # Estimate price based on distance and stars
-            if distance_m < 400:
-                base_price = 200 if stars == 5 else 150
-            else:
-                base_price = 180 if stars == 5 else 130
-            
-            # Calculate nights
-            nights = 5 if 'makkah' in city_lower or 'mecca' in city_lower else 3
-            total_price = base_price * nights
-            
-            hotel = {
-                'name': hotel_name,
-                'stars': stars,
-                'distance': f"{distance_m}m from Haram",
-                'price_per_night': base_price,
-                'total_price': total_price,
-                'currency': user_data['budget']['currency'],
-                'amenities': ['WiFi', 'Breakfast', 'Restaurant', 'Elevator', 'Haram View'],
-                'rating': 8.5 + (stars - 3) * 0.5
-            }
-            hotels.append(hotel)
+    for offer in offers[:3]:
+        hotels.append({
+            'name': offer.name,
+            'stars': offer.stars,
+            'distance': (
+                f"{offer.distance_to_haram_m}m from Haram" if offer.distance_to_haram_m is not None
+                else "Distance not available"
+            ),
+            'price_per_night': offer.price_per_night,
+            'total_price': offer.price_total,
+            'currency': offer.currency,
+            'amenities': offer.amenities or ['Not listed'],
+            'rating': None
+        })
+    return hotels
+
+
+def visa_for_travelers(travelers: List[Dict], currency: str) -> List[Dict]:
+    """Build one visa card per traveler from the visa rules table, evaluated once per nationality and age band"""
+    rules = get_visa_rules()
+    groups, assignment = rules.evaluate_travelers(travelers)
+    
+    cards = []
+    for facts in groups:
+        cost, cost_currency = rules.fee_in(rules.rule_for(facts.nationality, facts.age_band), currency)
+        cards.append({
+            'visa_type': facts.visa_type,
+            'processing_time': facts.processing_time or 'N/A',
+            'validity': facts.validity or 'N/A',
+            'cost': cost,
+            'currency': cost_currency,
+            'required_documents': facts.required_documents,
+            'vaccinations': facts.vaccinations,
+            'application_steps': [f"{i}. {step}" for i, step in enumerate(facts.application_steps, 1)]
+        })
     
-    # If no hotels parsed, return defaults
-    if not hotels:
-        if 'makkah' in city_lower or 'mecca' in city_lower:
-            hotels = [
-                {
-                    'name': 'Makkah Hotel Near Haram',
-                    'stars': 5,
-                    'distance': '200m from Haram',
-                    'price_per_night': 180,
-                    'total_price': 900,
-                    'currency': user_data['budget']['currency'],
-                    'amenities': ['WiFi', 'Breakfast', 'Haram View', 'Restaurant'],
-                    'rating': 9.0
-                },
-                {
-                    'name': 'Makkah Budget Hotel',
-                    'stars': 4,
-                    'distance': '400m from Haram',
-                    'price_per_night': 150,
-                    'total_price': 750,
-                    'currency': user_data['budget']['currency'],
-                    'amenities': ['WiFi', 'Breakfast', 'Restaurant'],
-                    'rating': 8.5
-                }
-            ]
+    return [
+        {'name': traveler['name'], 'nationality': traveler['nationality'], **cards[group]}
+        for traveler, group in zip(travelers, assignment)
+    ]
+
+
+def visa_fees_by_currency(visa_travelers: List[Dict]) -> Dict[str, float]:
+    """Total visa fees per currency; fee_in() only converts between SAR and USD, so a plan may have two"""
+    fees: Dict[str, float] = {}
+    for traveler in visa_travelers:
+        fees[traveler['currency']] = round(fees.get(traveler['currency'], 0) + traveler['cost'], 2)
+    return fees
+
+
+def in_currency(amounts: List[tuple], currency: str) -> tuple:
+    """
+    Total (amount, currency) pairs in one currency
+
+    Returns:
+        (total, separate): the total of the amounts with a fixed rate into the currency,
+        and the other amounts totalled per their own currency
+    """
+    total, separate = 0.0, {}
+    for amount, amount_currency in amounts:
+        rate = exchange_rate(amount_currency, currency)
+        if rate is None:
+            separate[amount_currency] = round(separate.get(amount_currency, 0) + amount, 2)
         else:
-            hotels = [
-                {
-                    'name': 'Madinah Hotel Near Haram',
-                    'stars': 5,
-                    'distance': '100m from Haram',
-                    'price_per_night': 150,
-                    'total_price': 450,
-                    'currency': user_data['budget']['currency'],
-                    'amenities': ['WiFi', 'Breakfast', 'Haram View', 'Restaurant'],
-                    'rating': 9.0
-                },
-                {
-                    'name': 'Madinah Budget Hotel',
-                    'stars': 4,
-                    'distance': '300m from Haram',
-                    'price_per_night': 120,
-                    'total_price': 360,
-                    'currency': user_data['budget']['currency'],
-                    'amenities': ['WiFi', 'Breakfast', 'Restaurant'],
-                    'rating': 8.5
-                }
-            ]
+            total += amount * rate
+    return round(total, 2), separate
+
+
+def cost_lines(currency: str, flight: Optional[Dict], hotels: List[Optional[Dict]],
+               visa_fees: Dict[str, float], num_travelers: int) -> Dict[str, Any]:
+    """
+    Flight, hotel and visa costs for a cost breakdown in the budget currency
+
+    Offers keep their own currency (Amadeus prices in USD, EUR, ...); each line is
+    converted where a fixed rate exists, and '<line>_separate' holds what is left
+    per currency, shown on its own and kept out of the total.
+    """
+    amounts = {
+        'flights': [(flight['price'] * num_travelers, flight['currency'])] if flight else [],
+        'hotels': [(hotel['total_price'] or 0, hotel['currency']) for hotel in hotels if hotel],
+        'visa': [(amount, fee_currency) for fee_currency, amount in visa_fees.items()]
+    }
+    lines = {'currency': currency}
+    for line, line_amounts in amounts.items():
+        lines[line], lines[f'{line}_separate'] = in_currency(line_amounts, currency)
+    return lines
+
+
+def itinerary_from_trip_data(trip_data: TripData, user_data: Dict) -> List[Dict]:
+    """Build the itinerary days from the agents' structured data (an arrival day if there is none)"""
+    if not trip_data.itinerary:
+        return [
+            {
+                'day': 1,
+                'title': 'Arrival & First Umrah',
+                'location': 'Makkah',
+                'date': user_data['travel_dates']['departure'],
+                'activities': [
+                    {'time': '06:45', 'description': 'Arrive at airport'},
+                    {'time': '09:30', 'description': 'Transfer to Makkah'},
+                    {'time': '11:00', 'description': 'Check-in at hotel'},
+                    {'time': '17:00', 'description': 'Perform Umrah (Tawaf & Sa\'i)'}
+                ]
+            }
+        ]
     
-    return hotels[:3]  # Limit to 3 options per city
+    days = []
+    for day in sorted(trip_data.itinerary, key=lambda day: day.day):
+        entry = day.model_dump(include={'day', 'title', 'location', 'date', 'activities'})
+        entry['date'] = entry['date'] or 'N/A'
+        if day.notes:
+            entry['notes'] = day.notes
+        days.append(entry)
+    return days
 
 
-def generate_trip_plan_from_ai(ai_responses: Dict[str, str]) -> Dict[str, Any]:
+def generate_trip_plan_from_ai(ai_responses: Dict[str, str], trip_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Generate structured trip plan from AI agent responses
     
     Args:
         ai_responses: Dictionary containing responses from all agents
+        trip_data: The orchestrator's structured 'data' payload (flight and hotel offers,
+            visa facts and itinerary days found by the specialist agents)
         
     Returns:
         Structured trip plan dictionary
@@ -1562,10 +1575,20 @@ def generate_trip_plan_from_ai(ai_responses: Dict[str, str]) -> Dict[str, Any]:
     user_data = st.session_state.user_data
     orchestrator_text = ai_responses.get('orchestrator', '')
     
-    # Parse flights and hotels from the orchestrator's response
-    flights = parse_flights_from_text(orchestrator_text, user_data)
-    makkah_hotels = parse_hotels_from_text(orchestrator_text, 'Makkah', user_data)
-    madinah_hotels = parse_hotels_from_text(orchestrator_text, 'Madinah', user_data)
+    # Options come from the agents' typed payload; the prose is only shown as the summary
+    data = parse_trip_data(trip_data) or TripData()
+    makkah_offers, madinah_offers = hotels_by_city(data.hotels)
+    
+    # The best package over every flight x hotel x hotel combination is listed first and preselected
+    packages = plan_packages(data, user_data)
+    best = packages['packages'][0] if packages['packages'] else {}
+    flights = flight_cards(recommended_first(
+        data.flights, best.get('flight'), lambda offer: offer.price_per_person
+    ))
+    makkah_hotels = hotel_cards(recommended_first(makkah_offers, best.get('makkah_hotel'), hotel_distance_key))
+    madinah_hotels = hotel_cards(recommended_first(madinah_offers, best.get('madinah_hotel'), hotel_distance_key))
+    visa_travelers = visa_for_travelers(user_data['travelers'], user_data['budget']['currency'])
+    visa_fees = visa_fees_by_currency(visa_travelers)
     
     # Build structured plan
     plan = {
@@ -1582,59 +1605,40 @@ def generate_trip_plan_from_ai(ai_responses: Dict[str, str]) -> Dict[str, Any]:
             'madinah': madinah_hotels
         },
         
+        'packages': [
+            {
+                'Flight': data.flights[package['flight']].airline if package['flight'] is not None else '-',
+                'Makkah hotel': makkah_offers[package['makkah_hotel']].name if package['makkah_hotel'] is not None else '-',
+                'Madinah hotel': madinah_offers[package['madinah_hotel']].name if package['madinah_hotel'] is not None else '-',
+                # Unpriced hotels (e.g. from a hotel list search) are not in the total
+                (f"Total ({packages['currency']})" if packages['hotels_priced']
+                 else f"Total excl. hotels ({packages['currency']})"): package['total_cost'],
+                'Distance to Haram (m)': package['distance_to_haram_m'],
+                'Stars': package['stars'],
+                'Within budget': '-' if package['within_budget'] is None else '✅' if package['within_budget'] else '⚠️'
+            }
+            for package in packages['packages']
+        ],
+        'packages_message': packages['message'],
+        
         'visa': {
-            'currency': user_data['budget']['currency'],
-            'total_cost': 150 * user_data['num_travelers'],
-            'travelers': [
-                {
-                    'name': t['name'],
-                    'nationality': t['nationality'],
-                    'visa_type': 'Umrah Visa (90 days)',
-                    'processing_time': '3-5 business days',
-                    'validity': '90 days from issue',
-                    'cost': 150,
-                    'currency': user_data['budget']['currency'],
-                    'required_documents': [
-                        'Valid passport (min 6 months validity)',
-                        'Recent passport-size photo',
-                        'Confirmed hotel booking',
-                        'Return flight ticket',
-                        'Vaccination certificate (Meningitis)'
-                    ],
-                    'application_steps': [
-                        '1. Complete online application at visa.visitsaudi.com',
-                        '2. Upload required documents',
-                        '3. Pay visa fee online',
-                        '4. Receive e-visa via email',
-                        '5. Print visa for immigration'
-                    ]
-                }
-                for t in user_data['travelers']
-            ]
+            'fees': visa_fees,
+            'travelers': visa_travelers
         },
         
         'itinerary': {
-            'days': [
-                {
-                    'day': 1,
-                    'title': 'Arrival & First Umrah',
-                    'location': 'Makkah',
-                    'date': user_data['travel_dates']['departure'],
-                    'activities': [
-                        {'time': '06:45', 'description': 'Arrive at airport'},
-                        {'time': '09:30', 'description': 'Transfer to Makkah'},
-                        {'time': '11:00', 'description': 'Check-in at hotel'},
-                        {'time': '17:00', 'description': 'Perform Umrah (Tawaf & Sa\'i)'}
-                    ]
-                }
-            ]
+            'days': itinerary_from_trip_data(data, user_data)
         },
         
         'cost_breakdown': {
-            'currency': user_data['budget']['currency'],
-            'flights': flights[0]['price'] * user_data['num_travelers'] if flights else 0,
-            'hotels': (makkah_hotels[0]['total_price'] + madinah_hotels[0]['total_price']) if makkah_hotels and madinah_hotels else 0,
-            'visa': 150 * user_data['num_travelers'],
+            # Amounts without a fixed rate into the budget currency are kept out of the total
+            **cost_lines(
+                user_data['budget']['currency'],
+                flights[0] if flights else None,
+                [hotels[0] if hotels else None for hotels in (makkah_hotels, madinah_hotels)],
+                visa_fees,
+                user_data['num_travelers']
+            ),
             'service_fee': 100,
             'subtotal': 0,
             'discount': 200,
@@ -1651,13 +1655,14 @@ def generate_trip_plan_from_ai(ai_responses: Dict[str, str]) -> Dict[str, Any]:
     }
     
     # Calculate totals
-    plan['cost_breakdown']['subtotal'] = (
+    plan['cost_breakdown']['subtotal'] = round(
         plan['cost_breakdown']['flights'] + 
         plan['cost_breakdown']['hotels'] + 
         plan['cost_breakdown']['visa'] + 
-        plan['cost_breakdown']['service_fee']
+        plan['cost_breakdown']['service_fee'],
+        2
     )
-    plan['cost_breakdown']['total'] = plan['cost_breakdown']['subtotal'] - plan['cost_breakdown']['discount']
+    plan['cost_breakdown']['total'] = round(plan['cost_breakdown']['subtotal'] - plan['cost_breakdown']['discount'], 2)
     
     return plan
 
@@ -1762,8 +1767,7 @@ def generate_mock_trip_plan():
         },
         
         'visa': {
-            'currency': user_data['budget']['currency'],
-            'total_cost': 150 * user_data['num_travelers'],
+            'fees': {user_data['budget']['currency']: 150 * user_data['num_travelers']},
             'travelers': [
                 {
                     'name': t['name'],
@@ -1848,8 +1852,11 @@ def generate_mock_trip_plan():
         'cost_breakdown': {
             'currency': user_data['budget']['currency'],
             'flights': 850 * user_data['num_travelers'],
+            'flights_separate': {},
             'hotels': 1350 * user_data['num_travelers'],
+            'hotels_separate': {},
             'visa': 150 * user_data['num_travelers'],
+            'visa_separate': {},
             'service_fee': 100,
             'subtotal': (850 + 1350 + 150) * user_data['num_travelers'] + 100,
             'discount': 200,
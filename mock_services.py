@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Local Mock Services
+Stand-in for the Amadeus REST API, the AgentCore Gateway MCP endpoint and the
+AgentCore runtime invoke API, with configurable latency and error injection.
+
+Run standalone:
+    python mock_services.py --port 8765 --latency-ms 80 --error-rate 0.02
+
+Then point the agents and clients at it:
+    AMADEUS_BASE_URL=http://127.0.0.1:8765
+    GATEWAY_URL=http://127.0.0.1:8765/mcp
+    GATEWAY_TOKEN_ENDPOINT=http://127.0.0.1:8765/oauth2/token
+    AGENTCORE_ENDPOINT_URL=http://127.0.0.1:8765
+
+Or start it in-process with MockServices (see benchmark.py).
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+CARRIERS = {
+    "SV": "SAUDI ARABIAN AIRLINES",
+    "EK": "EMIRATES",
+    "QR": "QATAR AIRWAYS",
+    "TK": "TURKISH AIRLINES",
+    "BA": "BRITISH AIRWAYS",
+    "EY": "ETIHAD AIRWAYS"
+}
+CONNECTIONS = {"EK": "DXB", "QR": "DOH", "TK": "IST", "EY": "AUH", "BA": "LHR", "SV": "RUH"}
+
+# Hotels are generated around these points
+HOLY_SITES = {
+    "MEC": (21.4225, 39.8262),
+    "MED": (24.4672, 39.6111),
+    "JED": (21.5433, 39.1728)
+}
+
+
+class MockConfig:
+    """Latency and fault injection settings (safe to change while the server runs)"""
+
+    def __init__(
+        self,
+        latency_ms: float = 50,
+        jitter_ms: float = 0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        offers_per_search: int = 5,
+        hotels_per_search: int = 20
+    ):
+        """
+        Args:
+            latency_ms: Base latency added to every API response
+            jitter_ms: Extra random latency, uniform in [0, jitter_ms]
+            error_rate: Share of API requests answered with 503
+            rate_limit_rate: Share of API requests answered with 429 (Retry-After: 0)
+            offers_per_search: Flight offers per search (capped by the 'max' parameter)
+            hotels_per_search: Hotels per hotel list search
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.offers_per_search = offers_per_search
+        self.hotels_per_search = hotels_per_search
+
+
+def _rng(*parts: Any) -> random.Random:
+    """Deterministic generator per request, so identical searches return identical offers"""
+    return random.Random("|".join(str(part) for part in parts))
+
+
+def _iso_duration(minutes: int) -> str:
+    return f"PT{minutes // 60}H{minutes % 60}M"
+
+
+def _itinerary(rng: random.Random, origin: str, destination: str, day: str, carrier: str) -> Dict[str, Any]:
+    """One itinerary with zero or one connection"""
+    departure = f"{day}T{rng.randint(0, 23):02d}:{rng.choice(['00', '15', '30', '45'])}:00"
+    total = rng.randint(300, 1100)
+    hub = CONNECTIONS[carrier]
+    if rng.random() < 0.4 or hub in (origin, destination):
+        stops = [(origin, destination, total)]
+    else:
+        first = total // 2
+        stops = [(origin, hub, first - 60), (hub, destination, total - first)]
+
+    segments = []
+    at = departure
+    for number, (frm, to, minutes) in enumerate(stops, 1):
+        arrive = _add_minutes(at, minutes)
+        segments.append({
+            "departure": {"iataCode": frm, "at": at},
+            "arrival": {"iataCode": to, "at": arrive},
+            "carrierCode": carrier,
+            "number": str(rng.randint(100, 999) + number),
+            "duration": _iso_duration(minutes),
+            "numberOfStops": 0
+        })
+        at = _add_minutes(arrive, 60)
+    return {"duration": _iso_duration(total), "segments": segments}
+
+
+def _add_minutes(timestamp: str, minutes: int) -> str:
+    return (datetime.fromisoformat(timestamp) + timedelta(minutes=minutes)).isoformat(timespec="seconds")
+
+
+def flight_offers(params: Dict[str, Any], config: MockConfig) -> Dict[str, Any]:
+    """Amadeus GET /v2/shopping/flight-offers response"""
+    origin = str(params.get("originLocationCode", "JFK")).upper()
+    destination = str(params.get("destinationLocationCode", "JED")).upper()
+    departure = str(params.get("departureDate", date.today().isoformat()))
+    return_date = params.get("returnDate")
+    adults = int(params.get("adults", 1))
+    cabin = str(params.get("travelClass", "ECONOMY")).upper()
+    count = min(config.offers_per_search, int(params.get("max", config.offers_per_search)))
+    non_stop = str(params.get("nonStop", "false")).lower() == "true"
+
+    rng = _rng(origin, destination, departure, return_date, adults, cabin)
+    multiplier = {"ECONOMY": 1, "PREMIUM_ECONOMY": 1.8, "BUSINESS": 3.5, "FIRST": 6}.get(cabin, 1)
+    offers = []
+    for i in range(1, count + 1):
+        carrier = rng.choice(list(CARRIERS))
+        itineraries = [_itinerary(rng, origin, destination, departure, carrier)]
+        if return_date:
+            itineraries.append(_itinerary(rng, destination, origin, str(return_date), carrier))
+        if non_stop and any(len(itinerary["segments"]) > 1 for itinerary in itineraries):
+            continue
+        total = round(rng.uniform(450, 1600) * multiplier * adults, 2)
+        offers.append({
+            "type": "flight-offer",
+            "id": str(i),
+            "numberOfBookableSeats": rng.randint(1, 9),
+            "itineraries": itineraries,
+            "price": {"currency": "USD", "total": f"{total:.2f}", "base": f"{total * 0.8:.2f}", "grandTotal": f"{total:.2f}"},
+            "validatingAirlineCodes": [carrier],
+            "travelerPricings": [
+                {"travelerId": str(t), "fareDetailsBySegment": [{"cabin": cabin}]} for t in range(1, adults + 1)
+            ]
+        })
+    return {
+        "meta": {"count": len(offers)},
+        "data": offers,
+        "dictionaries": {"carriers": {offer["validatingAirlineCodes"][0]: CARRIERS[offer["validatingAirlineCodes"][0]] for offer in offers}}
+    }
+
+
+def hotel_list(params: Dict[str, Any], config: MockConfig) -> Dict[str, Any]:
+    """Amadeus GET /v1/reference-data/locations/hotels/by-city and /by-geocode response"""
+    city = str(params.get("cityCode", "")).upper()
+    if city:
+        latitude, longitude = HOLY_SITES.get(city, HOLY_SITES["MEC"])
+    else:
+        latitude, longitude = float(params.get("latitude", 21.4225)), float(params.get("longitude", 39.8262))
+        city = min(HOLY_SITES, key=lambda code: abs(HOLY_SITES[code][0] - latitude) + abs(HOLY_SITES[code][1] - longitude))
+    radius = float(params.get("radius", 5))
+
+    rng = _rng(city, round(latitude, 3), round(longitude, 3), radius)
+    hotels = []
+    for i in range(config.hotels_per_search):
+        distance = round(rng.uniform(0.05, radius), 2)
+        hotels.append({
+            "chainCode": "MK",
+            "iataCode": city,
+            "name": f"MOCK {city} HOTEL {i + 1}",
+            "hotelId": f"MK{city}{i + 1:04d}",
+            "geoCode": {"latitude": latitude + rng.uniform(-0.01, 0.01), "longitude": longitude + rng.uniform(-0.01, 0.01)},
+            "address": {"countryCode": "SA"},
+            "distance": {"value": distance, "unit": "KM"},
+            "rating": str(rng.randint(3, 5))
+        })
+    hotels.sort(key=lambda hotel: hotel["distance"]["value"])
+    return {"data": hotels, "meta": {"count": len(hotels)}}
+
+
+def hotel_offers(params: Dict[str, Any], config: MockConfig) -> Dict[str, Any]:
+    """Amadeus GET /v3/shopping/hotel-offers response"""
+    hotel_ids = [hotel_id for hotel_id in str(params.get("hotelIds", "")).split(",") if hotel_id]
+    check_in = str(params.get("checkInDate", date.today().isoformat()))
+    check_out = str(params.get("checkOutDate", (date.today() + timedelta(days=1)).isoformat()))
+    try:
+        nights = max((date.fromisoformat(check_out) - date.fromisoformat(check_in)).days, 1)
+    except ValueError:
+        nights = 1
+
+    data = []
+    for hotel_id in hotel_ids:
+        rng = _rng(hotel_id, check_in, check_out)
+        if rng.random() < 0.15:
+            continue  # Sold out, as with the real API some hotels return no offer
+        total = round(rng.uniform(90, 600) * nights, 2)
+        data.append({
+            "type": "hotel-offers",
+            "hotel": {"hotelId": hotel_id, "name": f"MOCK HOTEL {hotel_id}", "cityCode": hotel_id[2:5]},
+            "available": True,
+            "offers": [{
+                "id": f"{hotel_id}-{check_in}",
+                "checkInDate": check_in,
+                "checkOutDate": check_out,
+                "room": {"typeEstimated": {"category": rng.choice(["STANDARD_ROOM", "DELUXE_ROOM", "SUITE"])}},
+                "price": {"currency": "USD", "base": f"{total * 0.85:.2f}", "total": f"{total:.2f}"}
+            }]
+        })
+    return {"data": data}
+
+
+# Gateway tool name -> REST handler taking the tool arguments as query parameters
+GATEWAY_TOOLS = {
+    "amadeus-api___searchFlights": flight_offers,
+    "amadeus-api___searchHotelsByCity": hotel_list,
+    "amadeus-api___searchHotelsByLocation": hotel_list,
+    "amadeus-api___getHotelOffers": hotel_offers
+}
+
+
+class MockServiceHandler(BaseHTTPRequestHandler):
+    """Routes Amadeus REST, Gateway MCP and AgentCore invoke requests"""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real services
+    # Headers and body go out in separate writes; with Nagle's algorithm and delayed ACK
+    # the body would wait ~40 ms on every keep-alive response and dominate the benchmark
+    disable_nagle_algorithm = True
+
+    @property
+    def config(self) -> MockConfig:
+        return self.server.mock_config
+
+    def log_message(self, format, *args):
+        pass  # Benchmarks send thousands of requests
+
+    def _send_json(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+
+    def _inject_faults(self) -> bool:
+        """Sleep for the configured latency; answer with an injected error if one is drawn"""
+        config = self.config
+        time.sleep((config.latency_ms + random.uniform(0, config.jitter_ms)) / 1000)
+        draw = random.random()
+        if draw < config.rate_limit_rate:
+            self.server.count("rate_limited")
+            self._send_json(429, {"errors": [{"status": 429, "title": "Too many requests"}]}, {"Retry-After": "0"})
+            return True
+        if draw < config.rate_limit_rate + config.error_rate:
+            self.server.count("errors")
+            self._send_json(503, {"errors": [{"status": 503, "title": "Service unavailable"}]})
+            return True
+        return False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.server.count("requests")
+
+        if url.path == "/v2/shopping/flight-offers":
+            handler = flight_offers
+        elif url.path.startswith("/v1/reference-data/locations/hotels/"):
+            handler = hotel_list
+        elif url.path == "/v3/shopping/hotel-offers":
+            handler = hotel_offers
+        else:
+            self._send_json(404, {"errors": [{"status": 404, "title": f"No mock for GET {url.path}"}]})
+            return
+
+        if not self._inject_faults():
+            self._send_json(200, handler(params, self.config))
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        body = self._read_body()
+        self.server.count("requests")
+
+        # OAuth client-credentials endpoints (Amadeus and Cognito); never delayed or failed
+        if url.path in ("/v1/security/oauth2/token", "/oauth2/token"):
+            self.server.count("token_requests")
+            self._send_json(200, {"access_token": f"mock-token-{random.getrandbits(32):x}", "token_type": "Bearer", "expires_in": 1799})
+        elif url.path == "/mcp":
+            if not self._inject_faults():
+                self._send_json(200, self._handle_mcp(json.loads(body or b"{}")))
+        elif url.path.startswith("/runtimes/") and url.path.endswith("/invocations"):
+            if not self._inject_faults():
+                self._send_json(200, self._handle_invocation(unquote(url.path), json.loads(body or b"{}")))
+        else:
+            self._send_json(404, {"errors": [{"status": 404, "title": f"No mock for POST {url.path}"}]})
+
+    def _handle_mcp(self, message: Any) -> Any:
+        """Answer a JSON-RPC request or batch (the batch costs one round of latency, like a parallel gateway)"""
+        if isinstance(message, list):
+            return [self._handle_mcp(item) for item in message]
+
+        request_id = message.get("id")
+        if message.get("method") == "tools/list":
+            return {"jsonrpc": "2.0", "id": request_id, "result": {"tools": [{"name": name} for name in GATEWAY_TOOLS]}}
+        if message.get("method") != "tools/call":
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": -32601, "message": "Method not found"}}
+
+        params = message.get("params", {})
+        handler = GATEWAY_TOOLS.get(params.get("name"))
+        if handler is None:
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": -32602, "message": f"Unknown tool {params.get('name')}"}}
+        self.server.count("tool_calls")
+        result = handler(params.get("arguments", {}), self.config)
+        return {"jsonrpc": "2.0", "id": request_id, "result": {"content": [{"type": "text", "text": json.dumps(result)}]}}
+
+    def _handle_invocation(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """AgentCore InvokeAgentRuntime: a registered runtime handler, else a canned answer"""
+        agent = path.split("/runtimes/", 1)[1].rsplit("/invocations", 1)[0].rsplit("/", 1)[-1]
+        self.server.count("invocations")
+        for name, handler in self.server.runtime_handlers.items():
+            if name in agent:
+                return handler(payload, None)
+        return {
+            "result": f"Mock response from {agent} for: {str(payload.get('prompt', ''))[:80]}",
+            "status": "success",
+            "data": {"version": "1.2", "flights": [], "hotels": [], "visa": [], "itinerary": []}
+        }
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: MockConfig):
+        super().__init__(address, MockServiceHandler)
+        self.mock_config = config
+        self.runtime_handlers: Dict[str, Callable[[Dict[str, Any], Any], Dict[str, Any]]] = {}
+        self.counters: Dict[str, int] = {}
+        self._counter_lock = threading.Lock()
+
+    def count(self, name: str):
+        with self._counter_lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+
+class MockServices:
+    """Runs the mock server on a background thread"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: Optional[MockConfig] = None):
+        """
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+            config: Latency and fault injection settings
+        """
+        self.config = config or MockConfig()
+        self.server = MockServer((host, port), self.config)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environment(self) -> Dict[str, str]:
+        """Environment variables that point the agents and clients at this server"""
+        return {
+            "AMADEUS_BASE_URL": self.url,
+            "AMADEUS_API_KEY": "mock-key",
+            "AMADEUS_API_SECRET": "mock-secret",
+            "GATEWAY_URL": f"{self.url}/mcp",
+            "GATEWAY_TOKEN_ENDPOINT": f"{self.url}/oauth2/token",
+            "AGENTCORE_ENDPOINT_URL": self.url
+        }
+
+    def register_runtime(self, name: str, handler: Callable[[Dict[str, Any], Any], Dict[str, Any]]):
+        """
+        Serve invocations of runtimes whose ARN contains name with an in-process entrypoint
+
+        Args:
+            name: Part of the runtime name (e.g. 'flight_agent' matches umrah_flight_agent-ufM0XiC3fw)
+            handler: A runtime's @app.entrypoint function, called as handler(payload, None)
+        """
+        self.server.runtime_handlers[name] = handler
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.server._counter_lock:
+            return dict(self.server.counters)
+
+    def start(self) -> "MockServices":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mock-services", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "MockServices":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    """Latency and fault injection options shared with benchmark.py"""
+    parser.add_argument("--latency-ms", type=float, default=50, help="Base latency per API response")
+    parser.add_argument("--jitter-ms", type=float, default=20, help="Extra random latency per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--offers", type=int, default=5, help="Flight offers per search")
+    parser.add_argument("--hotels", type=int, default=20, help="Hotels per hotel list search")
+
+
+def config_from_arguments(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        offers_per_search=args.offers,
+        hotels_per_search=args.hotels
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Amadeus, Gateway MCP and AgentCore services")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    services = MockServices(args.host, args.port, config_from_arguments(args))
+    print(f"Mock services listening on {services.url}")
+    for name, value in services.environment().items():
+        print(f"  export {name}={value}")
+    try:
+        services.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        services.server.server_close()
+        print(f"\nRequests served: {services.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Tests for the offer cache (agents/flight_agent/offer_cache.py)
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from agents.flight_agent.offer_cache import MemoryCacheBackend, OfferCache
+
+
+def test_cache_keys_are_normalized():
+    assert OfferCache.make_key("flights", {"origin": "jfk ", "return_date": None}) == \
+        OfferCache.make_key("flights", {"origin": "JFK"})
+
+
+def test_memory_backend_evicts_least_recently_used():
+    cache = OfferCache(MemoryCacheBackend(max_entries=2))
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_failed_fetches_are_not_cached():
+    cache = OfferCache(MemoryCacheBackend())
+    cache.get_or_fetch("k", lambda: {"error": "timeout"}, should_cache=lambda value: "error" not in value)
+    assert cache.get("k") is None
@@ -0,0 +1,110 @@
+"""
+Tests for the trip package optimizer (agents/orchestrator/package_optimizer.py)
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent))
+
+from agents.orchestrator.package_optimizer import optimize_packages, pareto_mask
+from agents.orchestrator.trip_contract import FlightLeg, FlightOffer, HotelOffer
+
+
+def flight(price, minutes=420, currency="USD"):
+    return FlightOffer(
+        airline="SV",
+        price_total=price,
+        currency=currency,
+        outbound=FlightLeg(departure_airport="LHR", arrival_airport="JED", duration_minutes=minutes)
+    )
+
+
+def hotel(city, price, distance=500, stars=4, currency="USD"):
+    return HotelOffer(
+        name=f"{city} {price}",
+        city=city,
+        price_total=price,
+        currency=currency,
+        distance_to_haram_m=distance,
+        stars=stars
+    )
+
+
+def brute_force_front(objectives):
+    """Distinct rows that no other row dominates"""
+    front = set()
+    for row in objectives:
+        dominated = any(np.all(other <= row) and np.any(other < row) for other in objectives)
+        if not dominated:
+            front.add(tuple(row))
+    return front
+
+
+def test_pareto_mask_matches_brute_force():
+    rng = np.random.default_rng(7)
+    for _ in range(50):
+        # Small integer values, so ties and duplicate rows are common
+        objectives = rng.integers(0, 5, size=(int(rng.integers(1, 40)), 3)).astype(float)
+        mask = pareto_mask(objectives)
+        kept = [tuple(row) for row in objectives[mask]]
+        assert len(kept) == len(set(kept))  # One of several identical rows
+        assert set(kept) == brute_force_front(objectives)
+
+
+def test_mixed_currencies_are_converted_or_excluded():
+    result = optimize_packages(
+        [flight(1000)],
+        [hotel("Makkah", 750, currency="SAR"), hotel("Makkah", 100, currency="EUR")],
+        [hotel("Madinah", 300)],
+        currency="USD"
+    )
+    assert result["excluded_offers"] == 1
+    assert [package["makkah_hotel"] for package in result["packages"]] == [0]
+    assert result["packages"][0]["total_cost"] == 1000 + 750 / 3.75 + 300
+
+
+def test_only_unconvertible_offers_explain_the_empty_result():
+    result = optimize_packages([flight(1000, currency="EUR")], [], [], currency="USD")
+    assert result["packages"] == []
+    assert result["excluded_offers"] == 1
+    assert result["message"] is not None
+
+
+def test_flights_without_hotels():
+    result = optimize_packages([flight(1000), flight(800, minutes=600)], [], [], travelers=2)
+    assert result["combinations"] == 2
+    assert {package["total_cost"] for package in result["packages"]} == {2000, 1600}
+    for package in result["packages"]:
+        assert package["makkah_hotel"] is None and package["madinah_hotel"] is None
+        assert package["distance_to_haram_m"] is None
+
+
+def test_budget_drops_packages_over_the_limit():
+    result = optimize_packages(
+        [flight(1000)],
+        [hotel("Makkah", 500, distance=100, stars=5), hotel("Makkah", 200, distance=900, stars=3)],
+        [],
+        budget_total=1200,
+        flexibility="Strict"
+    )
+    assert result["budget_limit"] == 1200
+    assert [package["total_cost"] for package in result["packages"]] == [1200]
+    assert result["packages"][0]["within_budget"]
+
+
+def test_over_budget_packages_are_returned_when_none_fit():
+    result = optimize_packages([flight(1000)], [hotel("Makkah", 500)], [], budget_total=500)
+    assert len(result["packages"]) == 1
+    assert not result["packages"][0]["within_budget"]
+
+
+def test_unpriced_hotels_are_not_checked_against_the_budget():
+    result = optimize_packages([flight(1000)], [hotel("Makkah", None)], [], budget_total=1000)
+    assert not result["hotels_priced"]
+    assert result["budget_limit"] is None
+    package = result["packages"][0]
+    assert package["total_cost"] == 1000
+    assert not package["hotels_priced"] and package["within_budget"] is None
@@ -0,0 +1,35 @@
+"""
+Tests for the offline prayer time calculator (agents/itinerary_agent/prayer_times.py)
+"""
+
+import sys
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent))
+
+from agents.itinerary_agent.prayer_times import PRAYERS, hijri_dates, prayer_minutes
+
+
+def test_hijri_dates_at_known_month_starts():
+    # 1 Ramadan 1445 and 1 Shawwal 1445 (Eid al-Fitr) in the Umm al-Qura calendar
+    days = np.array([date(2024, 3, 11).toordinal(), date(2024, 4, 10).toordinal()])
+    assert hijri_dates(days).tolist() == [[1445, 9, 1], [1445, 10, 1]]
+
+
+def test_prayer_minutes_in_makkah_on_1_ramadan_1445():
+    # Eve of Ramadan, then 1 Ramadan: Isha moves from Maghrib + 90 to Maghrib + 120 minutes
+    times = prayer_minutes("Makkah", date(2024, 3, 10), 2)
+    assert times.shape == (2, len(PRAYERS))
+    assert (np.diff(times, axis=1) > 0).all()
+    assert (times[:, 5] - times[:, 4]).tolist() == [90, 120]
+
+    fajr, sunrise, dhuhr, asr, maghrib, isha = times[1]
+    # Arabia Standard Time; solar noon in Makkah is 12:31 on this date
+    assert dhuhr == 12 * 60 + 31
+    assert 5 * 60 + 10 <= fajr <= 5 * 60 + 25
+    assert 6 * 60 + 28 <= sunrise <= 6 * 60 + 38
+    assert 15 * 60 + 50 <= asr <= 15 * 60 + 58
+    assert 18 * 60 + 25 <= maghrib <= 18 * 60 + 33
@@ -0,0 +1,32 @@
+"""
+Tests for the flight price calendar (agents/flight_agent/price_calendar.py)
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent))
+
+from agents.flight_agent.price_calendar import build_date_grid, build_price_calendar
+
+
+def test_price_calendar_picks_the_cheapest_combination():
+    grid = build_date_grid("2026-03-01", "2026-03-02", [7, 10])
+    assert len(grid) == 4
+    results = [
+        {"data": [{"price": {"grandTotal": str(price), "currency": "USD"}}]} if price else {"error": "No offers"}
+        for price in (900, 800, None, 850)
+    ]
+    calendar = build_price_calendar(grid, results)
+    assert calendar["cheapest"] == {
+        "departure_date": "2026-03-01", "return_date": "2026-03-11", "stay_nights": 10, "price": 800
+    }
+    assert calendar["rows"][1]["fares"] == {"7": None, "10": 850}
+    assert calendar["without_offers"] == 1
+
+
+def test_price_calendar_rejects_oversized_windows():
+    with pytest.raises(ValueError):
+        build_date_grid("2026-01-01", "2026-12-31", [7])
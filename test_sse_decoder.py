@@ -0,0 +1,46 @@
+"""
+Tests for the incremental SSE decoder (agents/orchestrator/sse_decoder.py)
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from agents.orchestrator.sse_decoder import SSEEvent, iter_sse_events, read_sse_data
+
+
+STREAM = (
+    b": keep-alive\r\n"
+    b"event: progress\r\nid: 1\r\ndata: {\"step\": \"flights\"}\r\n\r\n"
+    b"data: first line\r\ndata: second line\r\n\r\n"
+    b"data: caf\xc3\xa9\r\n\r\n"
+)
+
+
+def split(stream: bytes, size: int):
+    return [stream[i:i + size] for i in range(0, len(stream), size)]
+
+
+def test_events_survive_any_chunk_boundary():
+    expected = [
+        SSEEvent(data='{"step": "flights"}', event="progress", id="1"),
+        SSEEvent(data="first line\nsecond line", id="1"),
+        SSEEvent(data="café", id="1")
+    ]
+    # Chunk sizes of 1 and 2 split CRLF pairs and the UTF-8 sequence
+    for size in (1, 2, 3, 7, len(STREAM)):
+        assert list(iter_sse_events(split(STREAM, size))) == expected
+
+
+def test_final_event_without_blank_line_is_flushed():
+    assert read_sse_data([b"data: a\n\n", b"data: b"]) == ["a", "b"]
+
+
+def test_comments_and_empty_stream_yield_nothing():
+    assert read_sse_data([b": ping\r\n\r\n"]) == []
+    assert read_sse_data([]) == []
+
+
+def test_stream_ending_in_a_bare_carriage_return_keeps_its_event():
+    assert read_sse_data([b"data: x\r\n\r"]) == ["x"]
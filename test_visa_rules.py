@@ -0,0 +1,23 @@
+"""
+Tests for the visa rules table (agents/visa_agent/visa_rules.py)
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from agents.visa_agent.visa_rules import get_visa_rules
+
+
+def test_visa_groups_are_evaluated_once_per_nationality_and_age_band():
+    rules = get_visa_rules()
+    groups, assignment = rules.evaluate_travelers([
+        {"name": "A", "nationality": "GB", "age": 40},
+        {"name": "B", "nationality": "United Kingdom", "age": 35},
+        {"name": "C", "nationality": "GB", "age": 0.5}
+    ])
+    assert assignment == [0, 0, 1]
+    assert groups[0].travelers == ["A", "B"]
+    assert any(v.startswith("Meningococcal") for v in groups[0].vaccinations)
+    assert not any(v.startswith("Meningococcal") for v in groups[1].vaccinations)